@@ -1,5 +1,24 @@
-from .models import StageEvent, AgentFinding, AgentRecommendation
-from .orchestrator import AgentOrchestrator
+"""Secrux AI agents and orchestration.
+
+Exports are resolved on first access so that importing a submodule (the stage runner,
+`secrux_ai.models`) does not load the orchestrator and everything behind it.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .models import AgentFinding, AgentRecommendation, StageEvent
+    from .orchestrator import AgentOrchestrator
+
+_EXPORTS = {
+    "StageEvent": "models",
+    "AgentFinding": "models",
+    "AgentRecommendation": "models",
+    "AgentOrchestrator": "orchestrator",
+}
 
 __all__ = [
     "StageEvent",
@@ -8,3 +27,15 @@ __all__ = [
     "AgentOrchestrator",
 ]
 
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
-from abc import ABC, abstractmethod
+import asyncio
+from abc import ABC
 from typing import Any, Dict, Iterable, List, Optional
 
+from ..aio import run_sync
 from ..models import AgentContext, AgentFinding, StageType
 
 
 class BaseAgent(ABC):
-    """Base class for all agents."""
+    """Base class for all agents.
+
+    Subclasses implement `run` (blocking) and/or `arun` (async). The missing side is
+    adapted: `arun` runs a blocking `run` in a worker thread, and `run` drives an
+    async-only `arun` on the shared bridge loop.
+    """
 
     def __init__(
         self,
@@ -15,16 +22,23 @@ class BaseAgent(ABC):
         params: Optional[Dict[str, Any]] = None,
         stage_types: Optional[Iterable[str]] = None,
     ) -> None:
+        if type(self).run is BaseAgent.run and type(self).arun is BaseAgent.arun:
+            raise TypeError(f"{type(self).__name__} must implement run() or arun()")
         self.name = name
         self.params = params or {}
         self.stage_types = {StageType(st) for st in stage_types} if stage_types else None
 
+    @property
+    def is_async_native(self) -> bool:
+        return type(self).arun is not BaseAgent.arun
+
     def supports(self, context: AgentContext) -> bool:
         if self.stage_types is None:
             return True
         return context.event.stage_type in self.stage_types
 
-    @abstractmethod
     def run(self, context: AgentContext) -> List[AgentFinding]:
-        ...
+        return run_sync(self.arun(context))
 
+    async def arun(self, context: AgentContext) -> List[AgentFinding]:
+        return await asyncio.to_thread(self.run, context)
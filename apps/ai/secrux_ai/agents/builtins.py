@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import List
 
+from ..mcp.base import ainvoke_tool
 from ..models import AgentContext, AgentFinding, FindingStatus, Severity
 from .base import BaseAgent
 
@@ -44,6 +45,10 @@ class SignalAwareAgent(BaseAgent):
             )
         return findings
 
+    async def arun(self, context: AgentContext) -> List[AgentFinding]:
+        # Pure in-memory checks; no need for a worker thread.
+        return self.run(context)
+
 
 class LogHeuristicsAgent(BaseAgent):
     """Lightweight heuristics scanning for common engine issues inside log excerpts."""
@@ -83,11 +88,14 @@ class LogHeuristicsAgent(BaseAgent):
             )
         ]
 
+    async def arun(self, context: AgentContext) -> List[AgentFinding]:
+        return self.run(context)
+
 
 class McpReviewAgent(BaseAgent):
     """Delegates to an MCP tool to produce a structured review."""
 
-    def run(self, context: AgentContext) -> List[AgentFinding]:
+    async def arun(self, context: AgentContext) -> List[AgentFinding]:
         client = context.mcp_client
         if client is None:
             return [
@@ -108,7 +116,7 @@ class McpReviewAgent(BaseAgent):
             "signals": context.event.signals.model_dump(by_alias=True),
         }
         tool_name = self.params.get("tool", "stage-reviewer")
-        result = client.invoke_tool(tool_name, payload)
+        result = await ainvoke_tool(client, tool_name, payload)
         summary = result.get("summary", "AI review completed")
         severity_value = result.get("severity", "INFO")
         try:
@@ -5,10 +5,12 @@ import os
 import re
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from ..debug.prompt_dump import dump_finding_payload, dump_llm_request, dump_llm_response
+from ..llm import LLMThrottledError, apost_json
+from ..llm_cache import cache_key, get_response_cache, is_cacheable
 from ..models import AgentContext, AgentFinding, FindingStatus, Severity
+from ..prompt_budget import PromptBuilder, count_tokens, prompt_budget
+from ..tracing import span
 from .base import BaseAgent
 
 
@@ -21,7 +23,7 @@ class ScaIssueReviewAgent(BaseAgent):
     - Provide short bilingual summaries and fix hints.
     """
 
-    def run(self, context: AgentContext) -> List[AgentFinding]:
+    async def arun(self, context: AgentContext) -> List[AgentFinding]:
         mode = str(self.params.get("mode") or "simple").lower()
         issue = self._extract_issue(context)
         if not issue:
@@ -34,7 +36,7 @@ class ScaIssueReviewAgent(BaseAgent):
                 )
             ]
 
-        verdict, suggested_status, severity, confidence, opinion_i18n, summary, fix_hint = self._review(context, issue, mode)
+        verdict, suggested_status, severity, confidence, opinion_i18n, summary, fix_hint = await self._review(context, issue, mode)
         return [
             AgentFinding(
                 agent=self.name,
@@ -64,7 +66,7 @@ class ScaIssueReviewAgent(BaseAgent):
             return issue
         return None
 
-    def _review(
+    async def _review(
         self,
         context: AgentContext,
         issue: Dict[str, Any],
@@ -77,7 +79,7 @@ class ScaIssueReviewAgent(BaseAgent):
         confidence = 0.6
 
         prompt = self._build_prompt(issue)
-        llm_output = self._call_llm(context, prompt, mode)
+        llm_output = await self._call_llm(context, prompt, mode)
         if llm_output:
             verdict = self._normalize_verdict(llm_output.get("verdict"))
             severity = self._parse_severity(llm_output.get("severity") or base_severity.value)
@@ -95,7 +97,7 @@ class ScaIssueReviewAgent(BaseAgent):
         summary = opinion_i18n["en"]["summary"]
         return verdict, suggested_status, severity, confidence, opinion_i18n, summary, None
 
-    def _build_prompt(self, issue: Dict[str, Any]) -> str:
+    def _build_prompt(self, issue: Dict[str, Any]) -> PromptBuilder:
         vuln_id = issue.get("vulnId") or issue.get("vuln_id") or "N/A"
         pkg = issue.get("packageName") or issue.get("componentName") or "N/A"
         installed = issue.get("installedVersion") or issue.get("componentVersion") or ""
@@ -109,46 +111,40 @@ class ScaIssueReviewAgent(BaseAgent):
         usage = issue.get("usageEvidence") if isinstance(issue.get("usageEvidence"), dict) else {}
         usage_entries = usage.get("entries") if isinstance(usage.get("entries"), list) else []
 
-        parts: List[str] = [
-            f"[Vulnerability] {vuln_id}",
-            f"[Package] {pkg}{'@' + str(installed) if installed else ''}{(' -> ' + str(fixed)) if fixed else ''}",
-        ]
+        # Usage evidence decides the verdict, so it outranks the advisory text.
+        prompt = PromptBuilder().line(f"[Vulnerability] {vuln_id}")
+        prompt.line(f"[Package] {pkg}{'@' + str(installed) if installed else ''}{(' -> ' + str(fixed)) if fixed else ''}")
         if purl:
-            parts.append(f"[PURL] {purl}")
+            prompt.line(f"[PURL] {purl}")
         if primary:
-            parts.append(f"[Reference] {primary}")
+            prompt.line(f"[Reference] {primary}")
         if title:
-            parts.append(f"[Title] {title}")
+            prompt.line(f"[Title] {title}")
         if description:
-            parts.append("[Description]")
-            parts.append(str(description)[:2000])
+            prompt.add("[Description]", str(description), priority=2, share=0.3)
         if cvss:
-            parts.append("[CVSS]")
-            parts.append(json.dumps(cvss, ensure_ascii=False)[:2000])
-
-        parts.append("[Task] Based on the package version and the usage evidence, determine if this SCA issue is a true positive or false positive. Provide concise fix hints if confirmed.")
-
-        if usage_entries:
-            parts.append("[Usage evidence]")
-            shown = 0
-            for item in usage_entries:
-                if not isinstance(item, dict):
-                    continue
-                file = item.get("file") or "unknown"
-                line = item.get("line") or ""
-                kind = item.get("kind") or ""
-                snippet = item.get("snippet") or ""
-                snippet = str(snippet).strip().replace("\t", " ")[:300]
-                parts.append(f"- {file}:{line} {kind} {snippet}")
-                shown += 1
-                if shown >= 30:
-                    break
+            prompt.add("[CVSS]", json.dumps(cvss, ensure_ascii=False), priority=3)
+
+        prompt.line("[Task] Based on the package version and the usage evidence, determine if this SCA issue is a true positive or false positive. Provide concise fix hints if confirmed.")
+
+        usage_lines: List[str] = []
+        for item in usage_entries:
+            if not isinstance(item, dict):
+                continue
+            file = item.get("file") or "unknown"
+            line = item.get("line") or ""
+            kind = item.get("kind") or ""
+            snippet = item.get("snippet") or ""
+            snippet = str(snippet).strip().replace("\t", " ")[:300]
+            usage_lines.append(f"- {file}:{line} {kind} {snippet}")
+        if usage_lines:
+            prompt.add("[Usage evidence]", usage_lines, priority=1, share=0.6, noun="usages")
         else:
-            parts.append("[Usage evidence] <none found>")
+            prompt.line("[Usage evidence] <none found>")
 
-        return "\n".join(parts)
+        return prompt
 
-    def _call_llm(self, context: AgentContext, prompt: str, mode: str) -> Optional[Dict[str, Any]]:
+    async def _call_llm(self, context: AgentContext, prompt: PromptBuilder, mode: str) -> Optional[Dict[str, Any]]:
         extra = context.event.extra or {}
         job_id = extra.get("jobId")
         target_id = getattr(context.event, "stage_id", None)
@@ -194,15 +190,23 @@ class ScaIssueReviewAgent(BaseAgent):
             "summary (string, default to opinionI18n.en.summary), "
             "fixHint (string, default to opinionI18n.en.fixHint)."
         )
+        with span("prompt.render"):
+            user = prompt.render(model, prompt_budget(model, reserved=count_tokens(system, model)))
         request_body = {
             "model": model,
             "temperature": temperature,
             "messages": [
                 {"role": "system", "content": system},
-                {"role": "user", "content": prompt},
+                {"role": "user", "content": user},
             ],
         }
 
+        cache = get_response_cache()
+        key = cache_key(model, system, user, temperature) if cache is not None else None
+        data = cache.get(key) if key is not None else None
+        if data is not None:
+            return self._parse_completion(data)
+
         dump_llm_request(
             job_id=str(job_id) if job_id is not None else None,
             tenant_id=getattr(context.event, "tenant_id", None),
@@ -217,10 +221,10 @@ class ScaIssueReviewAgent(BaseAgent):
         )
 
         try:
-            with httpx.Client(timeout=90) as client:
-                resp = client.post(url, headers={"Authorization": f"Bearer {api_key}"}, json=request_body)
-                resp.raise_for_status()
-                data = resp.json()
+            with span("llm.chat_completion", purpose="review", model=model):
+                data = await apost_json(url, request_body, headers={"Authorization": f"Bearer {api_key}"}, timeout=90)
+            if key is not None and is_cacheable(data):
+                cache.put(key, data)
         except Exception as exc:
             dump_llm_response(
                 job_id=str(job_id) if job_id is not None else None,
@@ -234,6 +238,9 @@ class ScaIssueReviewAgent(BaseAgent):
                 response_json=None,
                 error=str(exc),
             )
+            if isinstance(exc, LLMThrottledError):
+                # Fail the job instead of reporting a review the model never gave.
+                raise
             return None
 
         dump_llm_response(
@@ -248,7 +255,9 @@ class ScaIssueReviewAgent(BaseAgent):
             response_json=data if isinstance(data, dict) else None,
             error=None,
         )
+        return self._parse_completion(data)
 
+    def _parse_completion(self, data: Any) -> Optional[Dict[str, Any]]:
         content = None
         if isinstance(data, dict):
             choices = data.get("choices")
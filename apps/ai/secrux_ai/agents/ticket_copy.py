@@ -4,10 +4,10 @@ import json
 import os
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from ..debug.prompt_dump import dump_llm_request, dump_llm_response
+from ..llm import LLMThrottledError, apost_json
 from ..models import AgentContext, AgentFinding, FindingStatus, Severity
+from ..tracing import span
 from .base import BaseAgent
 
 
@@ -17,7 +17,7 @@ class TicketCopyAgent(BaseAgent):
     Expected payload (stage job): context.event.extra.payload = { ticket: {...}, findings: [...], action: generate|polish }
     """
 
-    def run(self, context: AgentContext) -> List[AgentFinding]:
+    async def arun(self, context: AgentContext) -> List[AgentFinding]:
         extra = context.event.extra or {}
         payload = extra.get("payload") if isinstance(extra, dict) else None
         if not isinstance(payload, dict):
@@ -29,7 +29,7 @@ class TicketCopyAgent(BaseAgent):
         provider = str(ticket.get("provider") or ticket.get("providerKey") or "unknown")
 
         prompt = self._build_prompt(action=action, provider=provider, ticket=ticket, findings=findings)
-        llm_output = self._maybe_call_llm(context, prompt)
+        llm_output = await self._maybe_call_llm(context, prompt)
         if not llm_output:
             title_i18n, desc_i18n = self._fallback_copy(provider=provider, findings=findings)
             return [
@@ -118,7 +118,7 @@ class TicketCopyAgent(BaseAgent):
         }
         return json.dumps(base, ensure_ascii=False, indent=2)
 
-    def _maybe_call_llm(self, context: AgentContext, user_json: str) -> Optional[Dict[str, Any]]:
+    async def _maybe_call_llm(self, context: AgentContext, user_json: str) -> Optional[Dict[str, Any]]:
         extra = context.event.extra or {}
         payload = extra.get("payload") if isinstance(extra, dict) else None
         payload = payload if isinstance(payload, dict) else {}
@@ -179,22 +179,20 @@ class TicketCopyAgent(BaseAgent):
         )
 
         try:
-            with httpx.Client(timeout=httpx.Timeout(60.0, connect=10.0)) as client:
-                resp = client.post(url, json=body, headers=headers)
-                resp.raise_for_status()
-                data = resp.json()
-                dump_llm_response(
-                    job_id=job_id,
-                    tenant_id=str(tenant_id) if tenant_id is not None else None,
-                    target_id=str(target_id) if target_id is not None else None,
-                    agent=getattr(self, "name", None),
-                    mode=mode,
-                    purpose="review",
-                    url=url,
-                    model=model,
-                    response_json=data if isinstance(data, dict) else {"raw": data},
-                    error=None,
-                )
+            with span("llm.chat_completion", purpose="ticket_copy", model=model):
+                data = await apost_json(url, body, headers=headers)
+            dump_llm_response(
+                job_id=job_id,
+                tenant_id=str(tenant_id) if tenant_id is not None else None,
+                target_id=str(target_id) if target_id is not None else None,
+                agent=getattr(self, "name", None),
+                mode=mode,
+                purpose="review",
+                url=url,
+                model=model,
+                response_json=data if isinstance(data, dict) else {"raw": data},
+                error=None,
+            )
         except Exception as exc:
             dump_llm_response(
                 job_id=job_id,
@@ -208,6 +206,9 @@ class TicketCopyAgent(BaseAgent):
                 response_json=None,
                 error=str(exc),
             )
+            if isinstance(exc, LLMThrottledError):
+                # Fail the job instead of reporting a review the model never gave.
+                raise
             return None
 
         content = (
@@ -1,34 +1,29 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import re
-from typing import Any, Dict, List, Optional
-
-import httpx
-from tree_sitter_languages import get_parser
+from typing import Any, Dict, List, Optional, Tuple
 
+from ..call_chains import build_call_chains
+from ..llm import LLMThrottledError, apost_json
+from ..llm_cache import cache_key, get_response_cache, is_cacheable
+from ..mcp.base import ainvoke_tool
 from ..models import AgentContext, AgentFinding, FindingStatus, Severity
+from ..prompt_budget import PromptBuilder, count_tokens, prompt_budget
+from ..task_cache import task_cache_from
+from ..tracing import span
+from ..treesitter import call_expressions, extract_file_context, language_for_path
+from ..treesitter import parse as parse_tree
+from ..translation import MODE as TRANSLATION_MODE
+from ..translation import active_deferred, attach_finding, cached_translation, opinion_text, remember_translation
 from ..debug.prompt_dump import dump_llm_request, dump_llm_response, dump_finding_payload
 from .base import BaseAgent
 
 
-LANG_MAP = {
-    ".js": "javascript",
-    ".ts": "typescript",
-    ".tsx": "typescript",
-    ".jsx": "javascript",
-    ".py": "python",
-    ".java": "java",
-    ".go": "go",
-    ".rb": "ruby",
-    ".rs": "rust",
-    ".c": "c",
-    ".cpp": "cpp",
-    ".cc": "cpp",
-    ".cs": "c_sharp",
-    ".php": "php",
-}
+# Upper bound on reader calls per file (each returns at most FILE_READER_MAX_LINES lines).
+_MAX_FILE_PAGES = 50
 
 
 class VulnReviewAgent(BaseAgent):
@@ -38,7 +33,7 @@ class VulnReviewAgent(BaseAgent):
     - precise: use SARIF-style dataflow + optional AST call extraction
     """
 
-    def run(self, context: AgentContext) -> List[AgentFinding]:
+    async def arun(self, context: AgentContext) -> List[AgentFinding]:
         mode = (self.params.get("mode") or "simple").lower()
         finding = self._extract_finding(context)
         if not finding:
@@ -52,8 +47,8 @@ class VulnReviewAgent(BaseAgent):
             ]
 
         if mode == "precise":
-            return [self._run_precise(context, finding)]
-        return [self._run_simple(context, finding)]
+            return [await self._run_precise(context, finding)]
+        return [await self._run_simple(context, finding)]
 
     def _extract_finding(self, context: AgentContext) -> Optional[Dict[str, Any]]:
         extra = context.event.extra or {}
@@ -63,21 +58,21 @@ class VulnReviewAgent(BaseAgent):
         # fallback: if entire event represents a single finding (custom payload)
         return None
 
-    def _run_simple(self, context: AgentContext, finding: Dict[str, Any]) -> AgentFinding:
+    async def _run_simple(self, context: AgentContext, finding: Dict[str, Any]) -> AgentFinding:
         snippet = finding.get("codeSnippet") or {}
         location = finding.get("location") or {}
         rule_id = finding.get("ruleId") or finding.get("rule_id")
         severity = self._parse_severity(finding.get("severity"))
         code_text = self._format_snippet(snippet)
         summary = f"Quick AI review for rule {rule_id or 'N/A'}"
-        prompt_parts = [
-            f"[Rule] {rule_id or 'N/A'} | Severity {severity.value}",
-            f"[Location] {location.get('path','unknown')}:{location.get('line') or location.get('startLine') or ''}",
-            "[Task] Provide a concise assessment: real issue vs false positive, and a short fix hint.",
-            "[Code snippet]",
-            code_text or "<no snippet provided>",
-        ]
-        llm_output = self._maybe_call_llm(context, "\n".join(prompt_parts))
+        prompt = (
+            PromptBuilder()
+            .line(f"[Rule] {rule_id or 'N/A'} | Severity {severity.value}")
+            .line(f"[Location] {location.get('path','unknown')}:{location.get('line') or location.get('startLine') or ''}")
+            .line("[Task] Provide a concise assessment: real issue vs false positive, and a short fix hint.")
+            .add("[Code snippet]", code_text, placeholder="<no snippet provided>")
+        )
+        llm_output = await self._maybe_call_llm(context, prompt)
         if llm_output:
             suggested_status = self._status_from_llm(llm_output)
             opinion_i18n = llm_output.get("opinionI18n") if isinstance(llm_output.get("opinionI18n"), dict) else None
@@ -85,18 +80,21 @@ class VulnReviewAgent(BaseAgent):
             if opinion_i18n:
                 en = opinion_i18n.get("en") if isinstance(opinion_i18n.get("en"), dict) else None
                 summary_i18n = en.get("summary") if en else None
-            return AgentFinding(
-                agent=self.name,
-                severity=self._parse_severity(llm_output.get("severity") or severity.value),
-                status=suggested_status or FindingStatus.OPEN,
-                summary=str(summary_i18n or llm_output.get("summary") or summary),
-                details={
-                    "mode": "simple",
-                    "ruleId": rule_id,
-                    "location": location,
-                    "llm": {k: v for k, v in llm_output.items() if k != "raw"},
-                    "snippet": code_text,
-                },
+            return attach_finding(
+                llm_output,
+                AgentFinding(
+                    agent=self.name,
+                    severity=self._parse_severity(llm_output.get("severity") or severity.value),
+                    status=suggested_status or FindingStatus.OPEN,
+                    summary=str(summary_i18n or llm_output.get("summary") or summary),
+                    details={
+                        "mode": "simple",
+                        "ruleId": rule_id,
+                        "location": location,
+                        "llm": {k: v for k, v in llm_output.items() if k != "raw"},
+                        "snippet": code_text,
+                    },
+                ),
             )
         details = {
             "mode": "simple",
@@ -123,7 +121,7 @@ class VulnReviewAgent(BaseAgent):
             details=details,
         )
 
-    def _run_precise(self, context: AgentContext, finding: Dict[str, Any]) -> AgentFinding:
+    async def _run_precise(self, context: AgentContext, finding: Dict[str, Any]) -> AgentFinding:
         dataflow = finding.get("dataflow") or finding.get("dataFlow") or {}
         nodes = dataflow.get("nodes") or []
         edges = dataflow.get("edges") or []
@@ -133,28 +131,43 @@ class VulnReviewAgent(BaseAgent):
         location = finding.get("location") or {}
         rule_id = finding.get("ruleId") or finding.get("rule_id")
         severity = self._parse_severity(finding.get("severity"))
-        enrichment_text = self._format_enrichment(finding.get("enrichment"))
+        enrichment_items = self._format_enrichment(finding.get("enrichment"))
 
-        # AST extraction on snippet (best-effort)
+        # AST extraction (best-effort): the whole enclosing file when `ast_scope` is "file"
+        # and a file-reader MCP is attached, otherwise just the snippet lines.
         ast_depth = int(self.params.get("ast_depth") or 0)
         ast_calls: List[str] = []
-        if ast_depth > 0:
+        file_context: Optional[Dict[str, Any]] = None
+        if ast_depth > 0 and str(self.params.get("ast_scope") or "snippet").lower() == "file":
+            file_context = await self._file_ast_context(context, location, ast_depth)
+        if file_context is not None:
+            ast_calls = file_context.get("calls") or []
+        elif ast_depth > 0:
             code_text = self._format_snippet(snippet, with_line_numbers=False)
             ast_calls = self._extract_calls(code_text, location.get("path", ""))
 
         summary = f"Precise AI review for rule {rule_id or 'N/A'}"
-        prompt_parts = [
-            f"[Rule] {rule_id or 'N/A'} | Severity {severity.value}",
-            f"[Location] {location.get('path','unknown')}:{location.get('line') or location.get('startLine') or ''}",
-            "[Task] Decide true positive vs false positive, and give fix hint. Use the call chain if present.",
-            "[Call chains]",
-            "\n".join(call_chain_lines) or "<no call chain>",
-            "[Code snippet]",
-            self._format_snippet(snippet) or "<no snippet provided>",
-        ]
-        if enrichment_text:
-            prompt_parts.extend(["[Enrichment]", enrichment_text])
-        llm_output = self._maybe_call_llm(context, "\n".join(prompt_parts))
+        # Priorities: snippet, then call chains, then file context, then enrichment.
+        prompt = (
+            PromptBuilder()
+            .line(f"[Rule] {rule_id or 'N/A'} | Severity {severity.value}")
+            .line(f"[Location] {location.get('path','unknown')}:{location.get('line') or location.get('startLine') or ''}")
+            .line("[Task] Decide true positive vs false positive, and give fix hint. Use the call chain if present.")
+            .add(
+                "[Call chains]",
+                [self._format_call_chain(idx, chain) for idx, chain in enumerate(call_chains, start=1)],
+                priority=1,
+                placeholder="<no call chain>",
+                share=0.5,
+                noun="chains",
+            )
+            .add("[Code snippet]", self._format_snippet(snippet), placeholder="<no snippet provided>", share=0.5)
+        )
+        if file_context is not None:
+            self._add_file_context(prompt, file_context)
+        if enrichment_items:
+            prompt.add("[Enrichment]", enrichment_items, priority=3, noun="enrichment blocks")
+        llm_output = await self._maybe_call_llm(context, prompt)
         if llm_output:
             suggested_status = self._status_from_llm(llm_output)
             opinion_i18n = llm_output.get("opinionI18n") if isinstance(llm_output.get("opinionI18n"), dict) else None
@@ -162,21 +175,25 @@ class VulnReviewAgent(BaseAgent):
             if opinion_i18n:
                 en = opinion_i18n.get("en") if isinstance(opinion_i18n.get("en"), dict) else None
                 summary_i18n = en.get("summary") if en else None
-            return AgentFinding(
-                agent=self.name,
-                severity=self._parse_severity(llm_output.get("severity") or severity.value),
-                status=suggested_status or FindingStatus.OPEN,
-                summary=str(summary_i18n or llm_output.get("summary") or summary),
-                details={
-                    "mode": "precise",
-                    "ruleId": rule_id,
-                    "location": location,
-                    "callChain": call_chain_lines,
-                    "callChains": call_chains,
-                    "astCalls": ast_calls,
-                    "llm": {k: v for k, v in llm_output.items() if k != "raw"},
-                    "snippet": self._format_snippet(snippet),
-                },
+            return attach_finding(
+                llm_output,
+                AgentFinding(
+                    agent=self.name,
+                    severity=self._parse_severity(llm_output.get("severity") or severity.value),
+                    status=suggested_status or FindingStatus.OPEN,
+                    summary=str(summary_i18n or llm_output.get("summary") or summary),
+                    details={
+                        "mode": "precise",
+                        "ruleId": rule_id,
+                        "location": location,
+                        "callChain": call_chain_lines,
+                        "callChains": call_chains,
+                        "astCalls": ast_calls,
+                        "astContext": file_context,
+                        "llm": {k: v for k, v in llm_output.items() if k != "raw"},
+                        "snippet": self._format_snippet(snippet),
+                    },
+                ),
             )
         details = {
             "mode": "precise",
@@ -186,6 +203,7 @@ class VulnReviewAgent(BaseAgent):
             "callChain": call_chain_lines,
             "callChains": call_chains,
             "astCalls": ast_calls,
+            "astContext": file_context,
             "snippet": self._format_snippet(snippet),
             "opinionI18n": {
                 "zh": {
@@ -206,7 +224,7 @@ class VulnReviewAgent(BaseAgent):
             details=details,
         )
 
-    def _maybe_call_llm(self, context: AgentContext, prompt: str) -> Optional[Dict[str, Any]]:
+    async def _maybe_call_llm(self, context: AgentContext, prompt: PromptBuilder) -> Optional[Dict[str, Any]]:
         # Optional debug dump of the raw finding payload (works even when live LLM calls are disabled).
         extra = context.event.extra or {}
         job_id = extra.get("jobId") if isinstance(extra, dict) else None
@@ -250,14 +268,16 @@ class VulnReviewAgent(BaseAgent):
             "summary (string, default to opinionI18n.en.summary), "
             "fixHint (string, default to opinionI18n.en.fixHint)."
         )
-        data = self._call_chat_completion(
+        with span("prompt.render"):
+            user = prompt.render(model, prompt_budget(model, reserved=count_tokens(system, model)))
+        data = await self._call_chat_completion(
             context=context,
             purpose="review",
             url=url,
             api_key=api_key,
             model=model,
             system=system,
-            user=prompt,
+            user=user,
         )
         if not data:
             return None
@@ -273,7 +293,7 @@ class VulnReviewAgent(BaseAgent):
         if not parsed:
             return None
         parsed = self._normalize_llm_output(parsed)
-        parsed = self._ensure_bilingual(
+        parsed = await self._ensure_bilingual(
             context=context,
             url=url,
             api_key=api_key,
@@ -294,9 +314,10 @@ class VulnReviewAgent(BaseAgent):
             return suggested
         return None
 
-    def _format_enrichment(self, enrichment: Any) -> str:
+    def _format_enrichment(self, enrichment: Any) -> List[str]:
+        """Enrichment as prompt items, most relevant first (the token budget trims from the end)."""
         if not isinstance(enrichment, dict) or not enrichment:
-            return ""
+            return []
 
         blocks = enrichment.get("blocks")
         if isinstance(blocks, list) and blocks:
@@ -385,11 +406,11 @@ class VulnReviewAgent(BaseAgent):
             ],
         }
         try:
-            return json.dumps(compact, ensure_ascii=False, indent=2)
+            return [json.dumps(compact, ensure_ascii=False, indent=2)]
         except Exception:
-            return str(compact)
+            return [str(compact)]
 
-    def _format_enrichment_blocks(self, enrichment: Dict[str, Any], blocks: List[Any]) -> str:
+    def _format_enrichment_blocks(self, enrichment: Dict[str, Any], blocks: List[Any]) -> List[str]:
         def i18n(value: Any) -> Dict[str, str]:
             if not isinstance(value, dict):
                 return {}
@@ -416,6 +437,7 @@ class VulnReviewAgent(BaseAgent):
                     break
             return out
 
+        items: List[str] = []
         lines: List[str] = []
         engine = enrichment.get("engine")
         generated_at = enrichment.get("generatedAt")
@@ -428,13 +450,14 @@ class VulnReviewAgent(BaseAgent):
         if generated_at:
             header.append(f"generatedAt={generated_at}")
         if header:
-            lines.append("EnrichmentBlocks(" + ", ".join(header) + ")")
+            items.append("EnrichmentBlocks(" + ", ".join(header) + ")")
         else:
-            lines.append("EnrichmentBlocks")
+            items.append("EnrichmentBlocks")
 
-        for idx, raw in enumerate(blocks[:12], start=1):
+        for idx, raw in enumerate(blocks, start=1):
             if not isinstance(raw, dict):
                 continue
+            lines = []
             block_id = raw.get("id") or raw.get("blockId") or f"block-{idx}"
             kind = raw.get("kind") or "BLOCK"
 
@@ -519,13 +542,10 @@ class VulnReviewAgent(BaseAgent):
 
             list_lines("Conditions", raw.get("conditions"), limit=20)
             list_lines("Invocations", raw.get("invocations"), limit=25)
-            lines.append("")
-
-        while lines and lines[-1] == "":
-            lines.pop()
-        return "\n".join(lines)
+            items.append("\n".join(lines))
+        return items
 
-    def _call_chat_completion(
+    async def _call_chat_completion(
         self,
         context: Optional[AgentContext],
         purpose: str,
@@ -545,6 +565,12 @@ class VulnReviewAgent(BaseAgent):
             ],
         }
         headers = {"Authorization": f"Bearer {api_key}"}
+        cache = get_response_cache()
+        key = cache_key(model, system, user, temperature) if cache is not None else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
         job_id = None
         tenant_id = None
         target_id = None
@@ -569,23 +595,23 @@ class VulnReviewAgent(BaseAgent):
             request_body=body,
         )
         try:
-            with httpx.Client(timeout=httpx.Timeout(60.0, connect=10.0)) as client:
-                resp = client.post(url, json=body, headers=headers)
-                resp.raise_for_status()
-                data = resp.json()
-                dump_llm_response(
-                    job_id=str(job_id) if job_id is not None else None,
-                    tenant_id=str(tenant_id) if tenant_id is not None else None,
-                    target_id=str(target_id) if target_id is not None else None,
-                    agent=getattr(self, "name", None),
-                    mode=str(mode) if mode is not None else None,
-                    purpose=purpose,
-                    url=url,
-                    model=model,
-                    response_json=data if isinstance(data, dict) else {"raw": data},
-                    error=None,
-                )
-                return data
+            with span("llm.chat_completion", purpose=purpose, model=model):
+                data = await apost_json(url, body, headers=headers)
+            if key is not None and is_cacheable(data):
+                cache.put(key, data)
+            dump_llm_response(
+                job_id=str(job_id) if job_id is not None else None,
+                tenant_id=str(tenant_id) if tenant_id is not None else None,
+                target_id=str(target_id) if target_id is not None else None,
+                agent=getattr(self, "name", None),
+                mode=str(mode) if mode is not None else None,
+                purpose=purpose,
+                url=url,
+                model=model,
+                response_json=data if isinstance(data, dict) else {"raw": data},
+                error=None,
+            )
+            return data
         except Exception as exc:
             dump_llm_response(
                 job_id=str(job_id) if job_id is not None else None,
@@ -599,6 +625,9 @@ class VulnReviewAgent(BaseAgent):
                 response_json=None,
                 error=str(exc),
             )
+            if isinstance(exc, LLMThrottledError):
+                # Fail the job instead of reporting a review the model never gave.
+                raise
             return None
 
     def _normalize_llm_output(self, parsed: Dict[str, Any]) -> Dict[str, Any]:
@@ -613,7 +642,7 @@ class VulnReviewAgent(BaseAgent):
                     parsed["fixHint"] = opinion["en"].get("fixHint")
         return parsed
 
-    def _ensure_bilingual(
+    async def _ensure_bilingual(
         self,
         context: Optional[AgentContext],
         url: str,
@@ -625,36 +654,33 @@ class VulnReviewAgent(BaseAgent):
         if not isinstance(opinion, dict):
             return parsed
 
-        def to_text(value: Any) -> Dict[str, str]:
-            if not isinstance(value, dict):
-                return {}
-            out: Dict[str, str] = {}
-            for key in ("summary", "fixHint", "rationale"):
-                v = value.get(key)
-                if isinstance(v, str) and v.strip():
-                    out[key] = v.strip()
-            return out
-
-        zh = to_text(opinion.get("zh"))
-        en = to_text(opinion.get("en"))
-
-        # If one side is missing, try to translate from the other side.
-        if not en and zh:
-            translated = self._translate_opinion(context, url, api_key, model, source_lang="zh", target_lang="en", text=zh)
-            if translated:
-                opinion["en"] = translated
-                en = translated
-        if not zh and en:
-            translated = self._translate_opinion(context, url, api_key, model, source_lang="en", target_lang="zh", text=en)
-            if translated:
-                opinion["zh"] = translated
-                zh = translated
-
-        # If zh exists but is identical to en, attempt a real Chinese translation.
-        if zh and en and zh.get("summary") == en.get("summary") and zh.get("fixHint") == en.get("fixHint"):
-            translated = self._translate_opinion(context, url, api_key, model, source_lang="en", target_lang="zh", text=en)
+        zh = opinion_text(opinion.get("zh"))
+        en = opinion_text(opinion.get("en"))
+
+        # At most one direction is needed: fill in a missing side, or replace a zh that
+        # merely repeats en with a real Chinese translation.
+        direction: Optional[Tuple[str, str, Dict[str, str]]] = None
+        if zh and not en:
+            direction = ("zh", "en", zh)
+        elif en and (not zh or (zh.get("summary") == en.get("summary") and zh.get("fixHint") == en.get("fixHint"))):
+            direction = ("en", "zh", en)
+
+        if direction is not None and TRANSLATION_MODE != "off":
+            source_lang, target_lang, text = direction
+            translated = cached_translation(model, source_lang, target_lang, text)
+            deferred = active_deferred() if translated is None else None
+            if deferred is not None:
+                extra = context.event.extra if context is not None and context.event else None
+                job_id = extra.get("jobId") if isinstance(extra, dict) else None
+                deferred.add(parsed, source_lang, target_lang, text, url, api_key, model, job_id=job_id)
+            elif translated is None:
+                translated = await self._translate_opinion(
+                    context, url, api_key, model, source_lang=source_lang, target_lang=target_lang, text=text
+                )
+                if translated:
+                    remember_translation(model, source_lang, target_lang, text, translated)
             if translated:
-                opinion["zh"] = translated
+                opinion[target_lang] = translated
 
         parsed["opinionI18n"] = opinion
         if isinstance(opinion.get("en"), dict):
@@ -662,7 +688,7 @@ class VulnReviewAgent(BaseAgent):
             parsed["fixHint"] = opinion["en"].get("fixHint") or parsed.get("fixHint")
         return parsed
 
-    def _translate_opinion(
+    async def _translate_opinion(
         self,
         context: Optional[AgentContext],
         url: str,
@@ -681,7 +707,7 @@ class VulnReviewAgent(BaseAgent):
             "Keep code identifiers, URLs, and enum values unchanged."
         )
         user = json.dumps(text, ensure_ascii=False)
-        data = self._call_chat_completion(
+        data = await self._call_chat_completion(
             context=context,
             purpose="translate_opinion",
             url=url,
@@ -701,14 +727,7 @@ class VulnReviewAgent(BaseAgent):
         if not isinstance(content, str) or not content.strip():
             return None
         parsed = self._extract_json(content)
-        if not isinstance(parsed, dict):
-            return None
-        out = {}
-        for key in ("summary", "fixHint", "rationale"):
-            v = parsed.get(key)
-            if isinstance(v, str) and v.strip():
-                out[key] = v.strip()
-        return out or None
+        return opinion_text(parsed) or None
 
     def _extract_json(self, text: str) -> Optional[Dict[str, Any]]:
         try:
@@ -789,127 +808,120 @@ class VulnReviewAgent(BaseAgent):
     def _build_call_chains(
         self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], max_chains: int = 20, max_depth: int = 200
     ) -> List[List[Dict[str, Any]]]:
-        if not isinstance(nodes, list) or not nodes:
-            return []
-
-        node_by_id: Dict[str, Dict[str, Any]] = {}
-        for node in nodes:
-            if not isinstance(node, dict):
-                continue
-            node_id = node.get("id")
-            if isinstance(node_id, str) and node_id.strip():
-                node_by_id[node_id] = node
-
-        if not node_by_id:
-            return []
+        return build_call_chains(nodes, edges, max_chains=max_chains, max_depth=max_depth)
 
-        outgoing: Dict[str, List[str]] = {nid: [] for nid in node_by_id.keys()}
-        indegree: Dict[str, int] = {nid: 0 for nid in node_by_id.keys()}
-
-        if isinstance(edges, list):
-            for edge in edges:
-                if not isinstance(edge, dict):
-                    continue
-                s = edge.get("source")
-                t = edge.get("target")
-                if s in node_by_id and t in node_by_id:
-                    outgoing[s].append(t)
-                    indegree[t] = indegree.get(t, 0) + 1
-
-        starts = [nid for nid in node_by_id.keys() if indegree.get(nid, 0) == 0]
-        if not starts:
-            starts = [next(iter(node_by_id.keys()))]
-
-        seen = set()
-        paths: List[List[str]] = []
+    def _format_call_chains(self, chains: List[List[Dict[str, Any]]]) -> List[str]:
+        lines: List[str] = []
+        for idx, chain in enumerate(chains, start=1):
+            if lines:
+                lines.append("")
+            lines.extend(self._format_call_chain(idx, chain).splitlines())
+        return lines
 
-        def is_terminal(nid: str) -> bool:
-            node = node_by_id.get(nid) or {}
+    def _format_call_chain(self, idx: int, chain: List[Dict[str, Any]]) -> str:
+        lines = [f"Chain {idx} (steps={len(chain)}):"]
+        for step_idx, node in enumerate(chain, start=1):
+            label = node.get("label") or node.get("id") or f"step-{step_idx}"
+            loc = f"{node.get('file','unknown')}:{node.get('line','')}"
             role = node.get("role")
-            if isinstance(role, str) and role.upper() == "SINK":
-                return True
-            return not outgoing.get(nid)
-
-        def record(path: List[str]) -> None:
-            key = "->".join(path)
-            if key in seen:
-                return
-            seen.add(key)
-            paths.append(list(path))
-
-        def dfs(curr: str, path: List[str]) -> None:
-            if len(paths) >= max_chains:
-                return
-            if len(path) >= max_depth or is_terminal(curr):
-                record(path)
-                return
-            nexts = outgoing.get(curr) or []
-            if not nexts:
-                record(path)
-                return
-            for nxt in nexts:
-                if nxt in path:
-                    continue
-                path.append(nxt)
-                dfs(nxt, path)
-                path.pop()
-                if len(paths) >= max_chains:
-                    return
+            role_text = f"[{role}] " if isinstance(role, str) and role.strip() else ""
+            lines.append(f"  {step_idx}) {role_text}{label} @ {loc}")
+            value = node.get("value")
+            if isinstance(value, str) and value.strip():
+                snippet = value.strip().splitlines()[0].strip()
+                if len(snippet) > 240:
+                    snippet = snippet[:240] + "…"
+                if snippet and snippet != str(label).strip():
+                    lines.append(f"     {snippet}")
+        return "\n".join(lines)
 
-        for s in starts:
-            dfs(s, [s])
-            if len(paths) >= max_chains:
-                break
+    def _extract_calls(self, code: str, path: str) -> List[str]:
+        return call_expressions(code, language_for_path(path))
 
-        if not paths:
-            paths = [list(node_by_id.keys())]
+    async def _file_ast_context(
+        self, context: AgentContext, location: Dict[str, Any], depth: int
+    ) -> Optional[Dict[str, Any]]:
+        """Enclosing function, in-file callers and referenced fields of the finding line.
 
-        return [[node_by_id[nid] for nid in path if nid in node_by_id] for path in paths if path]
+        The file is read through the agent's file-reader MCP and parsed at most once per
+        task: the (source, tree) pair lives in the task cache shared across findings.
+        """
+        path = str(location.get("path") or "").strip()
+        client = context.mcp_client
+        try:
+            line = int(location.get("line") or location.get("startLine") or 0)
+        except (TypeError, ValueError):
+            line = 0
+        if not path or line <= 0 or client is None:
+            return None
+        lang = language_for_path(path)
 
-    def _format_call_chains(self, chains: List[List[Dict[str, Any]]]) -> List[str]:
-        if not chains:
-            return []
-        lines: List[str] = []
-        for idx, chain in enumerate(chains, start=1):
-            lines.append(f"Chain {idx} (steps={len(chain)}):")
-            for step_idx, node in enumerate(chain, start=1):
-                label = node.get("label") or node.get("id") or f"step-{step_idx}"
-                loc = f"{node.get('file','unknown')}:{node.get('line','')}"
-                role = node.get("role")
-                role_text = f"[{role}] " if isinstance(role, str) and role.strip() else ""
-                lines.append(f"  {step_idx}) {role_text}{label} @ {loc}")
-                value = node.get("value")
-                if isinstance(value, str) and value.strip():
-                    snippet = value.strip().splitlines()[0].strip()
-                    if len(snippet) > 240:
-                        snippet = snippet[:240] + "…"
-                    if snippet and snippet != str(label).strip():
-                        lines.append(f"     {snippet}")
-            lines.append("")
-        while lines and lines[-1] == "":
-            lines.pop()
-        return lines
+        async def load() -> Tuple[bytes, Any]:
+            # Raise rather than return None: the task cache drops failures, so a file that
+            # could not be read (e.g. a transient MCP error) is retried by the next finding.
+            source = await self._read_file(client, path)
+            if source is None:
+                raise FileNotFoundError(path)
+            return source, await asyncio.to_thread(parse_tree, source, lang)
 
-    def _extract_calls(self, code: str, path: str) -> List[str]:
-        if not code:
-            return []
-        lang = LANG_MAP.get(os.path.splitext(path)[1].lower(), "python")
+        cache = task_cache_from(context.shared_cache)
         try:
-            parser = get_parser(lang)
+            loaded = await cache.aget_or_compute(("file-ast", path, lang), load) if cache is not None else await load()
         except Exception:
-            return []
-        tree = parser.parse(code.encode())
-        root = tree.root_node
-        calls: List[str] = []
-        self._walk_calls(root, code, calls)
-        return calls[:50]
-
-    def _walk_calls(self, node, code: str, out: List[str]) -> None:
-        if node.type in ("call_expression", "function_call", "method_invocation"):
-            text = code[node.start_byte:node.end_byte]
-            out.append(text.strip())
-        for child in node.children:
-            self._walk_calls(child, code, out)
+            return None
+        source, tree = loaded
+        if tree is None:
+            return None
+        return extract_file_context(source, lang, line, depth=depth, tree=tree)
+
+    async def _read_file(self, client: Any, path: str) -> Optional[bytes]:
+        """Read a whole file page by page (the reader caps lines per call)."""
+        tool = str(self.params.get("file_tool") or "file.read.full")
+        lines: List[str] = []
+        start = 1
+        for _ in range(_MAX_FILE_PAGES):
+            result = await ainvoke_tool(client, tool, {"path": path, "lineRange": {"startLine": start}})
+            content = result.get("content") if isinstance(result, dict) else None
+            if not content:
+                break
+            lines.extend(str(item.get("text") or "") for item in content)
+            last = int(content[-1].get("line") or start + len(content) - 1)
+            total = int(result.get("totalLines") or 0)
+            if not result.get("truncated") or (total and last >= total):
+                break
+            start = last + 1
+        return ("\n".join(lines) + "\n").encode() if lines else None
+
+    def _add_file_context(self, prompt: PromptBuilder, file_context: Dict[str, Any]) -> None:
+        function = file_context.get("enclosingFunction")
+        if function:
+            prompt.add(
+                f"[Enclosing function] {function.get('name') or '<anonymous>'} "
+                f"(lines {function.get('startLine')}-{function.get('endLine')})",
+                function.get("code") or "",
+                priority=2,
+                share=0.25,
+            )
+        prompt.add(
+            "[Callers in file]",
+            [
+                f"- {c.get('function') or '<top level>'} -> {c.get('calls')} @ line {c.get('line')}: {c.get('code')}"
+                for c in file_context.get("callers") or []
+            ],
+            priority=2,
+            share=0.1,
+            noun="callers",
+        )
+        prompt.add(
+            "[Referenced fields]",
+            [
+                f"- {f.get('expression')}" + (f" (declared at line {f['declaredAt']})" if f.get("declaredAt") else "")
+                for f in file_context.get("referencedFields") or []
+            ],
+            priority=2,
+            share=0.1,
+            noun="fields",
+        )
 
     def _parse_severity(self, value: Any) -> Severity:
         try:
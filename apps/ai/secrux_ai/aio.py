@@ -0,0 +1,62 @@
+"""Bridges between the blocking and the async agent/MCP interfaces.
+
+Async code calls blocking implementations with `asyncio.to_thread`. Blocking code
+drives coroutines through `run_sync`, which submits them to one long-lived background
+event loop; keeping a single loop means the per-loop pooled HTTP clients in
+`secrux_ai.llm` are reused across sync callers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_LOCK = threading.Lock()
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_THREAD: Optional[threading.Thread] = None
+
+
+def _bridge_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP, _THREAD
+    with _LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="secrux-ai-loop", daemon=True)
+            thread.start()
+            _LOOP, _THREAD = loop, thread
+        return _LOOP
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Run `coro` to completion from blocking code and return its result."""
+    loop = _bridge_loop()
+    if threading.current_thread() is _THREAD:
+        if asyncio.iscoroutine(coro):
+            coro.close()
+        raise RuntimeError("run_sync() called from the bridge loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def bridge_loop_running() -> bool:
+    return _LOOP is not None and _LOOP.is_running()
+
+
+def shutdown_bridge_loop(timeout: float = 5.0) -> None:
+    global _LOOP, _THREAD
+    with _LOCK:
+        loop, thread = _LOOP, _THREAD
+        _LOOP, _THREAD = None, None
+    if loop is None:
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout)
+    if not loop.is_running():
+        loop.close()
+
+
+atexit.register(shutdown_bridge_loop)
@@ -0,0 +1,209 @@
+"""Source-to-sink call chains over dataflow graphs.
+
+Dataflow graphs from CodeQL-style engines can have thousands of nodes, so chains are
+enumerated iteratively instead of by recursive DFS. Node ids are mapped to integers,
+adjacency is built once, and a reverse BFS from the sinks gives every node its exact
+distance to the nearest sink. A best-first search then yields simple paths in order of
+length (k shortest first), pruning nodes that cannot reach a sink within `max_depth`.
+Partial paths share their prefixes through parent links and carry a fixed-size
+bitmask summary of their nodes, so cycle checks are O(1) unless the summary reports a
+possible hit, and no string keys are needed for de-duplication.
+
+Sources are the nodes with role `SOURCE`, and sinks the nodes with role `SINK`. Graphs
+without those markers fall back to nodes without incoming / outgoing edges. The search
+stops at `max_chains` paths or when the time or expansion budget runs out, and returns
+what it found so far.
+
+Configuration:
+- SECRUX_AI_CALL_CHAIN_TIME_BUDGET_MS: wall-clock budget per graph (default 500, 0 disables)
+- SECRUX_AI_CALL_CHAIN_MAX_EXPANSIONS: partial paths expanded per graph (default 200000)
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+TIME_BUDGET_MS = float(os.getenv("SECRUX_AI_CALL_CHAIN_TIME_BUDGET_MS", "500"))
+MAX_EXPANSIONS = int(os.getenv("SECRUX_AI_CALL_CHAIN_MAX_EXPANSIONS", "200000"))
+
+# Partial path: (node index, depth, visited summary, parent label).
+_Label = Tuple[int, int, int, Optional[tuple]]
+
+_SUMMARY_BITS = 256
+
+
+class _Graph:
+    def __init__(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> None:
+        self.ids: List[str] = []
+        self.nodes: List[Dict[str, Any]] = []
+        index: Dict[str, int] = {}
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            node_id = node.get("id")
+            if not isinstance(node_id, str) or not node_id.strip():
+                continue
+            if node_id in index:
+                self.nodes[index[node_id]] = node
+                continue
+            index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+            self.nodes.append(node)
+
+        size = len(self.ids)
+        self.outgoing: List[List[int]] = [[] for _ in range(size)]
+        self.incoming: List[List[int]] = [[] for _ in range(size)]
+        seen_edges = set()
+        for edge in edges if isinstance(edges, list) else []:
+            if not isinstance(edge, dict):
+                continue
+            s = index.get(edge.get("source"))  # type: ignore[arg-type]
+            t = index.get(edge.get("target"))  # type: ignore[arg-type]
+            if s is None or t is None or (s, t) in seen_edges:
+                continue
+            seen_edges.add((s, t))
+            self.outgoing[s].append(t)
+            self.incoming[t].append(s)
+
+        roles = [str(node.get("role") or "").upper() for node in self.nodes]
+        self.terminal = [role == "SINK" for role in roles]
+        if not any(self.terminal):
+            self.terminal = [not succ for succ in self.outgoing]
+        self.starts = [i for i, role in enumerate(roles) if role == "SOURCE"]
+        if not self.starts:
+            self.starts = [i for i, preds in enumerate(self.incoming) if not preds] or [0]
+
+    def distance_to_sink(self) -> List[int]:
+        """Unweighted distance from every node to its nearest sink (-1 if none is reachable)."""
+        dist = [-1] * len(self.ids)
+        queue = deque()
+        for idx, terminal in enumerate(self.terminal):
+            if terminal:
+                dist[idx] = 0
+                queue.append(idx)
+        while queue:
+            curr = queue.popleft()
+            for pred in self.incoming[curr]:
+                # Paths stop at sinks, so they are never reached *through* another sink.
+                if dist[pred] == -1 and not self.terminal[pred]:
+                    dist[pred] = dist[curr] + 1
+                    queue.append(pred)
+        return dist
+
+
+def _on_path(label: _Label, node: int) -> bool:
+    curr: Optional[tuple] = label
+    while curr is not None:
+        if curr[0] == node:
+            return True
+        curr = curr[3]
+    return False
+
+
+def _unwind(label: _Label) -> List[int]:
+    path: List[int] = []
+    curr: Optional[tuple] = label
+    while curr is not None:
+        path.append(curr[0])
+        curr = curr[3]
+    path.reverse()
+    return path
+
+
+def shortest_chains(
+    nodes: List[Dict[str, Any]],
+    edges: List[Dict[str, Any]],
+    max_chains: int = 20,
+    max_depth: int = 200,
+    time_budget_ms: Optional[float] = None,
+    max_expansions: Optional[int] = None,
+) -> List[List[str]]:
+    """Up to `max_chains` simple source-to-sink paths (node ids), shortest first.
+
+    Paths have at most `max_depth` nodes. Isolated nodes (both source and sink) are only
+    returned when there is room left after the real chains.
+    """
+    graph = _Graph(nodes, edges)
+    if not graph.ids or max_chains <= 0:
+        return []
+    budget = (TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms) / 1000.0
+    expansions_left = MAX_EXPANSIONS if max_expansions is None else max_expansions
+    deadline = time.perf_counter() + budget if budget > 0 else None
+
+    dist = graph.distance_to_sink()
+    outgoing = graph.outgoing
+    terminal = graph.terminal
+    # Successors nearest to a sink first keeps ties deterministic and cheap to resolve.
+    ordered = [sorted((t for t in succ if dist[t] >= 0), key=dist.__getitem__) for succ in outgoing]
+
+    # Ordered by (estimated total length, deepest first, insertion): among equally short
+    # candidates the search runs depth-first, so it reaches sinks without sweeping every prefix.
+    heap: List[Tuple[int, int, int, _Label]] = []
+    seq = 0
+    singletons: List[int] = []
+    for start in graph.starts:
+        if dist[start] < 0 or dist[start] + 1 > max_depth:
+            continue
+        if terminal[start]:
+            singletons.append(start)
+            continue
+        heap.append((dist[start] + 1, -1, seq, (start, 1, 1 << (start % _SUMMARY_BITS), None)))
+        seq += 1
+    heapq.heapify(heap)
+
+    paths: List[List[int]] = []
+    while heap and len(paths) < max_chains and expansions_left > 0:
+        if deadline is not None and not expansions_left & 0xFF and time.perf_counter() > deadline:
+            break
+        label = heapq.heappop(heap)[3]
+        node, depth, visited, _ = label
+        if terminal[node]:
+            paths.append(_unwind(label))
+            continue
+        expansions_left -= 1
+        for nxt in ordered[node]:
+            if depth + 1 + dist[nxt] > max_depth:
+                continue
+            bit = 1 << (nxt % _SUMMARY_BITS)
+            if visited & bit and _on_path(label, nxt):
+                continue
+            heapq.heappush(heap, (depth + 1 + dist[nxt], -depth - 1, seq, (nxt, depth + 1, visited | bit, label)))
+            seq += 1
+
+    for start in singletons[: max(0, max_chains - len(paths))]:
+        paths.append([start])
+    return [[graph.ids[idx] for idx in path] for path in paths]
+
+
+def build_call_chains(
+    nodes: List[Dict[str, Any]],
+    edges: List[Dict[str, Any]],
+    max_chains: int = 20,
+    max_depth: int = 200,
+    time_budget_ms: Optional[float] = None,
+    max_expansions: Optional[int] = None,
+) -> List[List[Dict[str, Any]]]:
+    """Like `shortest_chains` but returns the node dicts; falls back to all nodes in order."""
+    node_by_id: Dict[str, Dict[str, Any]] = {}
+    for node in nodes if isinstance(nodes, list) else []:
+        if isinstance(node, dict):
+            node_id = node.get("id")
+            if isinstance(node_id, str) and node_id.strip():
+                node_by_id[node_id] = node
+    if not node_by_id:
+        return []
+    paths = shortest_chains(
+        nodes,
+        edges,
+        max_chains=max_chains,
+        max_depth=max_depth,
+        time_budget_ms=time_budget_ms,
+        max_expansions=max_expansions,
+    )
+    if not paths:
+        paths = [list(node_by_id.keys())[:max_depth]]
+    return [[node_by_id[nid] for nid in path] for path in paths if path]
@@ -5,7 +5,6 @@ from pathlib import Path
 from typing import Dict, Optional, Protocol
 
 import httpx
-from rich.console import Console
 
 from .models import AgentRecommendation
 
@@ -17,6 +16,9 @@ class CallbackSink(Protocol):
 
 class StdoutCallbackSink:
     def __init__(self) -> None:
+        # rich is only needed when printing to a terminal; keep it out of import time.
+        from rich.console import Console
+
         self.console = Console()
 
     def send(self, recommendation: AgentRecommendation) -> None:
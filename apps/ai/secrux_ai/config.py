@@ -5,7 +5,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Protocol
 
 import yaml
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from .models import ConfigProviderSpec
 from .utils import load_from_entrypoint
@@ -26,6 +26,18 @@ class AgentConfig(BaseModel):
     params: Dict[str, Any] = Field(default_factory=dict)
     stage_types: Optional[List[str]] = Field(None, alias="stageTypes")
     mcp_profile: Optional[str] = Field(None, alias="mcpProfile")
+    # Names of agents that must finish first (e.g. producers of `shared_cache` entries).
+    after: List[str] = Field(default_factory=list)
+    timeout_seconds: Optional[float] = Field(None, alias="timeoutSeconds")
+
+
+class ExecutionConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    mode: str = "serial"  # serial | concurrent
+    max_workers: int = Field(8, alias="maxWorkers")
+    # Default per-agent timeout (seconds); unset or 0 disables it.
+    agent_timeout_seconds: Optional[float] = Field(None, alias="agentTimeoutSeconds")
 
 
 class CallbackConfig(BaseModel):
@@ -41,6 +53,7 @@ class PlatformConfig(BaseModel):
     mcp_profiles: List[MCPProfileConfig] = Field(default_factory=list, alias="mcpProfiles")
     callbacks: CallbackConfig = Field(default_factory=CallbackConfig)
     provider: Optional[ConfigProviderSpec] = None
+    execution: ExecutionConfig = Field(default_factory=ExecutionConfig)
 
 
 class ConfigProvider(Protocol):
@@ -1,20 +1,67 @@
+"""Debug dumps of LLM requests, responses and finding payloads.
+
+Dumping used to re-read the environment, truncate, serialize and append to a file under
+a global lock on every LLM call. The configuration is now parsed once at import
+(`reload_config` re-reads it), and the `dump_*` functions only apply the filters and put
+the record on a bounded queue. A background thread truncates and serializes records,
+keeps dump files open (LRU), writes whatever is queued in one batch per file and rotates
+files by size; the `daily` strategy also starts a new file every UTC day. When the queue
+is full, records are dropped (see `dropped_records`) instead of slowing the caller down.
+Records are serialized on the writer thread, so callers must not mutate what they pass in.
+
+Configuration:
+- SECRUX_AI_PROMPT_DUMP: off (default) | file | stdout
+- SECRUX_AI_PROMPT_DUMP_DIR: output directory for `file` (default /app/storage/prompt-dumps)
+- SECRUX_AI_PROMPT_DUMP_FILE_STRATEGY: target (default) | daily | job | record
+- SECRUX_AI_PROMPT_DUMP_FILTER_{JOB_ID,TARGET_ID,AGENT,MODE,PURPOSE}: only dump matching records
+- SECRUX_AI_PROMPT_DUMP_INCLUDE_{RESPONSE,FINDING,ENRICHMENT}: optional record types (default false)
+- SECRUX_AI_PROMPT_DUMP_MAX_CHARS: per-string truncation (default 200000)
+- SECRUX_AI_PROMPT_DUMP_QUEUE_SIZE: records waiting for the writer before new ones are dropped (default 10000)
+- SECRUX_AI_PROMPT_DUMP_MAX_MB: size at which a dump file is rotated (default 100, 0 disables)
+- SECRUX_AI_PROMPT_DUMP_OPEN_FILES: dump files kept open by the writer (default 64)
+- SECRUX_AI_PROMPT_DUMP_COMPRESS: off (default) | zstd (needs the `zstandard` package)
+"""
+
 from __future__ import annotations
 
+import atexit
+import importlib.util
 import json
 import os
+import queue
+import sys
 import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-
-_LOCK = threading.Lock()
+from typing import Any, Dict, List, Optional
 
 
 def _now_utc() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _env_flag(name: str) -> bool:
+    raw = (os.getenv(name) or "").strip().lower()
+    return raw in ("1", "true", "on", "yes")
+
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    raw = (os.getenv(name) or "").strip()
+    if not raw:
+        return default
+    try:
+        return max(minimum, int(raw))
+    except Exception:
+        return default
+
+
+def _filter_value(name: str) -> Optional[str]:
+    value = (os.getenv(name) or "").strip()
+    return value if value else None
+
+
 def _dump_mode() -> str:
     raw = (os.getenv("SECRUX_AI_PROMPT_DUMP") or "").strip().lower()
     if raw in ("", "0", "false", "off", "disabled", "none"):
@@ -30,6 +77,7 @@ def _dump_dir() -> Path:
     value = (os.getenv("SECRUX_AI_PROMPT_DUMP_DIR") or "/app/storage/prompt-dumps").strip()
     return Path(value).expanduser().resolve()
 
+
 def _dump_file_strategy() -> str:
     raw = (os.getenv("SECRUX_AI_PROMPT_DUMP_FILE_STRATEGY") or "").strip().lower()
     if raw in ("", "target", "finding", "vuln", "per_target", "per-target"):
@@ -43,66 +91,316 @@ def _dump_file_strategy() -> str:
     return "target"
 
 
-def _include_response() -> bool:
-    raw = (os.getenv("SECRUX_AI_PROMPT_DUMP_INCLUDE_RESPONSE") or "").strip().lower()
-    return raw in ("1", "true", "on", "yes")
+def _compression() -> Optional[str]:
+    raw = (os.getenv("SECRUX_AI_PROMPT_DUMP_COMPRESS") or "").strip().lower()
+    if raw in ("zstd", "zst", "zstandard") and importlib.util.find_spec("zstandard") is not None:
+        return "zstd"
+    return None
+
+
+@dataclass(frozen=True)
+class DumpConfig:
+    mode: str
+    directory: Path
+    strategy: str
+    include_response: bool
+    include_finding: bool
+    include_enrichment: bool
+    filter_job_id: Optional[str]
+    filter_target_id: Optional[str]
+    filter_agent: Optional[str]
+    filter_mode: Optional[str]
+    filter_purpose: Optional[str]
+    max_chars: int
+    queue_size: int
+    max_bytes: int
+    open_files: int
+    compression: Optional[str]
+
+
+def load_config() -> DumpConfig:
+    return DumpConfig(
+        mode=_dump_mode(),
+        directory=_dump_dir(),
+        strategy=_dump_file_strategy(),
+        include_response=_env_flag("SECRUX_AI_PROMPT_DUMP_INCLUDE_RESPONSE"),
+        include_finding=_env_flag("SECRUX_AI_PROMPT_DUMP_INCLUDE_FINDING"),
+        include_enrichment=_env_flag("SECRUX_AI_PROMPT_DUMP_INCLUDE_ENRICHMENT"),
+        filter_job_id=_filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_JOB_ID"),
+        filter_target_id=_filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_TARGET_ID"),
+        filter_agent=_filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_AGENT"),
+        filter_mode=_filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_MODE"),
+        filter_purpose=_filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_PURPOSE"),
+        max_chars=_env_int("SECRUX_AI_PROMPT_DUMP_MAX_CHARS", 200_000, minimum=1_000),
+        queue_size=_env_int("SECRUX_AI_PROMPT_DUMP_QUEUE_SIZE", 10_000, minimum=1),
+        max_bytes=_env_int("SECRUX_AI_PROMPT_DUMP_MAX_MB", 100) * 1024 * 1024,
+        open_files=_env_int("SECRUX_AI_PROMPT_DUMP_OPEN_FILES", 64, minimum=1),
+        compression=_compression(),
+    )
 
-def _include_finding() -> bool:
-    raw = (os.getenv("SECRUX_AI_PROMPT_DUMP_INCLUDE_FINDING") or "").strip().lower()
-    return raw in ("1", "true", "on", "yes")
 
+def _truncate(value: Any, limit: int) -> Any:
+    if isinstance(value, str):
+        return value if len(value) <= limit else value[:limit] + "…"
+    if isinstance(value, dict):
+        return {k: _truncate(v, limit) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_truncate(v, limit) for v in value]
+    return value
 
-def _include_enrichment() -> bool:
-    raw = (os.getenv("SECRUX_AI_PROMPT_DUMP_INCLUDE_ENRICHMENT") or "").strip().lower()
-    return raw in ("1", "true", "on", "yes")
 
+class _DumpFile:
+    """An append handle on one dump file, optionally zstd-compressed (one frame per batch)."""
 
-def _filter_value(name: str) -> Optional[str]:
-    value = (os.getenv(name) or "").strip()
-    return value if value else None
+    def __init__(self, path: Path, compression: Optional[str]) -> None:
+        self.path = path
+        self._raw = path.open("ab")
+        self._stream: Optional[Any] = None
+        if compression == "zstd":
+            import zstandard
+
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        self.size = self._raw.tell()
+
+    def write(self, data: bytes) -> None:
+        if self._stream is not None:
+            import zstandard
+
+            self._stream.write(data)
+            # Closing the frame keeps the file readable with `zstdcat` while it is being written.
+            self._stream.flush(zstandard.FLUSH_FRAME)
+        else:
+            self._raw.write(data)
+        self._raw.flush()
+        self.size = self._raw.tell()
+
+    def close(self) -> None:
+        try:
+            if self._stream is not None:
+                self._stream.close()
+        finally:
+            self._raw.close()
+
+
+_STOP = object()
+# Records written per batch; the rest stay queued for the next one.
+_BATCH_MAX = 512
+
+
+class _DumpWriter:
+    def __init__(self, config: DumpConfig) -> None:
+        self.config = config
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=config.queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._files: "OrderedDict[Path, _DumpFile]" = OrderedDict()
+        self._day: Optional[str] = None
+        self._dir_ready = False
+        self._suffix = ".jsonl.zst" if config.compression == "zstd" else ".jsonl"
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written; False on timeout or if nothing runs."""
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="secrux-prompt-dump", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < _BATCH_MAX:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [item for item in batch if isinstance(item, dict)]
+            try:
+                self._write_batch(records)
+            except Exception:
+                # Never crash the agent due to debug dumping.
+                pass
+            stop = False
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is _STOP:
+                    stop = True
+            if stop:
+                self._close_files()
+                return
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        config = self.config
+        lines = [json.dumps(_truncate(record, config.max_chars), ensure_ascii=False, default=str) for record in records]
+        if config.mode == "stdout":
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+            return
+        if config.mode != "file":
+            return
+
+        if not self._dir_ready:
+            config.directory.mkdir(parents=True, exist_ok=True)
+            self._dir_ready = True
+        today = datetime.now(timezone.utc).strftime("%Y%m%d")
+        if today != self._day:
+            # Daily files change name at midnight; other handles are simply reopened.
+            self._close_files()
+            self._day = today
+
+        grouped: Dict[str, List[str]] = {}
+        for record, line in zip(records, lines):
+            if config.strategy == "record":
+                self._write_single(record, line)
+                continue
+            grouped.setdefault(self._stem(record, today), []).append(line)
+        for stem, group in grouped.items():
+            try:
+                self._append(config.directory / f"{stem}{self._suffix}", ("\n".join(group) + "\n").encode("utf-8"))
+            except Exception:
+                continue
+
+    def _stem(self, record: Dict[str, Any], today: str) -> str:
+        strategy = self.config.strategy
+        if strategy == "daily":
+            return f"prompt-dump-{today}"
+        if strategy == "job":
+            return f"prompt-dump-job-{record.get('jobId') or 'unknown'}"
+        # Default: one dump file per target (findingId/stageId).
+        return f"prompt-dump-{record.get('purpose') or 'unknown'}-target-{record.get('targetId') or 'unknown'}"
+
+    def _write_single(self, record: Dict[str, Any], line: str) -> None:
+        ts = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
+        name = f"prompt-dump-{ts}-{record.get('type') or 'record'}-job-{record.get('jobId') or 'unknown'}.json"
+        data = line.encode("utf-8")
+        if self.config.compression == "zstd":
+            import zstandard
+
+            name += ".zst"
+            data = zstandard.ZstdCompressor().compress(data)
+        try:
+            (self.config.directory / name).write_bytes(data)
+        except Exception:
+            return
+
+    def _append(self, path: Path, data: bytes) -> None:
+        handle = self._files.get(path)
+        if handle is None:
+            handle = self._files[path] = _DumpFile(path, self.config.compression)
+            while len(self._files) > self.config.open_files:
+                self._files.popitem(last=False)[1].close()
+        else:
+            self._files.move_to_end(path)
+        if self.config.max_bytes and handle.size and handle.size + len(data) > self.config.max_bytes:
+            handle.close()
+            self._rotate(path)
+            handle = self._files[path] = _DumpFile(path, self.config.compression)
+        handle.write(data)
+
+    def _rotate(self, path: Path) -> None:
+        """Move a full file aside as <stem>.<n><suffix>; the unnumbered file is always the newest."""
+        stem = path.name[: -len(self._suffix)]
+        n = 1
+        while (path.parent / f"{stem}.{n}{self._suffix}").exists():
+            n += 1
+        path.rename(path.parent / f"{stem}.{n}{self._suffix}")
+
+    def _close_files(self) -> None:
+        while self._files:
+            try:
+                self._files.popitem(last=False)[1].close()
+            except Exception:
+                continue
+
+
+_CONFIG = load_config()
+_WRITER = _DumpWriter(_CONFIG)
+
+
+def reload_config() -> DumpConfig:
+    """Re-read the environment; records queued under the previous configuration are written first."""
+    global _CONFIG, _WRITER
+    previous = _WRITER
+    _CONFIG = load_config()
+    _WRITER = _DumpWriter(_CONFIG)
+    previous.close()
+    return _CONFIG
+
+
+def flush_dumps(timeout: float = 5.0) -> bool:
+    """Block until queued records are on disk (for scripts and shutdown)."""
+    return _WRITER.flush(timeout)
+
+
+def dropped_records() -> int:
+    """Records dropped because the writer queue was full."""
+    return _WRITER.dropped
+
+
+def close_dumps() -> None:
+    _WRITER.close()
+
+
+def _after_fork() -> None:
+    # The writer thread does not survive a fork; the child starts its own on first use.
+    global _WRITER
+    _WRITER = _DumpWriter(_CONFIG)
+
+
+atexit.register(close_dumps)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
 
 
 def _should_dump(*, job_id: Optional[str], target_id: Optional[str], agent: Optional[str], mode: Optional[str], purpose: Optional[str]) -> bool:
-    if _dump_mode() == "off":
+    config = _CONFIG
+    if config.mode == "off":
         return False
-    f_job = _filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_JOB_ID")
-    if f_job and (job_id or "") != f_job:
+    if config.filter_job_id and (job_id or "") != config.filter_job_id:
         return False
-    f_target = _filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_TARGET_ID")
-    if f_target and (target_id or "") != f_target:
+    if config.filter_target_id and (target_id or "") != config.filter_target_id:
         return False
-    f_agent = _filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_AGENT")
-    if f_agent and (agent or "") != f_agent:
+    if config.filter_agent and (agent or "") != config.filter_agent:
         return False
-    f_mode = _filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_MODE")
-    if f_mode and (mode or "") != f_mode:
+    if config.filter_mode and (mode or "") != config.filter_mode:
         return False
-    f_purpose = _filter_value("SECRUX_AI_PROMPT_DUMP_FILTER_PURPOSE")
-    if f_purpose and (purpose or "") != f_purpose:
+    if config.filter_purpose and (purpose or "") != config.filter_purpose:
         return False
     return True
 
 
-def _max_chars() -> int:
-    raw = (os.getenv("SECRUX_AI_PROMPT_DUMP_MAX_CHARS") or "").strip()
-    if not raw:
-        return 200_000
-    try:
-        return max(1_000, int(raw))
-    except Exception:
-        return 200_000
-
-
-def _truncate(value: Any, limit: int) -> Any:
-    if isinstance(value, str):
-        return value if len(value) <= limit else value[:limit] + "…"
-    if isinstance(value, dict):
-        return {k: _truncate(v, limit) for k, v in value.items()}
-    if isinstance(value, list):
-        return [_truncate(v, limit) for v in value]
-    return value
-
-
 def dump_llm_request(
     *,
     job_id: Optional[str],
@@ -148,7 +446,7 @@ def dump_llm_response(
 ) -> None:
     if not _should_dump(job_id=job_id, target_id=target_id, agent=agent, mode=mode, purpose=purpose):
         return
-    if not _include_response() and error is None:
+    if not _CONFIG.include_response and error is None:
         return
     record = {
         "ts": _now_utc(),
@@ -175,10 +473,13 @@ def dump_finding_payload(
     purpose: str = "review",
     finding: Optional[Dict[str, Any]],
 ) -> None:
-    if not _include_finding():
+    if not _CONFIG.include_finding:
         return
     if not _should_dump(job_id=job_id, target_id=target_id, agent=agent, mode=mode, purpose=purpose):
         return
+    payload = dict(finding or {})
+    if not _CONFIG.include_enrichment:
+        payload.pop("enrichment", None)
     record = {
         "ts": _now_utc(),
         "type": "finding_payload",
@@ -188,52 +489,12 @@ def dump_finding_payload(
         "targetId": target_id,
         "agent": agent,
         "mode": mode,
-        "finding": finding or {},
+        "finding": payload,
     }
-    if not _include_enrichment() and isinstance(record.get("finding"), dict):
-        (record["finding"] or {}).pop("enrichment", None)
     _write_record(record)
 
 
 def _write_record(record: Dict[str, Any]) -> None:
-    mode = _dump_mode()
-    max_chars = _max_chars()
-    safe = _truncate(record, max_chars)
-    line = json.dumps(safe, ensure_ascii=False)
-
-    if mode == "stdout":
-        print(line)
-        return
-    if mode != "file":
-        return
-
-    out_dir = _dump_dir()
-    try:
-        out_dir.mkdir(parents=True, exist_ok=True)
-        strategy = _dump_file_strategy()
-        if strategy == "daily":
-            filename = f"prompt-dump-{datetime.now(timezone.utc).strftime('%Y%m%d')}.jsonl"
-            path = out_dir / filename
-        elif strategy == "job":
-            job_id = str(record.get("jobId") or "unknown")
-            filename = f"prompt-dump-job-{job_id}.jsonl"
-            path = out_dir / filename
-        elif strategy == "record":
-            job_id = str(record.get("jobId") or "unknown")
-            ts = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
-            rtype = str(record.get("type") or "record")
-            filename = f"prompt-dump-{ts}-{rtype}-job-{job_id}.json"
-            path = out_dir / filename
-        else:
-            # Default: one dump file per target (findingId/stageId).
-            target_id = str(record.get("targetId") or "unknown")
-            purpose = str(record.get("purpose") or "unknown")
-            filename = f"prompt-dump-{purpose}-target-{target_id}.jsonl"
-            path = out_dir / filename
-        with _LOCK:
-            with path.open("a", encoding="utf-8") as handle:
-                handle.write(line)
-                handle.write("\n")
-    except Exception:
-        # Never crash the agent due to debug dumping.
+    if _CONFIG.mode == "off":
         return
+    _WRITER.submit(record)
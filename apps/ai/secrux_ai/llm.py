@@ -0,0 +1,193 @@
+"""Shared, pooled HTTP clients for LLM gateways.
+
+Agents used to open a fresh `httpx.Client` per call, paying a TCP+TLS handshake for every
+review and translation. Clients here are created once per gateway origin
+(scheme://host:port) and keep connections alive between calls. Async clients are
+additionally scoped to the running event loop, since an `httpx.AsyncClient` cannot be
+shared across loops.
+
+Pool limits are read from the environment:
+- SECRUX_AI_LLM_HTTP2: enable HTTP/2 when the `h2` package is installed (default on)
+- SECRUX_AI_LLM_MAX_CONNECTIONS: max open connections per origin (default 100)
+- SECRUX_AI_LLM_MAX_KEEPALIVE: max idle keep-alive connections per origin (default 20)
+- SECRUX_AI_LLM_KEEPALIVE_EXPIRY: idle keep-alive expiry in seconds (default 30)
+
+Requests go through the adaptive per-(endpoint, model, key) limiter of
+`secrux_ai.llm_limiter`, which queues calls over the gateway's capacity and retries
+calls rejected with 429/503 until SECRUX_AI_LLM_THROTTLE_TIMEOUT_SECONDS runs out;
+then `LLMThrottledError` is raised.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import importlib.util
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from .aio import bridge_loop_running, run_sync
+from .llm_limiter import THROTTLE_STATUSES, THROTTLE_TIMEOUT, LLMThrottledError, alimited, limited, limiter_for
+
+TimeoutTypes = Union[float, httpx.Timeout]
+
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = (os.getenv(name) or "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "on", "yes")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _http2_enabled() -> bool:
+    return _env_bool("SECRUX_AI_LLM_HTTP2", True) and importlib.util.find_spec("h2") is not None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_env_int("SECRUX_AI_LLM_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_int("SECRUX_AI_LLM_MAX_KEEPALIVE", 20),
+        keepalive_expiry=_env_float("SECRUX_AI_LLM_KEEPALIVE_EXPIRY", 30.0),
+    )
+
+
+def pool_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class LLMClientPool:
+    """Keep-alive `httpx` clients keyed by gateway origin."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sync: Dict[str, httpx.Client] = {}
+        self._async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def client(self, url: str) -> httpx.Client:
+        key = pool_key(url)
+        with self._lock:
+            client = self._sync.get(key)
+            if client is None or client.is_closed:
+                client = httpx.Client(http2=_http2_enabled(), limits=_limits(), timeout=DEFAULT_TIMEOUT)
+                self._sync[key] = client
+            return client
+
+    def async_client(self, url: str) -> httpx.AsyncClient:
+        key = pool_key(url)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(http2=_http2_enabled(), limits=_limits(), timeout=DEFAULT_TIMEOUT)
+                clients[key] = client
+            return client
+
+    def close(self) -> None:
+        with self._lock:
+            clients = list(self._sync.values())
+            self._sync.clear()
+        for client in clients:
+            client.close()
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = list(self._async.pop(loop, {}).values())
+        for client in clients:
+            await client.aclose()
+
+
+_POOL = LLMClientPool()
+
+
+def get_pool() -> LLMClientPool:
+    return _POOL
+
+
+def post_json(
+    url: str,
+    body: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+    timeout: TimeoutTypes = DEFAULT_TIMEOUT,
+) -> Any:
+    """POST a JSON body through the shared pool and return the decoded JSON response."""
+    limiter = limiter_for(url, body, headers)
+    client = _POOL.client(url)
+    deadline = time.monotonic() + THROTTLE_TIMEOUT
+    while True:
+        with limited(limiter, deadline) as call:
+            resp = client.post(url, json=body, headers=headers, timeout=timeout)
+            call.observe(resp.status_code, resp.headers)
+        _check_throttled(resp, limiter is None, deadline)
+        if resp.status_code not in THROTTLE_STATUSES:
+            break
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def apost_json(
+    url: str,
+    body: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+    timeout: TimeoutTypes = DEFAULT_TIMEOUT,
+) -> Any:
+    """Async counterpart of `post_json`, pooled per event loop."""
+    limiter = limiter_for(url, body, headers)
+    client = _POOL.async_client(url)
+    deadline = time.monotonic() + THROTTLE_TIMEOUT
+    while True:
+        # A throttled call rejoins the back of the queue and waits out the gateway's pause.
+        async with alimited(limiter, deadline) as call:
+            resp = await client.post(url, json=body, headers=headers, timeout=timeout)
+            call.observe(resp.status_code, resp.headers)
+        _check_throttled(resp, limiter is None, deadline)
+        if resp.status_code not in THROTTLE_STATUSES:
+            break
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _check_throttled(resp: httpx.Response, unlimited: bool, deadline: float) -> None:
+    """Raise `LLMThrottledError` for a 429/503 that will not be retried."""
+    if resp.status_code not in THROTTLE_STATUSES:
+        return
+    if unlimited or time.monotonic() >= deadline:
+        raise LLMThrottledError(f"LLM gateway kept rejecting the call with HTTP {resp.status_code}")
+
+
+def close_clients() -> None:
+    _POOL.close()
+    if bridge_loop_running():
+        try:
+            run_sync(_POOL.aclose(), timeout=5.0)
+        except Exception:
+            pass
+
+
+atexit.register(close_clients)
@@ -0,0 +1,224 @@
+"""Content-addressed cache for LLM chat-completion responses.
+
+Identical prompts (same rule on identical code across branches and rescans) map to the
+same key: a SHA-256 over (model, system prompt, user prompt, temperature). Lookups go
+through an in-process LRU first and then an optional on-disk SQLite tier that survives
+restarts and is shared by worker processes on the same host.
+
+Configuration:
+- SECRUX_AI_LLM_CACHE: off | memory | disk (default memory; disk = memory + SQLite)
+- SECRUX_AI_LLM_CACHE_TTL_SECONDS: entry lifetime (default 7 days)
+- SECRUX_AI_LLM_CACHE_MAX_ENTRIES: in-process LRU size (default 2048)
+- SECRUX_AI_LLM_CACHE_PATH: SQLite file for the disk tier
+- SECRUX_AI_LLM_CACHE_MAX_MB: size cap of the disk tier; least recently used rows go first
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+_EVICT_EVERY_WRITES = 64
+
+
+def cache_key(model: str, system: str, user: str, temperature: float) -> str:
+    material = json.dumps([model, system, user, round(float(temperature), 4)], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(response: Any) -> bool:
+    """Only cache completions that actually carry message content."""
+    if not isinstance(response, dict):
+        return False
+    choices = response.get("choices")
+    if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+        return False
+    message = choices[0].get("message")
+    content = message.get("content") if isinstance(message, dict) else None
+    return isinstance(content, str) and bool(content.strip())
+
+
+class _DiskTier:
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache(last_access)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key: str, value: str, expires_at: float, now: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache(key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), expires_at, now),
+            )
+
+    def evict(self, now: float) -> int:
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return removed
+            # Drop least recently used rows until the tier is back under 90% of its cap.
+            excess = total - int(self.max_bytes * 0.9)
+            freed = 0
+            victims = []
+            for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+                victims.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+            return removed + len(victims)
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + optional SQLite) cache of decoded LLM responses."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 7 * 24 * 3600,
+        disk_path: Optional[str] = None,
+        disk_max_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(Path(disk_path), disk_max_bytes) if disk_path else None
+        self._writes = 0
+        self._stats: Dict[str, int] = {
+            "memoryHits": 0,
+            "diskHits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memoryHits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+        if self._disk is not None:
+            try:
+                value = self._disk.get(key, now)
+            except sqlite3.Error:
+                value = None
+            if value is not None:
+                with self._lock:
+                    self._stats["diskHits"] += 1
+                    self._remember(key, now + self.ttl_seconds, value)
+                return json.loads(value)
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, response: Any) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        value = json.dumps(response, ensure_ascii=False)
+        with self._lock:
+            self._stats["writes"] += 1
+            self._remember(key, expires_at, value)
+            self._writes += 1
+            run_disk_eviction = self._writes % _EVICT_EVERY_WRITES == 0
+        if self._disk is None:
+            return
+        try:
+            self._disk.put(key, value, expires_at, now)
+            if run_disk_eviction:
+                evicted = self._disk.evict(now)
+                with self._lock:
+                    self._stats["evictions"] += evicted
+        except sqlite3.Error:
+            # The cache is an optimization; a locked or unwritable file must not fail a review.
+            return
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "memoryEntries": len(self._memory)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key: str, expires_at: float, value: str) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_INITIALIZED = False
+_CACHE_LOCK = threading.Lock()
+
+
+def _build_cache_from_env() -> Optional[LLMResponseCache]:
+    mode = (os.getenv("SECRUX_AI_LLM_CACHE") or "memory").strip().lower()
+    if mode in ("off", "false", "0", "disabled", "none"):
+        return None
+    try:
+        ttl = float(os.getenv("SECRUX_AI_LLM_CACHE_TTL_SECONDS") or 7 * 24 * 3600)
+        max_entries = int(os.getenv("SECRUX_AI_LLM_CACHE_MAX_ENTRIES") or 2048)
+        max_mb = int(os.getenv("SECRUX_AI_LLM_CACHE_MAX_MB") or 512)
+    except ValueError:
+        ttl, max_entries, max_mb = 7 * 24 * 3600, 2048, 512
+    disk_path = None
+    if mode == "disk":
+        disk_path = (
+            os.getenv("SECRUX_AI_LLM_CACHE_PATH") or "/app/storage/llm-cache/llm-cache.sqlite3"
+        ).strip()
+    try:
+        return LLMResponseCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl,
+            disk_path=disk_path,
+            disk_max_bytes=max_mb * 1024 * 1024,
+        )
+    except (OSError, sqlite3.Error):
+        return LLMResponseCache(max_entries=max_entries, ttl_seconds=ttl)
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide response cache, or None when caching is disabled."""
+    global _CACHE, _CACHE_INITIALIZED
+    if not _CACHE_INITIALIZED:
+        with _CACHE_LOCK:
+            if not _CACHE_INITIALIZED:
+                _CACHE = _build_cache_from_env()
+                _CACHE_INITIALIZED = True
+    return _CACHE
@@ -0,0 +1,401 @@
+"""Adaptive concurrency limits for LLM gateways.
+
+Opening every review at once used to push gateways into 429s, and the calls that got
+one failed the review. Each (endpoint, model, API key) now gets an `AdaptiveLimiter`
+that bounds the requests in flight and adapts the bound AIMD-style: every successful
+call adds about one slot per round trip, and a 429/503, a timeout or a latency spike
+(slower than SECRUX_AI_LLM_LATENCY_TOLERANCE times the running average) cuts it. Cuts
+only count for requests started after the previous cut, so one burst of rejections
+halves the limit once instead of collapsing it.
+
+Rate-limit headers are honoured: `Retry-After` / `retry-after-ms` on a rejection, and
+`x-ratelimit-remaining-*` reaching 0 with its `x-ratelimit-reset-*`, stop new requests
+until the provider's window resets. Calls over the limit wait in a FIFO queue, and a
+throttled call is queued again instead of failing the review. A call still queued or
+throttled SECRUX_AI_LLM_THROTTLE_TIMEOUT_SECONDS after it started raises
+`LLMThrottledError`, which fails the job rather than reporting a review the model
+never gave.
+
+Configuration:
+- SECRUX_AI_LLM_ADAPTIVE_CONCURRENCY: on (default) | off
+- SECRUX_AI_LLM_INITIAL_CONCURRENCY: starting in-flight limit per endpoint/model/key (default 8)
+- SECRUX_AI_LLM_MIN_CONCURRENCY, SECRUX_AI_LLM_MAX_CONCURRENCY: bounds of the limit (default 1 and 64)
+- SECRUX_AI_LLM_LATENCY_TOLERANCE: latency ratio to the average treated as congestion (default 2.0, 0 disables)
+- SECRUX_AI_LLM_THROTTLE_TIMEOUT_SECONDS: how long a call may stay queued or throttled (default 600)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import httpx
+
+ADAPTIVE = (os.getenv("SECRUX_AI_LLM_ADAPTIVE_CONCURRENCY") or "on").strip().lower() not in ("0", "off", "false", "no")
+INITIAL_CONCURRENCY = float(os.getenv("SECRUX_AI_LLM_INITIAL_CONCURRENCY", "8"))
+MIN_CONCURRENCY = float(os.getenv("SECRUX_AI_LLM_MIN_CONCURRENCY", "1"))
+MAX_CONCURRENCY = float(os.getenv("SECRUX_AI_LLM_MAX_CONCURRENCY", "64"))
+LATENCY_TOLERANCE = float(os.getenv("SECRUX_AI_LLM_LATENCY_TOLERANCE", "2.0"))
+THROTTLE_TIMEOUT = float(os.getenv("SECRUX_AI_LLM_THROTTLE_TIMEOUT_SECONDS", "600"))
+
+THROTTLE_STATUSES = (429, 503)
+
+_BACKOFF = 0.5  # limit multiplier on a rejection or timeout
+_LATENCY_BACKOFF = 0.9  # gentler cut when the gateway only slows down
+_LATENCY_ALPHA = 0.1  # EWMA weight of the latest latency sample
+_DEFAULT_PAUSE = 1.0  # pause after a rejection without Retry-After; doubles per consecutive rejection
+_MAX_PAUSE = 60.0
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class LLMThrottledError(RuntimeError):
+    """The gateway kept a call throttled (429/503 or a full queue) past its deadline."""
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from `1.5`, `20ms` or `6m0s` (OpenAI's x-ratelimit-reset-* format)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+    return sum(float(number) * _UNITS[unit] for number, unit in parts)
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait from `retry-after-ms` or `Retry-After` (delta seconds or HTTP date)."""
+    millis = headers.get("retry-after-ms")
+    if millis:
+        try:
+            return max(0.0, float(millis) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    seconds = parse_duration(value)
+    if seconds is not None:
+        return seconds
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def exhausted_window(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds until the exhausted x-ratelimit window (requests or tokens) resets, if any."""
+    waits: List[float] = []
+    for kind in ("requests", "tokens"):
+        if (headers.get(f"x-ratelimit-remaining-{kind}") or "").strip() == "0":
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if reset is not None:
+                waits.append(reset)
+    return max(waits) if waits else None
+
+
+class _Waiter:
+    """A queued caller; `granted` is set (under the limiter lock) when it receives a slot."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        self.granted = False
+        self._loop = loop
+        self.future: Optional[asyncio.Future] = loop.create_future() if loop is not None else None
+        self.event: Optional[threading.Event] = None if loop is not None else threading.Event()
+
+    def wake(self) -> bool:
+        if self._loop is None:
+            self.event.set()
+            return True
+        try:
+            self._loop.call_soon_threadsafe(self._resolve)
+        except RuntimeError:
+            # The caller's loop is closed; nobody is left to use the slot.
+            return False
+        return True
+
+    def rearm(self) -> None:
+        """Reset after a wake-up without a grant; called from the waiting thread or loop."""
+        if self._loop is None:
+            self.event.clear()
+        elif self.future.done():
+            self.future = self._loop.create_future()
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdaptiveLimiter:
+    """AIMD in-flight limit with a FIFO queue, shared by threads and event loops."""
+
+    def __init__(
+        self,
+        initial: float = INITIAL_CONCURRENCY,
+        minimum: float = MIN_CONCURRENCY,
+        maximum: float = MAX_CONCURRENCY,
+        latency_tolerance: float = LATENCY_TOLERANCE,
+    ) -> None:
+        self.minimum = max(1.0, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.throttled = 0
+        self._paused_until = 0.0
+        self._last_cut = 0.0
+        self._consecutive_throttles = 0
+        self._queue: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def _capacity(self) -> int:
+        return max(1, int(self.limit))
+
+    def _pause_left(self) -> float:
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def _try_acquire(
+        self, waiter: Optional[_Waiter], loop: Optional[asyncio.AbstractEventLoop]
+    ) -> Tuple[bool, float, Optional[_Waiter]]:
+        """Take a slot if one is free and no earlier caller is queued; otherwise queue up.
+
+        Returns (acquired, seconds until a pause ends, waiter). Must hold the lock.
+        """
+        if waiter is not None and waiter.granted:
+            return True, 0.0, waiter
+        pause = self._pause_left()
+        first = not self._queue or self._queue[0] is waiter
+        if pause <= 0 and first and self.in_flight < self._capacity():
+            if waiter is not None:
+                self._queue.popleft()
+            self.in_flight += 1
+            self._dispatch()
+            return True, 0.0, waiter
+        if waiter is None:
+            waiter = _Waiter(loop)
+            self._queue.append(waiter)
+        else:
+            waiter.rearm()
+        return False, pause, waiter
+
+    def _dispatch(self) -> None:
+        """Hand free slots to queued callers in order. Must hold the lock."""
+        while self._queue and self.in_flight < self._capacity() and self._pause_left() <= 0:
+            waiter = self._queue.popleft()
+            if waiter.wake():
+                waiter.granted = True
+                self.in_flight += 1
+        if self._queue and self._pause_left() > 0:
+            # Let the first caller re-check with the pause as its timeout; it takes a slot
+            # when the pause ends even if no request is left to release one.
+            self._queue[0].wake()
+
+    def _abandon(self, waiter: Optional[_Waiter]) -> None:
+        if waiter is None:
+            return
+        with self._lock:
+            if waiter.granted:
+                self.in_flight -= 1
+                self._dispatch()
+            else:
+                try:
+                    self._queue.remove(waiter)
+                except ValueError:
+                    pass
+                self._dispatch()
+
+    async def aacquire(self, deadline: Optional[float] = None) -> None:
+        """Wait for a slot; `deadline` (a `time.monotonic()` value) bounds the wait."""
+        loop = asyncio.get_running_loop()
+        waiter: Optional[_Waiter] = None
+        try:
+            while True:
+                with self._lock:
+                    acquired, pause, waiter = self._try_acquire(waiter, loop)
+                if acquired:
+                    return
+                # Paused callers re-check when the pause ends; others wait for a grant.
+                await asyncio.wait({waiter.future}, timeout=_wait_timeout(pause, deadline))
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def acquire(self, deadline: Optional[float] = None) -> None:
+        waiter: Optional[_Waiter] = None
+        try:
+            while True:
+                with self._lock:
+                    acquired, pause, waiter = self._try_acquire(waiter, None)
+                if acquired:
+                    return
+                waiter.event.wait(_wait_timeout(pause, deadline))
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def release(self, started: float, outcome: str, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Return a slot and adapt the limit; `outcome` is ok, throttled, timeout or error."""
+        now = time.monotonic()
+        elapsed = now - started
+        pause = None
+        if headers is not None:
+            pause = retry_after(headers) if outcome == "throttled" else None
+            window = exhausted_window(headers)
+            if window is not None:
+                pause = max(pause or 0.0, window)
+        with self._lock:
+            self.in_flight -= 1
+            # Only requests sent after the last cut reflect the current limit.
+            fresh = started >= self._last_cut
+            if outcome in ("throttled", "timeout"):
+                if outcome == "throttled":
+                    self.throttled += 1
+                    self._consecutive_throttles += 1
+                    if pause is None:
+                        pause = _DEFAULT_PAUSE * 2 ** min(self._consecutive_throttles - 1, 6)
+                if fresh:
+                    self.limit = max(self.minimum, self.limit * _BACKOFF)
+                    self._last_cut = now
+            elif outcome == "ok":
+                self._consecutive_throttles = 0
+                slow = (
+                    self.latency_tolerance > 0
+                    and self.latency is not None
+                    and elapsed > self.latency * self.latency_tolerance
+                )
+                if slow and fresh:
+                    self.limit = max(self.minimum, self.limit * _LATENCY_BACKOFF)
+                    self._last_cut = now
+                elif not slow:
+                    self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self.latency = elapsed if self.latency is None else self.latency + _LATENCY_ALPHA * (elapsed - self.latency)
+            if pause:
+                self._paused_until = max(self._paused_until, now + min(pause, _MAX_PAUSE))
+            self._dispatch()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "inFlight": self.in_flight,
+                "queued": len(self._queue),
+                "throttled": self.throttled,
+                "latencyMs": round(self.latency * 1000, 1) if self.latency is not None else None,
+                "pausedMs": round(self._pause_left() * 1000),
+            }
+
+
+def _wait_timeout(pause: float, deadline: Optional[float]) -> Optional[float]:
+    """Seconds to wait for a slot; raises `LLMThrottledError` once `deadline` has passed."""
+    if deadline is None:
+        return pause or None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise LLMThrottledError("LLM gateway is still throttling requests; gave up waiting for a slot")
+    return min(pause, left) if pause else left
+
+
+class _Call:
+    """Outcome of one limited request, reported back to the limiter on exit."""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.outcome = "error"
+        self.headers: Optional[Mapping[str, str]] = None
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        self.outcome = "throttled" if status_code in THROTTLE_STATUSES else "ok" if status_code < 400 else "error"
+        self.headers = headers
+
+
+_LIMITERS: Dict[Tuple[str, str, str], AdaptiveLimiter] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _credential(headers: Optional[Mapping[str, str]]) -> str:
+    if not headers:
+        return ""
+    for name, value in headers.items():
+        if name.lower() in ("authorization", "api-key", "x-api-key") and value:
+            return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+    return ""
+
+
+def limiter_for(url: str, body: Mapping[str, Any], headers: Optional[Mapping[str, str]] = None) -> Optional[AdaptiveLimiter]:
+    """The limiter of (endpoint, model, API key); None when adaptive concurrency is off."""
+    if not ADAPTIVE:
+        return None
+    key = (url, str(body.get("model") or ""), _credential(headers))
+    with _REGISTRY_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = _LIMITERS[key] = AdaptiveLimiter()
+        return limiter
+
+
+def limiter_stats() -> List[Dict[str, Any]]:
+    """Current state of every limiter (the API key only as a hash prefix)."""
+    with _REGISTRY_LOCK:
+        items = list(_LIMITERS.items())
+    return [{"url": url, "model": model, "key": key, **limiter.snapshot()} for (url, model, key), limiter in items]
+
+
+def _outcome_of(exc: BaseException) -> str:
+    return "timeout" if isinstance(exc, httpx.TimeoutException) else "error"
+
+
+@asynccontextmanager
+async def alimited(limiter: Optional[AdaptiveLimiter], deadline: Optional[float] = None) -> AsyncIterator[_Call]:
+    call = _Call()
+    if limiter is None:
+        yield call
+        return
+    await limiter.aacquire(deadline)
+    call.started = time.monotonic()
+    try:
+        yield call
+    except BaseException as exc:
+        call.outcome = _outcome_of(exc)
+        raise
+    finally:
+        limiter.release(call.started, call.outcome, call.headers)
+
+
+@contextmanager
+def limited(limiter: Optional[AdaptiveLimiter], deadline: Optional[float] = None) -> Iterator[_Call]:
+    call = _Call()
+    if limiter is None:
+        yield call
+        return
+    limiter.acquire(deadline)
+    call.started = time.monotonic()
+    try:
+        yield call
+    except BaseException as exc:
+        call.outcome = _outcome_of(exc)
+        raise
+    finally:
+        limiter.release(call.started, call.outcome, call.headers)
@@ -1,6 +1,15 @@
-from .base import BaseMCPClient
+from .base import AsyncMCPClient, BaseMCPClient, SyncMCPClient, aclose_client, afetch_context, ainvoke_tool
 from .http import HttpMCPClient
 from .factory import build_mcp_client
 
-__all__ = ["BaseMCPClient", "HttpMCPClient", "build_mcp_client"]
+__all__ = [
+    "AsyncMCPClient",
+    "BaseMCPClient",
+    "HttpMCPClient",
+    "SyncMCPClient",
+    "aclose_client",
+    "afetch_context",
+    "ainvoke_tool",
+    "build_mcp_client",
+]
 
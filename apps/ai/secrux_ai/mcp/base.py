@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Dict, Optional, Protocol
 
+from ..aio import run_sync
+from ..tracing import span
+
 
 class BaseMCPClient(Protocol):
     """Minimal MCP client interface used by agents."""
@@ -18,3 +22,74 @@ class BaseMCPClient(Protocol):
     def close(self) -> None:
         ...
 
+
+class AsyncMCPClient(Protocol):
+    """Async counterpart of `BaseMCPClient`; clients may implement either or both."""
+
+    async def ainvoke_tool(self, tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        ...
+
+    async def afetch_context(self, resource: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        ...
+
+    async def ahealth(self) -> bool:
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+async def ainvoke_tool(client: Any, tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Invoke a tool on any MCP client, natively async when the client supports it."""
+    with span("mcp.invoke_tool", tool=tool):
+        native = getattr(client, "ainvoke_tool", None)
+        if native is not None:
+            return await native(tool, payload)
+        return await asyncio.to_thread(client.invoke_tool, tool, payload)
+
+
+async def afetch_context(client: Any, resource: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    with span("mcp.fetch_context", resource=resource):
+        native = getattr(client, "afetch_context", None)
+        if native is not None:
+            return await native(resource, params)
+        return await asyncio.to_thread(client.fetch_context, resource, params)
+
+
+async def aclose_client(client: Any) -> None:
+    native = getattr(client, "aclose", None)
+    if native is not None:
+        await native()
+    else:
+        await asyncio.to_thread(client.close)
+
+
+class SyncMCPClient:
+    """Expose an async-only MCP client through the blocking `BaseMCPClient` interface."""
+
+    def __init__(self, client: AsyncMCPClient) -> None:
+        self.inner = client
+
+    def invoke_tool(self, tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return run_sync(self.inner.ainvoke_tool(tool, payload))
+
+    def fetch_context(self, resource: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return run_sync(self.inner.afetch_context(resource, params))
+
+    def health(self) -> bool:
+        return run_sync(self.inner.ahealth())
+
+    def close(self) -> None:
+        run_sync(self.inner.aclose())
+
+    async def ainvoke_tool(self, tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.inner.ainvoke_tool(tool, payload)
+
+    async def afetch_context(self, resource: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.inner.afetch_context(resource, params)
+
+    async def ahealth(self) -> bool:
+        return await self.inner.ahealth()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
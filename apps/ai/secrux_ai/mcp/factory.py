@@ -4,23 +4,32 @@ from typing import Dict
 
 from ..config import MCPProfileConfig
 from ..utils import load_from_entrypoint
-from .base import BaseMCPClient
+from .base import BaseMCPClient, SyncMCPClient
 from .http import HttpMCPClient
 
 
 def build_mcp_client(profile: MCPProfileConfig) -> BaseMCPClient:
     if profile.entrypoint:
         client_cls = load_from_entrypoint(profile.entrypoint)
-        return client_cls(**profile.params)
+        client = client_cls(**profile.params)
+        if not hasattr(client, "invoke_tool") and hasattr(client, "ainvoke_tool"):
+            return SyncMCPClient(client)
+        return client
 
     if profile.type == "http":
         params: Dict[str, object] = profile.params.copy()
         base_url = params.pop("base_url", None) or params.pop("baseUrl", None)
         api_key = params.pop("api_key", None) or params.pop("apiKey", None)
         timeout = params.pop("timeout_seconds", None) or params.pop("timeoutSeconds", None) or 30
+        headers = params.pop("headers", None)
         if not base_url:
             raise ValueError(f"MCP profile '{profile.name}' missing base_url in params.")
-        return HttpMCPClient(base_url=base_url, api_key=api_key, timeout_seconds=int(timeout))
+        return HttpMCPClient(
+            base_url=base_url,
+            api_key=api_key,
+            timeout_seconds=int(timeout),
+            headers=headers if isinstance(headers, dict) else None,
+        )
 
     raise ValueError(f"Unsupported MCP profile type '{profile.type}' without entrypoint.")
 
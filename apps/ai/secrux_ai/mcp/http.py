@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import weakref
 from typing import Any, Dict, Optional
 
 import httpx
@@ -10,20 +12,53 @@ from .base import BaseMCPClient
 class HttpMCPClient(BaseMCPClient):
     """HTTP-based MCP client."""
 
-    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout_seconds: int = 30):
-        headers = {"Authorization": f"Bearer {api_key}"} if api_key else None
-        self._client = httpx.Client(base_url=base_url.rstrip("/"), timeout=timeout_seconds, headers=headers)
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        timeout_seconds: int = 30,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self._base_url = base_url.rstrip("/")
+        merged = dict(headers or {})
+        if api_key:
+            merged["Authorization"] = f"Bearer {api_key}"
+        self._headers = merged or None
+        self._timeout = timeout_seconds
+        self._client = httpx.Client(base_url=self._base_url, timeout=self._timeout, headers=self._headers)
+        # An AsyncClient is bound to the loop it was first used on, so keep one per loop.
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(base_url=self._base_url, timeout=self._timeout, headers=self._headers)
+            self._async_clients[loop] = client
+        return client
 
     def invoke_tool(self, tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         response = self._client.post(f"/tools/{tool}:invoke", json=payload)
         response.raise_for_status()
         return response.json()
 
+    async def ainvoke_tool(self, tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._async_client().post(f"/tools/{tool}:invoke", json=payload)
+        response.raise_for_status()
+        return response.json()
+
     def fetch_context(self, resource: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         response = self._client.get(f"/context/{resource}", params=params)
         response.raise_for_status()
         return response.json()
 
+    async def afetch_context(self, resource: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        response = await self._async_client().get(f"/context/{resource}", params=params)
+        response.raise_for_status()
+        return response.json()
+
     def health(self) -> bool:
         try:
             response = self._client.get("/healthz")
@@ -33,12 +68,26 @@ class HttpMCPClient(BaseMCPClient):
         except httpx.HTTPError:
             return False
 
+    async def ahealth(self) -> bool:
+        try:
+            response = await self._async_client().get("/healthz")
+            response.raise_for_status()
+            body = response.json()
+            return body.get("status") == "ok"
+        except httpx.HTTPError:
+            return False
+
     def close(self) -> None:
         self._client.close()
 
+    async def aclose(self) -> None:
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+        self._client.close()
+
     def __enter__(self) -> "HttpMCPClient":
         return self
 
     def __exit__(self, exc_type, exc, tb) -> None:
         self.close()
-
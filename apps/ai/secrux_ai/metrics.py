@@ -0,0 +1,163 @@
+"""Prometheus histograms of span durations.
+
+Every span recorded through `secrux_ai.tracing` is observed here, labelled by span name
+and outcome (`ok` / `error`). Reviews run in worker processes while `/metrics` is served
+by the API process, so each process writes its histograms to a snapshot file in a shared
+directory (`persist`), and `render_prometheus` merges the files with the local histograms.
+Counters only grow within a process; `reset_shared` clears the directory when the API
+starts its embedded workers.
+
+Configuration:
+- SECRUX_AI_METRICS_DIR: directory for per-process snapshots (default /app/storage/metrics, empty disables)
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+METRICS_DIR = (os.getenv("SECRUX_AI_METRICS_DIR", "/app/storage/metrics") or "").strip()
+
+# Seconds; spans range from sub-millisecond cache hits to multi-minute LLM calls.
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+SPAN_METRIC = "secrux_ai_span_duration_seconds"
+
+_SNAPSHOT_PREFIX = "spans-"
+
+# (span, outcome) -> [per-bucket counts (+Inf last), sum, count]
+_Series = Dict[Tuple[str, str], List]
+
+
+class SpanHistograms:
+    def __init__(self) -> None:
+        self._series: _Series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, span: str, outcome: str, seconds: float) -> None:
+        idx = len(BUCKETS)
+        for pos, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                idx = pos
+                break
+        with self._lock:
+            series = self._series.get((span, outcome))
+            if series is None:
+                series = self._series[(span, outcome)] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {"span": span, "outcome": outcome, "buckets": list(counts), "sum": total, "count": count}
+                for (span, outcome), (counts, total, count) in self._series.items()
+            ]
+
+
+HISTOGRAMS = SpanHistograms()
+
+
+def observe(span: str, outcome: str, seconds: float) -> None:
+    HISTOGRAMS.observe(span, outcome, seconds)
+
+
+def _snapshot_path(pid: int) -> Optional[Path]:
+    if not METRICS_DIR:
+        return None
+    return Path(METRICS_DIR) / f"{_SNAPSHOT_PREFIX}{pid}.json"
+
+
+def persist() -> None:
+    """Write this process's histograms to the shared directory (atomic replace)."""
+    path = _snapshot_path(os.getpid())
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(HISTOGRAMS.snapshot()), encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception:
+        # Metrics must never fail a job.
+        return
+
+
+def reset_shared() -> None:
+    """Drop snapshots left by earlier processes."""
+    if not METRICS_DIR:
+        return
+    try:
+        for path in Path(METRICS_DIR).glob(f"{_SNAPSHOT_PREFIX}*.json"):
+            path.unlink(missing_ok=True)
+    except Exception:
+        return
+
+
+def _shared_snapshots() -> Iterator[List[Dict]]:
+    if not METRICS_DIR:
+        return
+    own = _snapshot_path(os.getpid())
+    try:
+        paths = list(Path(METRICS_DIR).glob(f"{_SNAPSHOT_PREFIX}*.json"))
+    except Exception:
+        return
+    for path in paths:
+        if path == own:
+            continue
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if isinstance(data, list):
+            yield data
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _bound(value: float) -> str:
+    return f"{value:g}"
+
+
+def render_prometheus() -> str:
+    """Text exposition (version 0.0.4) of the merged span histograms."""
+    merged: _Series = {}
+    for snapshot in [HISTOGRAMS.snapshot(), *_shared_snapshots()]:
+        for entry in snapshot:
+            try:
+                key = (str(entry["span"]), str(entry["outcome"]))
+                buckets = [int(value) for value in entry["buckets"]]
+                total, count = float(entry["sum"]), int(entry["count"])
+            except Exception:
+                continue
+            if len(buckets) != len(BUCKETS) + 1:
+                continue
+            series = merged.setdefault(key, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+            series[0] = [a + b for a, b in zip(series[0], buckets)]
+            series[1] += total
+            series[2] += count
+
+    lines = [
+        f"# HELP {SPAN_METRIC} Duration of traced spans (jobs, agents, LLM and MCP calls, builtin tools).",
+        f"# TYPE {SPAN_METRIC} histogram",
+    ]
+    for (span, outcome), (counts, total, count) in sorted(merged.items()):
+        labels = f'span="{_label(span)}",outcome="{_label(outcome)}"'
+        cumulative = 0
+        for bound, value in zip(BUCKETS, counts):
+            cumulative += value
+            lines.append(f'{SPAN_METRIC}_bucket{{{labels},le="{_bound(bound)}"}} {cumulative}')
+        lines.append(f'{SPAN_METRIC}_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f"{SPAN_METRIC}_sum{{{labels}}} {total:.6f}")
+        lines.append(f"{SPAN_METRIC}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+atexit.register(persist)
@@ -1,46 +1,64 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import threading
 import time
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Set
 
 from .agents.base import BaseAgent
-from .agents.builtins import LogHeuristicsAgent, McpReviewAgent, SignalAwareAgent
-from .agents.sca_issue_review import ScaIssueReviewAgent
-from .agents.ticket_copy import TicketCopyAgent
-from .agents.vuln_review import VulnReviewAgent
+from .aio import run_sync
 from .callbacks import CallbackSink, StdoutCallbackSink
-from .config import AgentConfig, CallbackConfig, PlatformConfig
-from .mcp import BaseMCPClient, build_mcp_client
-from .models import AgentContext, AgentRecommendation, StageEvent
+from .config import AgentConfig, CallbackConfig, MCPProfileConfig, PlatformConfig
+from .mcp import BaseMCPClient, aclose_client, build_mcp_client
+from .models import AgentContext, AgentFinding, AgentRecommendation, FindingStatus, Severity, StageEvent, StageType
+from .task_cache import TASK_CACHE_KEY, task_cache
+from .tracing import span
 from .utils import load_from_entrypoint
 
 
+# Builtin agent kinds, as entrypoints: the review agents pull in tree-sitter and the LLM
+# stack, so a kind's module is only imported when an agent of that kind is built.
 BUILTIN_AGENTS = {
-    "signal": SignalAwareAgent,
-    "log": LogHeuristicsAgent,
-    "mcp-review": McpReviewAgent,
-    "vuln-review": VulnReviewAgent,
-    "sca-issue-review": ScaIssueReviewAgent,
-    "ticket-copy": TicketCopyAgent,
+    "signal": "secrux_ai.agents.builtins:SignalAwareAgent",
+    "log": "secrux_ai.agents.builtins:LogHeuristicsAgent",
+    "mcp-review": "secrux_ai.agents.builtins:McpReviewAgent",
+    "vuln-review": "secrux_ai.agents.vuln_review:VulnReviewAgent",
+    "sca-issue-review": "secrux_ai.agents.sca_issue_review:ScaIssueReviewAgent",
+    "ticket-copy": "secrux_ai.agents.ticket_copy:TicketCopyAgent",
 }
 
 
 @dataclass
 class AgentRuntime:
     config: AgentConfig
-    instance: BaseAgent
+    # Built on the first event the agent can handle (`AgentOrchestrator._instance`).
+    instance: Optional[BaseAgent] = None
     mcp_profile: Optional[str] = None
+    # Indexes (into `AgentOrchestrator.agents`) of the agents this one runs after.
+    depends_on: Set[int] = field(default_factory=set)
 
 
 class AgentOrchestrator:
+    """Runs the configured agents for stage events.
+
+    Construction only reads the config: agents are bucketed by the stage types they
+    declare, and an agent is instantiated, and its MCP client opened, the first time an
+    event of a matching stage reaches it. Large tenant configs therefore cost little for
+    events that only a few of their agents handle.
+    """
+
     def __init__(self, config: PlatformConfig, callback_sink: Optional[CallbackSink] = None):
         self.config = config
         self.callback_sink = callback_sink or self._build_callback_sink(config.callbacks)
         self.mcp_clients: Dict[str, BaseMCPClient] = {}
         self.agents: List[AgentRuntime] = []
-        self._build_mcp_clients()
+        self._mcp_profiles: Dict[str, MCPProfileConfig] = {profile.name: profile for profile in config.mcp_profiles}
+        self._lock = threading.Lock()
         self._build_agents()
+        self._order = self._resolve_order()
+        self._buckets = self._bucket_agents()
 
     def _build_callback_sink(self, callback_config: CallbackConfig) -> CallbackSink:
         from .callbacks import FileCallbackSink, WebhookCallbackSink
@@ -55,49 +73,122 @@ class AgentOrchestrator:
             return FileCallbackSink(callback_config.file_path)
         return StdoutCallbackSink()
 
-    def _build_mcp_clients(self) -> None:
-        for profile in self.config.mcp_profiles:
-            self.mcp_clients[profile.name] = build_mcp_client(profile)
-
     def _build_agents(self) -> None:
         for agent_cfg in self.config.agents:
             if not agent_cfg.enabled:
                 continue
-            cls = self._resolve_agent_class(agent_cfg)
-            instance = cls(
-                name=agent_cfg.name,
-                params=agent_cfg.params,
-                stage_types=agent_cfg.stage_types,
-            )
-            runtime = AgentRuntime(config=agent_cfg, instance=instance, mcp_profile=agent_cfg.mcp_profile)
-            self.agents.append(runtime)
+            self.agents.append(AgentRuntime(config=agent_cfg, mcp_profile=agent_cfg.mcp_profile))
+        by_name: Dict[str, List[int]] = {}
+        for idx, runtime in enumerate(self.agents):
+            by_name.setdefault(runtime.config.name, []).append(idx)
+        for idx, runtime in enumerate(self.agents):
+            # Constraints on disabled or unknown agents are dropped rather than failing the stage.
+            for name in runtime.config.after:
+                runtime.depends_on.update(dep for dep in by_name.get(name, []) if dep != idx)
+
+    def _resolve_order(self) -> List[int]:
+        """Topological order of the agents, breaking ties by config order."""
+        remaining = {idx: set(runtime.depends_on) for idx, runtime in enumerate(self.agents)}
+        ready = [idx for idx, deps in remaining.items() if not deps]
+        heapq.heapify(ready)
+        order: List[int] = []
+        while ready:
+            idx = heapq.heappop(ready)
+            order.append(idx)
+            for other, deps in remaining.items():
+                if idx in deps:
+                    deps.discard(idx)
+                    if not deps:
+                        heapq.heappush(ready, other)
+        if len(order) != len(self.agents):
+            cyclic = sorted({self.agents[idx].config.name for idx in remaining if idx not in order})
+            raise ValueError(f"Cyclic 'after' constraints between agents: {', '.join(cyclic)}")
+        return order
+
+    def _bucket_agents(self) -> Dict[StageType, List[int]]:
+        """Indexes of the agents that may handle each stage type, in config order."""
+        declared: List[Optional[FrozenSet[StageType]]] = [
+            frozenset(StageType(st) for st in runtime.config.stage_types) if runtime.config.stage_types else None
+            for runtime in self.agents
+        ]
+        return {
+            stage: [idx for idx, stages in enumerate(declared) if stages is None or stage in stages]
+            for stage in StageType
+        }
+
+    def _instance(self, idx: int) -> BaseAgent:
+        runtime = self.agents[idx]
+        if runtime.instance is None:
+            with self._lock:
+                if runtime.instance is None:
+                    agent_cfg = runtime.config
+                    cls = self._resolve_agent_class(agent_cfg)
+                    runtime.instance = cls(
+                        name=agent_cfg.name,
+                        params=agent_cfg.params,
+                        stage_types=agent_cfg.stage_types,
+                    )
+        return runtime.instance
 
     def _resolve_agent_class(self, agent_cfg: AgentConfig):
         if agent_cfg.entrypoint:
             return load_from_entrypoint(agent_cfg.entrypoint)
         if agent_cfg.kind in BUILTIN_AGENTS:
-            return BUILTIN_AGENTS[agent_cfg.kind]
+            return load_from_entrypoint(BUILTIN_AGENTS[agent_cfg.kind])
         raise ValueError(f"Unknown agent kind '{agent_cfg.kind}' for agent '{agent_cfg.name}'")
 
     def _resolve_mcp_client(self, profile_name: Optional[str]) -> Optional[BaseMCPClient]:
+        """The client for `profile_name`, opened on first use."""
         if not profile_name:
             return None
-        return self.mcp_clients.get(profile_name)
+        client = self.mcp_clients.get(profile_name)
+        if client is None and profile_name in self._mcp_profiles:
+            with self._lock:
+                client = self.mcp_clients.get(profile_name)
+                if client is None:
+                    client = self.mcp_clients[profile_name] = build_mcp_client(self._mcp_profiles[profile_name])
+        return client
+
+    def _agent_timeout(self, runtime: AgentRuntime) -> Optional[float]:
+        timeout = runtime.config.timeout_seconds
+        if timeout is None:
+            timeout = self.config.execution.agent_timeout_seconds
+        return timeout if timeout and timeout > 0 else None
 
     def process(self, event: StageEvent) -> AgentRecommendation:
-        shared_cache: Dict[str, object] = {}
-        findings = []
+        """Blocking entry point; runs `aprocess` on the shared bridge loop."""
+        return run_sync(self.aprocess(event))
+
+    async def aprocess(self, event: StageEvent) -> AgentRecommendation:
+        with span("orchestrator.process", stageType=event.stage_type.value):
+            return await self._aprocess(event)
+
+    async def _aprocess(self, event: StageEvent) -> AgentRecommendation:
+        # Per-event scratch space, plus a cache shared by every event of the same task.
+        shared_cache: Dict[str, object] = {TASK_CACHE_KEY: task_cache(event.tenant_id, event.task_id)}
         start = time.perf_counter()
-        for runtime in self.agents:
-            context = AgentContext(
-                event=event,
-                shared_cache=shared_cache,
-                mcp_client=self._resolve_mcp_client(runtime.mcp_profile),
-            )
-            if not runtime.instance.supports(context):
-                continue
-            result = runtime.instance.run(context)
-            findings.extend(result)
+        contexts: Dict[int, AgentContext] = {}
+        for idx in self._buckets.get(event.stage_type, ()):
+            # `model_construct` keeps the one `shared_cache` dict; validation would copy it per agent.
+            context = AgentContext.model_construct(event=event, shared_cache=shared_cache, mcp_client=None)
+            if self._instance(idx).supports(context):
+                context.mcp_client = self._resolve_mcp_client(self.agents[idx].mcp_profile)
+                contexts[idx] = context
+
+        concurrent = self.config.execution.mode == "concurrent" and len(contexts) > 1
+        results: Dict[int, List[AgentFinding]] = {}
+        timings: Dict[int, int] = {}
+        if concurrent:
+            await self._run_concurrent(contexts, results, timings)
+        else:
+            for idx in self._order:
+                if idx in contexts:
+                    await self._run_agent(idx, contexts[idx], results, timings)
+
+        # Merge in config order so the output does not depend on completion order.
+        findings: List[AgentFinding] = []
+        for idx in sorted(results):
+            findings.extend(results[idx])
         elapsed_ms = int((time.perf_counter() - start) * 1000)
         recommendation = AgentRecommendation(
             taskId=event.task_id,
@@ -105,15 +196,81 @@ class AgentOrchestrator:
             stageType=event.stage_type,
             findings=findings,
             elapsedMs=elapsed_ms,
-            metadata={"agentCount": len(self.agents)},
+            metadata={
+                "agentCount": len(self.agents),
+                "executionMode": "concurrent" if concurrent else "serial",
+                "agentTimings": {self.agents[idx].config.name: timings[idx] for idx in sorted(timings)},
+            },
         )
-        self.callback_sink.send(recommendation)
+        with span("callback.send"):
+            await asyncio.to_thread(self.callback_sink.send, recommendation)
         return recommendation
 
+    async def _run_agent(
+        self,
+        idx: int,
+        context: AgentContext,
+        results: Dict[int, List[AgentFinding]],
+        timings: Dict[int, int],
+    ) -> None:
+        runtime = self.agents[idx]
+        timeout = self._agent_timeout(runtime)
+        started = time.perf_counter()
+        with span("agent.run", agent=runtime.config.name) as attrs:
+            try:
+                results[idx] = list(await asyncio.wait_for(self._instance(idx).arun(context), timeout))
+            except asyncio.TimeoutError:
+                # Async agents are cancelled; a blocking `run` keeps its worker thread until it returns.
+                results[idx] = [self._timeout_finding(runtime, timeout)]
+                attrs["timedOut"] = True
+            finally:
+                timings[idx] = int((time.perf_counter() - started) * 1000)
+
+    async def _run_concurrent(
+        self,
+        contexts: Dict[int, AgentContext],
+        results: Dict[int, List[AgentFinding]],
+        timings: Dict[int, int],
+    ) -> None:
+        """Start each agent once its `after` agents are done, at most `maxWorkers` at a time."""
+        done = {idx: asyncio.Event() for idx in contexts}
+        limit = asyncio.Semaphore(max(1, self.config.execution.max_workers))
+
+        async def run(idx: int) -> None:
+            try:
+                for dep in self.agents[idx].depends_on:
+                    if dep in done:
+                        await done[dep].wait()
+                async with limit:
+                    await self._run_agent(idx, contexts[idx], results, timings)
+            finally:
+                done[idx].set()
+
+        tasks = [asyncio.create_task(run(idx)) for idx in self._order if idx in contexts]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    def _timeout_finding(self, runtime: AgentRuntime, timeout: float) -> AgentFinding:
+        return AgentFinding(
+            agent=runtime.config.name,
+            severity=Severity.INFO,
+            status=FindingStatus.OPEN,
+            summary=f"Agent timed out after {timeout:g}s",
+            details={"reason": "timeout", "timeoutSeconds": timeout},
+        )
+
     def close(self) -> None:
         for client in self.mcp_clients.values():
             client.close()
 
+    async def aclose(self) -> None:
+        for client in self.mcp_clients.values():
+            await aclose_client(client)
+
     def __enter__(self) -> "AgentOrchestrator":
         return self
 
@@ -0,0 +1,246 @@
+"""Token-budgeted prompt assembly.
+
+Agents used to cap evidence with fixed character and item counts, so prompts either
+overflowed the model context or left most of it unused. A `PromptBuilder` collects
+sections with a priority, and `render` fits them into the model's token budget: required
+sections always go in, then optional sections are filled in priority order, item by item,
+so the lowest-value evidence (lowest-priority sections, trailing items) is trimmed first.
+Sections keep their insertion order in the rendered prompt.
+
+Tokens are counted with `tiktoken` when it is installed (`pip install ".[tokens]"`)
+and with a conservative character heuristic otherwise.
+
+Configuration:
+- SECRUX_AI_PROMPT_MAX_TOKENS: upper bound for the user prompt, in tokens (default 16000)
+- SECRUX_AI_PROMPT_OUTPUT_RESERVE: tokens left free for the completion (default 2048)
+- SECRUX_AI_PROMPT_TOKENIZER: `auto` (tiktoken when available) or `heuristic` (default auto)
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+MAX_PROMPT_TOKENS = int(os.getenv("SECRUX_AI_PROMPT_MAX_TOKENS", "16000"))
+OUTPUT_RESERVE = int(os.getenv("SECRUX_AI_PROMPT_OUTPUT_RESERVE", "2048"))
+TOKENIZER = (os.getenv("SECRUX_AI_PROMPT_TOKENIZER") or "auto").strip().lower()
+
+# Context windows by model-name prefix; the longest matching prefix wins.
+_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-3.5": 16_385,
+    "gpt-4": 8_192,
+    "gpt-4-32k": 32_768,
+    "gpt-4-turbo": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_000_000,
+    "o1": 200_000,
+    "o3": 200_000,
+    "o4": 200_000,
+    "claude": 200_000,
+    "deepseek": 64_000,
+    "qwen": 32_768,
+    "glm": 128_000,
+    "moonshot": 128_000,
+}
+_DEFAULT_CONTEXT_WINDOW = 32_768
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+# Source code tokenizes worse than prose; 3 chars per token errs on the side of overcounting.
+_CHARS_PER_TOKEN = 3
+
+
+def context_window(model: str) -> int:
+    name = (model or "").strip().lower().rsplit("/", 1)[-1]
+    best = ""
+    for prefix in _CONTEXT_WINDOWS:
+        if name.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    return _CONTEXT_WINDOWS[best] if best else _DEFAULT_CONTEXT_WINDOW
+
+
+def prompt_budget(model: str, reserved: int = 0) -> int:
+    """Tokens available for the user prompt after `reserved` (e.g. the system prompt) and the output reserve."""
+    available = context_window(model) - OUTPUT_RESERVE - reserved
+    return max(256, min(MAX_PROMPT_TOKENS, available))
+
+
+@lru_cache(maxsize=32)
+def _encoding(model: str) -> Optional[Any]:
+    if TOKENIZER == "heuristic" or importlib.util.find_spec("tiktoken") is None:
+        return None
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Encodings are fetched on first use; offline hosts fall back to the heuristic.
+        return None
+
+
+def count_tokens(text: str, model: str = "") -> int:
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    wide = 0 if text.isascii() else len(_NON_ASCII.findall(text))
+    return math.ceil((len(text) - wide) / _CHARS_PER_TOKEN) + wide
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "") -> str:
+    """Longest prefix of `text` within `max_tokens`, cut at a line break when one is close."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _encoding(model)
+    if encoding is not None:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if count_tokens(text[:mid], model) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        head = text[:lo]
+    cut = head.rfind("\n")
+    if cut > len(head) * 0.8:
+        head = head[:cut]
+    return head.rstrip() + "…"
+
+
+@dataclass
+class PromptSection:
+    title: Optional[str]
+    items: List[str]
+    priority: int = 0
+    required: bool = False
+    placeholder: Optional[str] = None
+    # Largest fraction of the optional budget taken before lower-priority sections get theirs.
+    share: float = 1.0
+    # Shown in place of the dropped tail, e.g. "… 12 more chains omitted".
+    noun: str = "items"
+
+
+# Room kept for the "… N more omitted" marker.
+_MARKER_TOKENS = 16
+
+
+@dataclass
+class PromptBuilder:
+    """Collects prompt sections and renders them within a token budget.
+
+    Lower `priority` values are more important. Required sections are never trimmed.
+    Optional sections are filled in two passes: first in priority order, each capped at
+    its `share` of the optional budget, then the leftover goes to whatever still has
+    items, again in priority order.
+    """
+
+    sections: List[PromptSection] = field(default_factory=list)
+
+    def add(
+        self,
+        title: Optional[str],
+        body: Any = None,
+        priority: int = 0,
+        required: bool = False,
+        placeholder: Optional[str] = None,
+        share: float = 1.0,
+        noun: str = "items",
+    ) -> "PromptBuilder":
+        """Add a section; `body` is a string (one item) or a sequence of items trimmed from the end."""
+        if body is None:
+            items: List[str] = []
+        elif isinstance(body, str):
+            items = [body] if body else []
+        else:
+            items = [str(item) for item in body if item]
+        self.sections.append(PromptSection(title, items, priority, required, placeholder, share, noun))
+        return self
+
+    def line(self, text: str) -> "PromptBuilder":
+        """A required one-line section such as "[Rule] ..."."""
+        return self.add(text, required=True)
+
+    def render(self, model: str = "", budget: Optional[int] = None) -> str:
+        budget = prompt_budget(model) if budget is None else budget
+        remaining = budget
+        for section in self.sections:
+            if section.required or (not section.items and section.placeholder):
+                remaining -= self._cost(section.title, section.items or [section.placeholder or ""], model)
+
+        optional = sorted(
+            (idx for idx, section in enumerate(self.sections) if not section.required and section.items),
+            key=lambda idx: self.sections[idx].priority,
+        )
+        fitted: Dict[int, Tuple[List[str], int, int]] = {}
+        optional_budget = max(0, remaining)
+        for idx in optional:
+            allowance = min(remaining, int(optional_budget * self.sections[idx].share))
+            fitted[idx] = self._fit(self.sections[idx], allowance, model)
+            remaining -= fitted[idx][2]
+        for idx in optional:
+            kept, dropped, used = fitted[idx]
+            if (dropped or self._clipped(self.sections[idx], kept)) and remaining > 0:
+                fitted[idx] = self._fit(self.sections[idx], used + remaining, model)
+                remaining -= fitted[idx][2] - used
+
+        lines: List[str] = []
+        for idx, section in enumerate(self.sections):
+            if section.required or not section.items:
+                kept, dropped = section.items or ([section.placeholder] if section.placeholder else []), 0
+                if not kept and not section.required:
+                    continue
+            else:
+                kept, dropped, used = fitted[idx]
+                if not used:
+                    continue  # not even the header fit
+            if section.title:
+                lines.append(section.title)
+            lines.extend(kept)
+            if dropped:
+                lines.append(f"… {dropped} more {section.noun} omitted to fit the token budget")
+        return "\n".join(lines)
+
+    def _cost(self, title: Optional[str], items: Sequence[str], model: str) -> int:
+        # +1 per line for the joining newline.
+        cost = count_tokens(title, model) + 1 if title else 0
+        return cost + sum(count_tokens(item, model) + 1 for item in items if item)
+
+    @staticmethod
+    def _clipped(section: PromptSection, kept: List[str]) -> bool:
+        return bool(kept) and kept[-1] is not section.items[len(kept) - 1]
+
+    def _fit(self, section: PromptSection, allowance: int, model: str) -> Tuple[List[str], int, int]:
+        """Leading items of `section` within `allowance` tokens: (kept, dropped count, tokens used)."""
+        header = self._cost(section.title, [], model)
+        if allowance <= header + _MARKER_TOKENS:
+            return [], len(section.items), 0
+        used = header
+        kept: List[str] = []
+        for pos, item in enumerate(section.items):
+            cost = count_tokens(item, model) + 1
+            reserve = _MARKER_TOKENS if pos < len(section.items) - 1 else 0
+            if used + cost + reserve <= allowance:
+                kept.append(item)
+                used += cost
+                continue
+            if not kept:
+                # An oversized first item still contributes its head.
+                head = truncate_to_tokens(item, allowance - used - _MARKER_TOKENS - 1, model)
+                if head:
+                    kept.append(head)
+                    used += count_tokens(head, model) + 1
+            break
+        dropped = len(section.items) - len(kept)
+        return kept, dropped, used + (_MARKER_TOKENS if dropped else 0)
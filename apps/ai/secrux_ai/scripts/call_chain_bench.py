@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+from ..call_chains import shortest_chains
+
+
+def synthetic_graph(
+    size: int, layers: int, fan_out: int, back_edge_ratio: float, seed: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Layered dataflow graph: sources in the first layer, sinks in the last, plus back edges (cycles)."""
+    rng = random.Random(seed)
+    per_layer = max(1, size // layers)
+    layer_of = [min(idx // per_layer, layers - 1) for idx in range(size)]
+    by_layer: Dict[int, List[int]] = {}
+    for idx, layer in enumerate(layer_of):
+        by_layer.setdefault(layer, []).append(idx)
+
+    nodes = []
+    for idx, layer in enumerate(layer_of):
+        role = "SOURCE" if layer == 0 else "SINK" if layer == layers - 1 else "INTERMEDIATE"
+        nodes.append({"id": f"n{idx}", "role": role, "label": f"step {idx}", "file": f"src/F{layer}.java", "line": idx})
+
+    edges = []
+    for idx, layer in enumerate(layer_of):
+        if layer == layers - 1:
+            continue
+        for _ in range(fan_out):
+            if layer > 1 and rng.random() < back_edge_ratio:
+                target = rng.choice(by_layer[rng.randrange(1, layer)])
+            else:
+                target = rng.choice(by_layer[layer + 1])
+            edges.append({"source": f"n{idx}", "target": f"n{target}"})
+    return nodes, edges
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark call-chain extraction on synthetic dataflow graphs.")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma-separated node counts")
+    parser.add_argument("--layers", type=int, default=40, help="Graph depth (source to sink)")
+    parser.add_argument("--fan-out", type=int, default=3, help="Outgoing edges per node")
+    parser.add_argument("--back-edges", type=float, default=0.1, help="Share of edges that point backwards")
+    parser.add_argument("--max-chains", type=int, default=20)
+    parser.add_argument("--max-depth", type=int, default=200)
+    parser.add_argument("--time-budget-ms", type=float, default=None)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'edges':>8} {'median ms':>10} {'max ms':>8} {'chains':>7} {'len min-max':>12}")
+    for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+        nodes, edges = synthetic_graph(size, args.layers, args.fan_out, args.back_edges, args.seed)
+        timings = []
+        chains: List[List[str]] = []
+        for _ in range(max(1, args.repeat)):
+            started = time.perf_counter()
+            chains = shortest_chains(
+                nodes,
+                edges,
+                max_chains=args.max_chains,
+                max_depth=args.max_depth,
+                time_budget_ms=args.time_budget_ms,
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+        lengths = [len(chain) for chain in chains] or [0]
+        print(
+            f"{size:>8} {len(edges):>8} {statistics.median(timings):>10.1f} {max(timings):>8.1f} "
+            f"{len(chains):>7} {min(lengths):>5}-{max(lengths):<6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+# Modules that must stay out of a cold import of each target: they are only needed once
+# a review agent actually parses code.
+DEFAULT_FORBIDDEN: Dict[str, Tuple[str, ...]] = {
+    "secrux_ai": ("tree_sitter_languages", "secrux_ai.agents.vuln_review"),
+    "secrux_ai.orchestrator": ("tree_sitter_languages", "secrux_ai.agents.vuln_review"),
+    "service.main": ("tree_sitter_languages", "secrux_ai.agents.vuln_review"),
+}
+
+_CHILD = "import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+
+
+def cold_import(module: str, cwd: Path) -> Tuple[float, List[Tuple[int, str]]]:
+    """Import `module` in a fresh interpreter; returns (wall seconds, [(self us, module)])."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(cwd), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(module=module)],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    imports: List[Tuple[int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        imports.append((int(fields[0]), fields[2].strip()))
+    return float(proc.stdout.strip().splitlines()[-1]), imports
+
+
+def parse_budgets(values: List[str] | None) -> Dict[str, float]:
+    budgets: Dict[str, float] = {}
+    for item in values or []:
+        if "=" not in item:
+            raise ValueError(f"Invalid budget '{item}', use module=ms")
+        module, ms = item.split("=", 1)
+        budgets[module.strip()] = float(ms)
+    return budgets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure cold import time of secrux_ai entry points and guard against heavy imports."
+    )
+    parser.add_argument("--modules", default=",".join(DEFAULT_FORBIDDEN), help="Comma-separated modules to import")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports (self time) to list per module")
+    parser.add_argument(
+        "--budget",
+        action="append",
+        help="Fail when the median import of a module exceeds a budget, module=ms (can repeat)",
+    )
+    args = parser.parse_args()
+
+    budgets = parse_budgets(args.budget)
+    cwd = Path(__file__).resolve().parents[2]
+    failures: List[str] = []
+    for module in (value.strip() for value in args.modules.split(",") if value.strip()):
+        timings = []
+        imported: Set[str] = set()
+        slowest: Dict[str, int] = {}
+        for _ in range(max(1, args.repeat)):
+            seconds, imports = cold_import(module, cwd)
+            timings.append(seconds * 1000)
+            for self_us, name in imports:
+                imported.add(name)
+                slowest[name] = max(slowest.get(name, 0), self_us)
+        median = statistics.median(timings)
+        print(f"{module}: median {median:.1f} ms, min {min(timings):.1f} ms, {len(imported)} modules")
+        for name, self_us in sorted(slowest.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+            print(f"  {self_us / 1000:>8.1f} ms  {name}")
+
+        for heavy in DEFAULT_FORBIDDEN.get(module, ()):
+            if heavy in imported:
+                failures.append(f"{module} imports {heavy}")
+        budget = budgets.get(module)
+        if budget is not None and median > budget:
+            failures.append(f"{module} took {median:.1f} ms (budget {budget:g} ms)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
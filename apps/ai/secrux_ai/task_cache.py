@@ -0,0 +1,106 @@
+"""Caches that outlive one stage event but stay scoped to one task.
+
+A task's findings are reviewed as separate events, often concurrently, and many of them
+point into the same files. `AgentOrchestrator` places the task's `TaskCache` in every
+`AgentContext.shared_cache` under `TASK_CACHE_KEY`, so agents can share expensive
+per-task work (reading and parsing a file) across findings. Concurrent requests for the
+same key are coalesced: the first caller computes, the others await its result.
+
+Configuration:
+- SECRUX_AI_TASK_CACHE_TASKS: tasks whose caches are kept (default 64)
+- SECRUX_AI_TASK_CACHE_TTL_SECONDS: drop a task's cache after this much idle time (default 900)
+- SECRUX_AI_TASK_CACHE_MAX_ENTRIES: entries kept per task (default 256)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+TASK_CACHE_KEY = "taskCache"
+
+MAX_TASKS = int(os.getenv("SECRUX_AI_TASK_CACHE_TASKS", "64"))
+TTL_SECONDS = float(os.getenv("SECRUX_AI_TASK_CACHE_TTL_SECONDS", "900"))
+MAX_ENTRIES = int(os.getenv("SECRUX_AI_TASK_CACHE_MAX_ENTRIES", "256"))
+
+
+class TaskCache:
+    """Per-task memo of computed values with single-flight computation."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max(1, max_entries)
+        # Futures are thread-safe and awaitable from any loop via `asyncio.wrap_future`.
+        self._entries: "OrderedDict[Hashable, concurrent.futures.Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def aget_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        with self._lock:
+            future = self._entries.get(key)
+            owner = future is None
+            if owner:
+                future = concurrent.futures.Future()
+                self._entries[key] = future
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+        if owner:
+            try:
+                future.set_result(await compute())
+            except BaseException as exc:
+                # Failures are not cached; the next caller retries.
+                with self._lock:
+                    if self._entries.get(key) is future:
+                        del self._entries[key]
+                future.set_exception(exc)
+                raise
+        return await asyncio.wrap_future(future)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _TaskCacheRegistry:
+    def __init__(self, max_tasks: int, ttl_seconds: float) -> None:
+        self.max_tasks = max(1, max_tasks)
+        self.ttl_seconds = ttl_seconds
+        self._tasks: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scope: str) -> TaskCache:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tasks.get(scope)
+            if entry is not None and (not self.ttl_seconds or now - entry[0] <= self.ttl_seconds):
+                cache = entry[1]
+            else:
+                cache = TaskCache()
+            self._tasks[scope] = (now, cache)
+            self._tasks.move_to_end(scope)
+            while len(self._tasks) > self.max_tasks:
+                self._tasks.popitem(last=False)
+            return cache
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tasks.clear()
+
+
+_REGISTRY = _TaskCacheRegistry(MAX_TASKS, TTL_SECONDS)
+
+
+def task_cache(tenant_id: str, task_id: str) -> TaskCache:
+    """Return the cache shared by all events of one tenant's task in this process."""
+    return _REGISTRY.get(f"{tenant_id}:{task_id}")
+
+
+def task_cache_from(shared_cache: Optional[Dict[str, Any]]) -> Optional[TaskCache]:
+    cache = (shared_cache or {}).get(TASK_CACHE_KEY)
+    return cache if isinstance(cache, TaskCache) else None
@@ -0,0 +1,188 @@
+"""Span timing for review jobs.
+
+`span(name, **attrs)` times a block and feeds `secrux_ai.metrics`. Inside a `start_trace`
+block it also records the span (with its parent, start offset and attributes) on the
+job's `Trace`, which the job runner stores with the result. The active trace and the
+current span live in context variables, so spans opened in tasks (`asyncio.gather`)
+and worker threads (`asyncio.to_thread`) nest under the span that started them.
+
+`profile_job` wraps selected jobs in a sampling profiler (`pyinstrument`, installed with
+`pip install ".[profile]"`); it does nothing when the package is missing.
+
+Configuration:
+- SECRUX_AI_TRACE_MAX_SPANS: spans kept per job trace (default 500, further spans are only counted)
+- SECRUX_AI_PROFILE_JOB_IDS: comma-separated job ids to profile
+- SECRUX_AI_PROFILE_SAMPLE_RATE: share of all jobs to profile (default 0)
+- SECRUX_AI_PROFILE_DIR: where profiles are written (default /app/storage/profiles)
+- SECRUX_AI_PROFILE_INTERVAL_MS: sampling interval (default 1)
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib.util
+import inspect
+import itertools
+import os
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from . import metrics
+
+MAX_SPANS = int(os.getenv("SECRUX_AI_TRACE_MAX_SPANS", "500"))
+PROFILE_JOB_IDS = {value.strip() for value in (os.getenv("SECRUX_AI_PROFILE_JOB_IDS") or "").split(",") if value.strip()}
+PROFILE_SAMPLE_RATE = float(os.getenv("SECRUX_AI_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = (os.getenv("SECRUX_AI_PROFILE_DIR") or "/app/storage/profiles").strip()
+PROFILE_INTERVAL_MS = float(os.getenv("SECRUX_AI_PROFILE_INTERVAL_MS", "1"))
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_IDS = itertools.count(1)
+
+
+class Trace:
+    """Spans recorded for one job, in completion order."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.profile: Optional[str] = None
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(entry)
+        else:
+            self.dropped += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "name": self.name,
+            "totalMs": round((time.perf_counter() - self.started) * 1000, 1),
+            "spans": sorted(self.spans, key=lambda entry: entry["startMs"]),
+        }
+        if self.dropped:
+            out["droppedSpans"] = self.dropped
+        if self.profile:
+            out["profile"] = self.profile
+        return out
+
+
+_TRACE: ContextVar[Optional[Trace]] = ContextVar("secrux_trace", default=None)
+_PARENT: ContextVar[Optional[int]] = ContextVar("secrux_span_parent", default=None)
+
+
+@contextmanager
+def start_trace(name: str, **attrs: Any) -> Iterator[Trace]:
+    """Collect spans of the enclosed work into a new trace, under a root span `name`."""
+    trace = Trace(name)
+    token = _TRACE.set(trace)
+    parent = _PARENT.set(None)
+    try:
+        with span(name, **attrs):
+            yield trace
+    finally:
+        _PARENT.reset(parent)
+        _TRACE.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _TRACE.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time the enclosed block; yields the attribute dict so callers can add to it."""
+    span_id = next(_IDS)
+    parent = _PARENT.get()
+    token = _PARENT.set(span_id)
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield attrs
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        _PARENT.reset(token)
+        elapsed = time.perf_counter() - started
+        metrics.observe(name, outcome, elapsed)
+        trace = _TRACE.get()
+        if trace is not None:
+            entry: Dict[str, Any] = {
+                "id": span_id,
+                "parent": parent,
+                "name": name,
+                "startMs": round((started - trace.started) * 1000, 1),
+                "durationMs": round(elapsed * 1000, 1),
+            }
+            if attrs:
+                entry["attrs"] = attrs
+            if outcome != "ok":
+                entry["outcome"] = outcome
+            trace.record(entry)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of `span` for plain and async functions."""
+
+    def decorate(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def should_profile(job_id: str, requested: bool = False) -> bool:
+    if importlib.util.find_spec("pyinstrument") is None:
+        return False
+    if requested or job_id in PROFILE_JOB_IDS:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+@asynccontextmanager
+async def profile_job(job_id: str, requested: bool = False) -> AsyncIterator[None]:
+    """Sample the enclosed job with pyinstrument when it is selected; writes `<dir>/job-<id>.html`.
+
+    Only the current task and the tasks it awaits are sampled, so concurrent jobs on the
+    same loop do not show up in each other's profiles.
+    """
+    if not should_profile(job_id, requested):
+        yield
+        return
+    from pyinstrument import Profiler
+
+    profiler = Profiler(interval=max(0.0001, PROFILE_INTERVAL_MS / 1000), async_mode="enabled")
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        path = Path(PROFILE_DIR) / f"job-{job_id}.html"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(profiler.output_html(), encoding="utf-8")
+            trace = _TRACE.get()
+            if trace is not None:
+                trace.profile = str(path)
+        except Exception:
+            pass
@@ -0,0 +1,282 @@
+"""Translation of bilingual review opinions (zh/en).
+
+Review agents ask the model for both languages, but models often return only one (or
+the same English text twice), which used to cost a second chat completion per finding.
+Translations are cached by content hash in the shared LLM response cache, so the same
+opinion text is only translated once.
+
+In `deferred` mode the job runner opens a `DeferredTranslations` collector around a
+job or batch. Agents register missing translations there instead of waiting for them
+and attach the findings built from that LLM output (`attach_finding`); the review
+results are stored first, and the collector then translates everything that is pending
+in as few chat completions as possible (up to SECRUX_AI_TRANSLATION_BATCH_SIZE opinions
+per call) and writes the translation into each attached finding's `details["llm"]` and
+English summary before the results are updated.
+
+Configuration:
+- SECRUX_AI_TRANSLATION_MODE: inline (translate before returning, default) | deferred | off
+- SECRUX_AI_TRANSLATION_BATCH_SIZE: opinions per batched translation call (default 16)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .debug.prompt_dump import dump_llm_request, dump_llm_response
+from .llm import apost_json
+from .llm_cache import get_response_cache
+from .models import AgentFinding
+from .tracing import span
+
+MODE = (os.getenv("SECRUX_AI_TRANSLATION_MODE") or "inline").strip().lower()
+BATCH_SIZE = int(os.getenv("SECRUX_AI_TRANSLATION_BATCH_SIZE", "16"))
+
+OPINION_KEYS = ("summary", "fixHint", "rationale")
+
+_BATCH_SYSTEM = (
+    "You are a translator for security review notes. "
+    "The input is JSON with key items; each item has id, from, to and text "
+    "(an object with summary, fixHint, optional rationale). "
+    "Return ONLY valid JSON of the form {\"items\": [{\"id\": ..., \"summary\": ..., \"fixHint\": ..., \"rationale\": ...}]} "
+    "with one entry per input item, translated from `from` to `to`. "
+    "Keep code identifiers, URLs, and enum values unchanged."
+)
+
+
+def opinion_text(value: Any) -> Dict[str, str]:
+    """The non-empty translatable fields of one language's opinion."""
+    if not isinstance(value, dict):
+        return {}
+    out: Dict[str, str] = {}
+    for key in OPINION_KEYS:
+        v = value.get(key)
+        if isinstance(v, str) and v.strip():
+            out[key] = v.strip()
+    return out
+
+
+def translation_key(model: str, source_lang: str, target_lang: str, text: Dict[str, str]) -> str:
+    material = json.dumps(["opinion-translation", model, source_lang, target_lang, text], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def cached_translation(model: str, source_lang: str, target_lang: str, text: Dict[str, str]) -> Optional[Dict[str, str]]:
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    hit = cache.get(translation_key(model, source_lang, target_lang, text))
+    return opinion_text(hit) or None
+
+
+def remember_translation(
+    model: str, source_lang: str, target_lang: str, text: Dict[str, str], translated: Dict[str, str]
+) -> None:
+    cache = get_response_cache()
+    if cache is not None and translated:
+        cache.put(translation_key(model, source_lang, target_lang, text), translated)
+
+
+def apply_translation(parsed: Dict[str, Any], target_lang: str, translated: Dict[str, str]) -> None:
+    """Store `translated` as the `target_lang` opinion of an LLM review output."""
+    opinion = parsed.get("opinionI18n")
+    if not isinstance(opinion, dict):
+        opinion = parsed["opinionI18n"] = {}
+    opinion[target_lang] = translated
+    if target_lang == "en":
+        parsed["summary"] = translated.get("summary") or parsed.get("summary")
+        parsed["fixHint"] = translated.get("fixHint") or parsed.get("fixHint")
+
+
+def apply_finding_translation(finding: AgentFinding, target_lang: str, translated: Dict[str, str]) -> None:
+    """Apply a translation to a finding built from an LLM output, like the inline path would."""
+    llm = finding.details.get("llm")
+    if isinstance(llm, dict):
+        apply_translation(llm, target_lang, translated)
+    if target_lang == "en" and translated.get("summary"):
+        finding.summary = translated["summary"]
+
+
+@dataclass
+class _Pending:
+    parsed: Dict[str, Any]
+    source_lang: str
+    target_lang: str
+    text: Dict[str, str]
+    url: str
+    api_key: str
+    model: str
+    job_id: Optional[str]
+    # Findings copied from `parsed`; they are what the job result is built from.
+    findings: List[AgentFinding] = field(default_factory=list)
+
+
+class DeferredTranslations:
+    """Translations registered during a job or batch, resolved later by `flush`."""
+
+    def __init__(self, batch_size: int = BATCH_SIZE) -> None:
+        self.batch_size = max(1, batch_size)
+        self._pending: List[_Pending] = []
+
+    def add(
+        self,
+        parsed: Dict[str, Any],
+        source_lang: str,
+        target_lang: str,
+        text: Dict[str, str],
+        url: str,
+        api_key: str,
+        model: str,
+        job_id: Optional[str] = None,
+    ) -> None:
+        self._pending.append(_Pending(parsed, source_lang, target_lang, text, url, api_key, model, job_id))
+
+    def attach(self, parsed: Dict[str, Any], finding: AgentFinding) -> None:
+        """Update `finding` too when the translation registered for `parsed` arrives."""
+        for item in self._pending:
+            if item.parsed is parsed:
+                item.findings.append(finding)
+
+    def job_ids(self) -> Set[str]:
+        return {item.job_id for item in self._pending if item.job_id}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Translate everything pending, one call per `batch_size` distinct texts; returns opinions updated."""
+        pending, self._pending = self._pending, []
+        groups: Dict[Tuple[str, str, str], List[_Pending]] = {}
+        for item in pending:
+            groups.setdefault((item.url, item.api_key, item.model), []).append(item)
+        updated = 0
+        for (url, api_key, model), items in groups.items():
+            # Identical texts (the same rule message on many findings) are translated once.
+            unique: Dict[str, Tuple[_Pending, List[_Pending]]] = {}
+            for item in items:
+                key = translation_key(model, item.source_lang, item.target_lang, item.text)
+                unique.setdefault(key, (item, []))[1].append(item)
+            keys = list(unique)
+            for start in range(0, len(keys), self.batch_size):
+                chunk = keys[start : start + self.batch_size]
+                requests = [unique[key][0] for key in chunk]
+                results = await atranslate_batch(
+                    url, api_key, model, [(req.source_lang, req.target_lang, req.text) for req in requests]
+                )
+                for key, req, translated in zip(chunk, requests, results):
+                    if not translated:
+                        continue
+                    remember_translation(model, req.source_lang, req.target_lang, req.text, translated)
+                    for item in unique[key][1]:
+                        apply_translation(item.parsed, item.target_lang, translated)
+                        for finding in item.findings:
+                            apply_finding_translation(finding, item.target_lang, translated)
+                        updated += 1
+        return updated
+
+
+_ACTIVE: ContextVar[Optional[DeferredTranslations]] = ContextVar("secrux_deferred_translations", default=None)
+
+
+@contextmanager
+def deferred_translations() -> Iterator[Optional[DeferredTranslations]]:
+    """Collect translations for the enclosed work when SECRUX_AI_TRANSLATION_MODE=deferred.
+
+    Yields None in the other modes. Tasks started inside the block inherit the collector.
+    """
+    if MODE != "deferred":
+        yield None
+        return
+    collector = DeferredTranslations()
+    token = _ACTIVE.set(collector)
+    try:
+        yield collector
+    finally:
+        _ACTIVE.reset(token)
+
+
+def active_deferred() -> Optional[DeferredTranslations]:
+    return _ACTIVE.get()
+
+
+def attach_finding(parsed: Dict[str, Any], finding: AgentFinding) -> AgentFinding:
+    """Link a finding to the translation deferred for its LLM output, if any; returns it."""
+    collector = _ACTIVE.get()
+    if collector is not None:
+        collector.attach(parsed, finding)
+    return finding
+
+
+async def atranslate_batch(
+    url: str, api_key: str, model: str, requests: List[Tuple[str, str, Dict[str, str]]]
+) -> List[Optional[Dict[str, str]]]:
+    """Translate several opinions in one chat completion; entries the model skipped are None."""
+    if not requests:
+        return []
+    user = json.dumps(
+        {"items": [{"id": str(idx), "from": src, "to": tgt, "text": text} for idx, (src, tgt, text) in enumerate(requests)]},
+        ensure_ascii=False,
+    )
+    body = {
+        "model": model,
+        "temperature": 0.1,
+        "messages": [{"role": "system", "content": _BATCH_SYSTEM}, {"role": "user", "content": user}],
+    }
+    # A batch spans findings, so the dump is not attributed to a single job.
+    dump_kwargs: Dict[str, Any] = {
+        "job_id": None,
+        "tenant_id": None,
+        "target_id": None,
+        "agent": "translation",
+        "mode": None,
+        "purpose": "translate_opinion_batch",
+        "url": url,
+        "model": model,
+    }
+    dump_llm_request(temperature=0.1, request_body=body, **dump_kwargs)
+    try:
+        with span("llm.chat_completion", purpose="translate_opinion_batch", model=model, opinions=len(requests)):
+            data = await apost_json(url, body, headers={"Authorization": f"Bearer {api_key}"})
+    except Exception as exc:
+        dump_llm_response(response_json=None, error=str(exc), **dump_kwargs)
+        return [None] * len(requests)
+    dump_llm_response(response_json=data if isinstance(data, dict) else {"raw": data}, error=None, **dump_kwargs)
+
+    content = None
+    if isinstance(data, dict):
+        choices = data.get("choices")
+        if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+            message = choices[0].get("message")
+            content = message.get("content") if isinstance(message, dict) else None
+    parsed = _parse_json_object(content) if isinstance(content, str) else None
+    items = parsed.get("items") if isinstance(parsed, dict) else None
+    results: List[Optional[Dict[str, str]]] = [None] * len(requests)
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            idx = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < len(results):
+            results[idx] = opinion_text(item) or None
+    return results
+
+
+def _parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        value = json.loads(text)
+    except Exception:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            return None
+        try:
+            value = json.loads(text[start : end + 1])
+        except Exception:
+            return None
+    return value if isinstance(value, dict) else None
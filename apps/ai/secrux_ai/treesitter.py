@@ -0,0 +1,339 @@
+"""Shared tree-sitter parsers, parse trees and queries.
+
+Creating a parser and reparsing identical code dominated precise reviews that hit the
+same files over and over. Languages and compiled queries are loaded once per process,
+parsers are pooled per thread (a parser must not be used by two threads at once), and
+parse trees are kept in an LRU keyed by language and the SHA-256 of the source.
+`tree_sitter_languages` (and its bundled grammars) is imported on the first parse.
+
+Configuration:
+- SECRUX_AI_TREE_CACHE_SIZE: parse trees kept in memory (default 256, 0 disables)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+LANG_MAP = {
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".jsx": "javascript",
+    ".py": "python",
+    ".java": "java",
+    ".go": "go",
+    ".rb": "ruby",
+    ".rs": "rust",
+    ".c": "c",
+    ".cpp": "cpp",
+    ".cc": "cpp",
+    ".cs": "c_sharp",
+    ".php": "php",
+}
+
+CALL_NODE_TYPES = ("call_expression", "function_call", "method_invocation")
+
+TREE_CACHE_SIZE = int(os.getenv("SECRUX_AI_TREE_CACHE_SIZE", "256"))
+
+
+def language_for_path(path: str, default: str = "python") -> str:
+    return LANG_MAP.get(os.path.splitext(path or "")[1].lower(), default)
+
+
+_LOCAL = threading.local()
+
+
+def _parser(lang: str) -> Any:
+    parsers: Optional[Dict[str, Any]] = getattr(_LOCAL, "parsers", None)
+    if parsers is None:
+        parsers = _LOCAL.parsers = {}
+    parser = parsers.get(lang)
+    if parser is None:
+        from tree_sitter_languages import get_parser
+
+        parser = parsers[lang] = get_parser(lang)
+    return parser
+
+
+class _TreeCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(0, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Any:
+        with self._lock:
+            tree = self._entries.get(key)
+            if tree is not None:
+                self._entries.move_to_end(key)
+            return tree
+
+    def put(self, key: Tuple[str, str], tree: Any) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = tree
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_TREES = _TreeCache(TREE_CACHE_SIZE)
+
+
+def parse(source: bytes, lang: str) -> Optional[Any]:
+    """Parse `source`, reusing the cached tree for identical content; None if the language is unavailable."""
+    key = (lang, hashlib.sha256(source).hexdigest())
+    tree = _TREES.get(key)
+    if tree is not None:
+        return tree
+    try:
+        parser = _parser(lang)
+    except Exception:
+        return None
+    tree = parser.parse(source)
+    _TREES.put(key, tree)
+    return tree
+
+
+@lru_cache(maxsize=None)
+def _query(lang: str, node_types: Tuple[str, ...]) -> Optional[Any]:
+    """Compile `(type) @capture` alternatives for the node types this grammar defines."""
+    from tree_sitter_languages import get_language
+
+    language = get_language(lang)
+    patterns = []
+    for node_type in node_types:
+        pattern = f"({node_type}) @node"
+        try:
+            # Unknown node types fail to compile; probing this way is safe across bindings.
+            language.query(pattern)
+        except Exception:
+            continue
+        patterns.append(pattern)
+    if not patterns:
+        return None
+    return language.query("\n".join(patterns))
+
+
+def find_nodes(source: bytes, lang: str, node_types: Tuple[str, ...]) -> List[Any]:
+    """Nodes of the given types in document order."""
+    tree = parse(source, lang)
+    if tree is None:
+        return []
+    try:
+        query = _query(lang, node_types)
+    except Exception:
+        return []
+    if query is None:
+        return []
+    return [node for node, _ in query.captures(tree.root_node)]
+
+
+def call_expressions(code: str, lang: str, limit: int = 50) -> List[str]:
+    """Source text of call expressions in `code`, outermost first."""
+    if not code:
+        return []
+    source = code.encode()
+    calls: List[str] = []
+    for node in find_nodes(source, lang, CALL_NODE_TYPES):
+        calls.append(source[node.start_byte : node.end_byte].decode("utf-8", errors="replace").strip())
+        if len(calls) >= limit:
+            break
+    return calls
+
+
+FUNCTION_NODE_TYPES = (
+    "function_definition",
+    "function_declaration",
+    "method_declaration",
+    "constructor_declaration",
+    "method_definition",
+    "function_item",
+    "method",
+    "arrow_function",
+    "function_expression",
+)
+# Broader than CALL_NODE_TYPES: caller lookup should see calls in every supported grammar.
+ANY_CALL_NODE_TYPES = CALL_NODE_TYPES + (
+    "call",
+    "invocation_expression",
+    "function_call_expression",
+    "member_call_expression",
+    "scoped_call_expression",
+)
+FIELD_ACCESS_NODE_TYPES = (
+    "field_access",
+    "member_expression",
+    "attribute",
+    "selector_expression",
+    "field_expression",
+    "member_access_expression",
+)
+FIELD_DECLARATION_NODE_TYPES = ("field_declaration", "public_field_definition", "property_declaration")
+
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+_DECLARATOR_LEAVES = ("identifier", "field_identifier", "qualified_identifier", "destructor_name", "operator_name")
+
+
+def nodes_in(node: Any, lang: str, node_types: Tuple[str, ...]) -> List[Any]:
+    """Nodes of the given types within `node` (inclusive), in document order."""
+    try:
+        query = _query(lang, node_types)
+    except Exception:
+        return []
+    if query is None:
+        return []
+    return [found for found, _ in query.captures(node)]
+
+
+def _text(source: bytes, node: Any) -> str:
+    return source[node.start_byte : node.end_byte].decode("utf-8", errors="replace")
+
+
+def _last_identifier(text: str) -> Optional[str]:
+    names = _IDENTIFIER.findall(text)
+    return names[-1] if names else None
+
+
+def function_name(node: Any, source: bytes) -> Optional[str]:
+    name = node.child_by_field_name("name")
+    if name is not None:
+        return _text(source, name)
+    declarator = node.child_by_field_name("declarator")
+    # C/C++: function_definition -> function_declarator -> identifier
+    while declarator is not None and declarator.type not in _DECLARATOR_LEAVES:
+        declarator = declarator.child_by_field_name("declarator")
+    if declarator is not None:
+        return _last_identifier(_text(source, declarator))
+    parent = node.parent
+    # JS/TS: const handler = (...) => {...}
+    if parent is not None and parent.type in ("variable_declarator", "pair", "assignment_expression"):
+        target = parent.child_by_field_name("name") or parent.child_by_field_name("key") or parent.child_by_field_name("left")
+        if target is not None:
+            return _last_identifier(_text(source, target))
+    return None
+
+
+def callee_name(node: Any, source: bytes) -> Optional[str]:
+    for field_name in ("function", "name", "method"):
+        callee = node.child_by_field_name(field_name)
+        if callee is not None:
+            return _last_identifier(_text(source, callee))
+    return _last_identifier(_text(source, node).split("(", 1)[0])
+
+
+def _member_name(node: Any, source: bytes) -> Optional[str]:
+    for field_name in ("field", "attribute", "property", "name"):
+        member = node.child_by_field_name(field_name)
+        if member is not None:
+            return _last_identifier(_text(source, member))
+    return _last_identifier(_text(source, node))
+
+
+def _innermost(functions: List[Any], row: int) -> Optional[Any]:
+    best = None
+    for node in functions:
+        if node.start_point[0] <= row <= node.end_point[0]:
+            if best is None or (node.end_byte - node.start_byte) < (best.end_byte - best.start_byte):
+                best = node
+    return best
+
+
+def extract_file_context(
+    source: bytes,
+    lang: str,
+    line: int,
+    depth: int = 1,
+    tree: Optional[Any] = None,
+    max_function_lines: int = 150,
+) -> Optional[Dict[str, Any]]:
+    """Enclosing function of `line` (1-based), its callers within the file and the fields it uses.
+
+    `depth` > 1 follows callers transitively (callers of callers, and so on).
+    """
+    tree = tree if tree is not None else parse(source, lang)
+    if tree is None:
+        return None
+    root = tree.root_node
+    functions = nodes_in(root, lang, FUNCTION_NODE_TYPES)
+    enclosing = _innermost(functions, line - 1)
+    if enclosing is None:
+        return {"language": lang, "enclosingFunction": None, "callers": [], "referencedFields": [], "calls": []}
+
+    name = function_name(enclosing, source)
+    code_lines = _text(source, enclosing).splitlines()
+    function_info = {
+        "name": name,
+        "startLine": enclosing.start_point[0] + 1,
+        "endLine": enclosing.end_point[0] + 1,
+        "code": "\n".join(code_lines[:max_function_lines]),
+        "truncated": len(code_lines) > max_function_lines,
+    }
+
+    callers: List[Dict[str, Any]] = []
+    if name:
+        source_lines = source.decode("utf-8", errors="replace").splitlines()
+        calls_by_name: Dict[str, List[Any]] = {}
+        for call in nodes_in(root, lang, ANY_CALL_NODE_TYPES):
+            called = callee_name(call, source)
+            if called:
+                calls_by_name.setdefault(called, []).append(call)
+        seen = {name}
+        frontier = [name]
+        for level in range(1, max(1, depth) + 1):
+            next_frontier: List[str] = []
+            for target in frontier:
+                for call in calls_by_name.get(target, []):
+                    row = call.start_point[0]
+                    caller = _innermost(functions, row)
+                    caller_name = function_name(caller, source) if caller is not None else None
+                    callers.append(
+                        {
+                            "depth": level,
+                            "calls": target,
+                            "line": row + 1,
+                            "function": caller_name,
+                            "code": source_lines[row].strip() if row < len(source_lines) else "",
+                        }
+                    )
+                    if caller_name and caller_name not in seen:
+                        seen.add(caller_name)
+                        next_frontier.append(caller_name)
+            frontier = next_frontier
+            if not frontier or len(callers) >= 20:
+                break
+        callers = callers[:20]
+
+    fields: Dict[str, Dict[str, Any]] = {}
+    for access in nodes_in(enclosing, lang, FIELD_ACCESS_NODE_TYPES):
+        parent = access.parent
+        if parent is not None and parent.type in ANY_CALL_NODE_TYPES and parent.child_by_field_name("function") == access:
+            continue  # `obj.method(...)` is a call, not a field read
+        member = _member_name(access, source)
+        if member and member not in fields and len(fields) < 30:
+            fields[member] = {"name": member, "expression": _text(source, access).strip(), "declaredAt": None}
+    if fields:
+        for declaration in nodes_in(root, lang, FIELD_DECLARATION_NODE_TYPES):
+            head = _text(source, declaration).split("=", 1)[0]
+            for token in set(_IDENTIFIER.findall(head)) & fields.keys():
+                if fields[token]["declaredAt"] is None:
+                    fields[token]["declaredAt"] = declaration.start_point[0] + 1
+
+    calls = [
+        _text(source, call).strip()
+        for call in nodes_in(enclosing, lang, ANY_CALL_NODE_TYPES)[:50]
+    ]
+    return {
+        "language": lang,
+        "enclosingFunction": function_info,
+        "callers": callers,
+        "referencedFields": list(fields.values()),
+        "calls": calls,
+    }
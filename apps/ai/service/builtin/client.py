@@ -0,0 +1,129 @@
+"""In-process MCP client for the builtin tools.
+
+Builtin MCPs used to be called over HTTP on the service's own port, paying JSON
+encoding, token auth, routing and a socket round-trip per tool call. `BuiltinMCPClient`
+calls the same router handlers directly. Payloads are validated with the routes' request
+models, results are serialized the way the routes serialize them, and `HTTPException`s
+and validation errors are raised as `BuiltinToolError` with the status the route would
+have answered with.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ValidationError
+
+from secrux_ai.tracing import span
+
+from ..database import get_session
+from . import file_reader, knowledge, sarif_rules
+
+
+class BuiltinToolError(Exception):
+    def __init__(self, status_code: int, detail: Any) -> None:
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _knowledge_search(request: knowledge.KnowledgeToolRequest) -> Any:
+    with get_session() as session:
+        return knowledge.knowledge_search(request, session=session)
+
+
+_Tool = Tuple[Type[BaseModel], Callable[[Any], Any]]
+
+# Adapter (the /builtin/<adapter> router) -> tool name -> (request model, handler).
+_ADAPTERS: Dict[str, Dict[str, _Tool]] = {
+    "file-reader": {
+        "file.read.full": (file_reader.FileReadRequest, file_reader.read_full),
+        "file.read.range": (file_reader.FileReadRequest, file_reader.read_range),
+        "file.read.batch": (file_reader.FileBatchReadRequest, file_reader.read_batch),
+    },
+    "sarif-rules": {
+        "sarif.rule": (sarif_rules.SarifRuleRequest, sarif_rules.lookup_rule),
+        "sarif.results.query": (sarif_rules.SarifResultsQueryRequest, sarif_rules.query_results),
+    },
+    "knowledge": {
+        "knowledge.search": (knowledge.KnowledgeToolRequest, _knowledge_search),
+    },
+}
+
+_TYPE_ADAPTERS = {
+    "builtin:file-reader-full": "file-reader",
+    "builtin:file-reader-range": "file-reader",
+    "builtin:file-reader-batch": "file-reader",
+    "builtin:sarif-rule": "sarif-rules",
+    "builtin:sarif-results": "sarif-rules",
+    "builtin:knowledge-search": "knowledge",
+}
+
+ENTRYPOINT = f"{__name__}:BuiltinMCPClient"
+
+
+def builtin_adapter(mcp_type: str) -> Optional[str]:
+    """The router serving an MCP type, or None if it has no in-process transport."""
+    return _TYPE_ADAPTERS.get(mcp_type)
+
+
+class BuiltinMCPClient:
+    """`BaseMCPClient` over the builtin router handlers of this process."""
+
+    def __init__(self, mcp_type: str, **_: Any) -> None:
+        adapter = builtin_adapter(mcp_type)
+        if adapter is None:
+            raise ValueError(f"No in-process transport for MCP type '{mcp_type}'")
+        self.mcp_type = mcp_type
+        self._tools = _ADAPTERS[adapter]
+
+    def _resolve(self, tool: str, payload: Dict[str, Any]) -> Tuple[Callable[[Any], Any], BaseModel]:
+        entry = self._tools.get(tool)
+        if entry is None:
+            raise BuiltinToolError(404, f"Unknown tool '{tool}' for {self.mcp_type}")
+        model, handler = entry
+        try:
+            return handler, model.model_validate(payload)
+        except ValidationError as exc:
+            raise BuiltinToolError(422, exc.errors(include_url=False)) from exc
+
+    @staticmethod
+    def _call(tool: str, handler: Callable[[Any], Any], request: BaseModel) -> Dict[str, Any]:
+        with span(f"builtin.{tool}"):
+            try:
+                result = handler(request)
+            except HTTPException as exc:
+                raise BuiltinToolError(exc.status_code, exc.detail) from exc
+        if isinstance(result, BaseModel):
+            return result.model_dump(mode="json", by_alias=True)
+        return jsonable_encoder(result)
+
+    def invoke_tool(self, tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        handler, request = self._resolve(tool, payload)
+        return self._call(tool, handler, request)
+
+    async def ainvoke_tool(self, tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        handler, request = self._resolve(tool, payload)
+        # Handlers read files or the database; keep that off the event loop.
+        return await asyncio.to_thread(self._call, tool, handler, request)
+
+    def fetch_context(self, resource: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        raise BuiltinToolError(404, f"Builtin MCPs serve no context resources ('{resource}')")
+
+    async def afetch_context(self, resource: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self.fetch_context(resource, params)
+
+    def health(self) -> bool:
+        return True
+
+    async def ahealth(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        return None
+
+    async def aclose(self) -> None:
+        return None
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import codecs
+import mmap
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-router = APIRouter(prefix="/builtin/file-reader", tags=["builtin-file-reader"])
+from .routing import ToolRoute
+
+router = APIRouter(prefix="/builtin/file-reader", tags=["builtin-file-reader"], route_class=ToolRoute)
 
 BASE_DIR = Path(os.getenv("FILE_READER_ROOT", os.getcwd())).resolve()
 MAX_LINES = int(os.getenv("FILE_READER_MAX_LINES", "400"))
@@ -15,6 +22,9 @@ MAX_LINE_LENGTH = int(os.getenv("FILE_READER_MAX_LINE_LENGTH", "2000"))
 ALLOWED_EXTENSIONS = tuple(
     ext.strip().lower() for ext in os.getenv("FILE_READER_ALLOWED_EXTS", "").split(",") if ext.strip()
 )
+MAX_BATCH_READS = int(os.getenv("FILE_READER_MAX_BATCH_READS", "64"))
+INDEX_CACHE_SIZE = int(os.getenv("FILE_READER_INDEX_CACHE_SIZE", "128"))
+_SCAN_CHUNK_BYTES = 16 * 1024 * 1024
 
 
 class LineRange(BaseModel):
@@ -46,6 +56,39 @@ class FileReadResponse(BaseModel):
     content: List[LineResponse]
 
 
+class FileSlice(BaseModel):
+    path: str
+    line_range: Optional[LineRange] = Field(default=None, alias="lineRange")
+
+    model_config = {"populate_by_name": True}
+
+
+class FileBatchReadRequest(BaseModel):
+    reads: List[FileSlice] = Field(min_length=1)
+    encoding: str = Field(default="utf-8")
+
+
+class FileBatchEntry(BaseModel):
+    path: str
+    totalLines: int
+    returnedLines: int
+    truncated: bool
+    ranges: List[LineRange]
+    content: List[LineResponse]
+
+
+class FileBatchError(BaseModel):
+    path: str
+    lineRange: Optional[LineRange] = None
+    status: int
+    detail: str
+
+
+class FileBatchReadResponse(BaseModel):
+    files: List[FileBatchEntry]
+    errors: List[FileBatchError]
+
+
 def _ensure_within_base(target: Path) -> Path:
     try:
         candidate = target.resolve()
@@ -62,35 +105,189 @@ def _ensure_within_base(target: Path) -> Path:
     return candidate
 
 
-def _read_lines(path: Path, start_line: int, end_line: Optional[int], encoding: str) -> tuple[List[LineResponse], bool, int]:
-    if end_line is not None and end_line < start_line:
-        raise HTTPException(status_code=400, detail="endLine must be greater than or equal to startLine")
+class _LineIndex:
+    """Byte offset of the start of every line, plus the file size as a sentinel."""
+
+    def __init__(self, mtime_ns: int, size: int, starts: np.ndarray) -> None:
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.starts = starts
+
+    @property
+    def total_lines(self) -> int:
+        return len(self.starts) - 1
+
+    def span(self, first: int, last: int) -> Tuple[int, int]:
+        """Byte span covering 1-based lines first..last inclusive."""
+        return int(self.starts[first - 1]), int(self.starts[last])
+
+
+def _scan_line_starts(path: Path, size: int) -> Optional[np.ndarray]:
+    """Map the file and collect line start offsets; None if it has bare CR line endings."""
+    if size == 0:
+        return np.zeros(1, dtype=np.int64)
+    parts = [np.zeros(1, dtype=np.int64)]
+    with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for offset in range(0, size, _SCAN_CHUNK_BYTES):
+            # One byte of lookahead so a CR at the chunk edge can see its LF.
+            stop = min(offset + _SCAN_CHUNK_BYTES, size)
+            view = np.frombuffer(mapped, dtype=np.uint8, count=min(stop + 1, size) - offset, offset=offset)
+            body = view[: stop - offset]
+            carriage = np.flatnonzero(body == 13)
+            if carriage.size:
+                following = carriage + 1
+                inside = following < view.size
+                bare = np.count_nonzero(view[following[inside]] != 10) + np.count_nonzero(~inside)
+                if bare:
+                    # Text mode treats a lone CR as a line break; let the stream reader handle it.
+                    del view, body
+                    return None
+            parts.append(np.flatnonzero(body == 10).astype(np.int64) + (offset + 1))
+            del view, body
+    starts = np.concatenate(parts)
+    if starts[-1] != size:
+        starts = np.append(starts, size)
+    return starts
+
+
+class _LineIndexCache:
+    """LRU of line indexes keyed by path and validated against (mtime, size)."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(0, max_entries)
+        self._entries: "OrderedDict[str, _LineIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> Optional[_LineIndex]:
+        stat = path.stat()
+        key = str(path)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None and index.mtime_ns == stat.st_mtime_ns and index.size == stat.st_size:
+                self._entries.move_to_end(key)
+                return index
+        starts = _scan_line_starts(path, stat.st_size)
+        if starts is None:
+            return None
+        index = _LineIndex(stat.st_mtime_ns, stat.st_size, starts)
+        if self.max_entries:
+            with self._lock:
+                self._entries[key] = index
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return index
 
+
+_INDEX_CACHE = _LineIndexCache(INDEX_CACHE_SIZE)
+
+
+def _byte_indexable(encoding: str) -> bool:
+    """True when every LF byte in the encoded file is a line break (ASCII-compatible codecs)."""
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return False
+    if name.startswith(("utf-16", "utf-32", "utf-7")):
+        return False
+    try:
+        return "\n".encode(encoding) == b"\n"
+    except (UnicodeError, LookupError):
+        return False
+
+
+def _format_line(number: int, raw_line: str) -> Tuple[LineResponse, bool]:
+    text = raw_line.rstrip("\r\n")
+    if len(text) > MAX_LINE_LENGTH:
+        return LineResponse(line=number, text=text[:MAX_LINE_LENGTH] + "…"), True
+    return LineResponse(line=number, text=text), False
+
+
+def _merge_spans(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort inclusive line spans and merge the ones that overlap or touch."""
+    merged: List[Tuple[int, int]] = []
+    for first, last in sorted(spans):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def _read_spans(path: Path, spans: List[Tuple[int, int]], encoding: str) -> Tuple[List[LineResponse], bool, int]:
+    """Read sorted, non-overlapping inclusive line spans with a single open of the file.
+
+    Returns the lines, whether any line was clipped to MAX_LINE_LENGTH, and the line count
+    (exact when the file is indexed, otherwise the last line the stream reached).
+    """
+    index = _INDEX_CACHE.get(path) if _byte_indexable(encoding) else None
+    if index is None:
+        return _stream_spans(path, spans, encoding)
+
+    total_lines = index.total_lines
+    lines: List[LineResponse] = []
+    clipped = False
+    with path.open("rb") as handle:
+        for first, last in spans:
+            last = min(last, total_lines)
+            if first > last:
+                continue
+            begin, stop = index.span(first, last)
+            handle.seek(begin)
+            chunk = handle.read(stop - begin)
+            text = codecs.decode(chunk, encoding, errors="replace") if first == 1 else _decode_tail(chunk, encoding)
+            for number, raw_line in enumerate(text.split("\n"), start=first):
+                if number > last:
+                    break
+                line, long_line = _format_line(number, raw_line)
+                clipped = clipped or long_line
+                lines.append(line)
+    return lines, clipped, total_lines
+
+
+def _decode_tail(chunk: bytes, encoding: str) -> str:
+    # Codecs that strip a BOM (utf-8-sig) must only do so at the start of the file.
+    if codecs.lookup(encoding).name == "utf-8-sig":
+        encoding = "utf-8"
+    return codecs.decode(chunk, encoding, errors="replace")
+
+
+def _stream_spans(path: Path, spans: List[Tuple[int, int]], encoding: str) -> Tuple[List[LineResponse], bool, int]:
     lines: List[LineResponse] = []
-    truncated = False
+    clipped = False
     total_lines = 0
+    current = 0
     try:
         with path.open("r", encoding=encoding, errors="replace") as handle:
             for idx, raw_line in enumerate(handle, start=1):
                 total_lines = idx
-                if idx < start_line:
-                    continue
-                if end_line is not None and idx > end_line:
+                while current < len(spans) and idx > spans[current][1]:
+                    current += 1
+                if current == len(spans):
                     break
-                if len(lines) >= MAX_LINES:
-                    truncated = True
-                    break
-                text = raw_line.rstrip("\r\n")
-                if len(text) > MAX_LINE_LENGTH:
-                    text = text[:MAX_LINE_LENGTH] + "…"
-                    truncated = True
-                lines.append(LineResponse(line=idx, text=text))
+                if idx < spans[current][0]:
+                    continue
+                line, long_line = _format_line(idx, raw_line)
+                clipped = clipped or long_line
+                lines.append(line)
     except UnicodeDecodeError as exc:
         raise HTTPException(status_code=400, detail=f"Unable to decode file using {encoding}") from exc
+    return lines, clipped, total_lines
+
+
+def _capped_span(start_line: int, end_line: Optional[int]) -> Tuple[int, int]:
+    if end_line is not None and end_line < start_line:
+        raise HTTPException(status_code=400, detail="endLine must be greater than or equal to startLine")
+    cap = start_line + MAX_LINES - 1
+    return start_line, min(end_line, cap) if end_line is not None else cap
 
+
+def _read_lines(path: Path, start_line: int, end_line: Optional[int], encoding: str) -> tuple[List[LineResponse], bool, int]:
+    span = _capped_span(start_line, end_line)
+    lines, clipped, total_lines = _read_spans(path, [span], encoding)
     if total_lines and start_line > total_lines:
         raise HTTPException(status_code=416, detail="Requested line range is outside of file length")
-
+    truncated = clipped or min(end_line or total_lines, total_lines) > span[1]
     return lines, truncated, total_lines
 
 
@@ -134,3 +331,67 @@ def read_range(request: FileReadRequest) -> FileReadResponse:
         raise HTTPException(status_code=400, detail="lineRange must be provided for range reads")
     safe_path = _safe_path(request.path)
     return _prepare_response(safe_path, request.line_range, request.encoding)
+
+
+@router.post("/tools/file.read.batch:invoke", response_model=FileBatchReadResponse)
+def read_batch(request: FileBatchReadRequest) -> FileBatchReadResponse:
+    """Read many (path, lineRange) slices in one call, opening each file once.
+
+    Overlapping or adjacent ranges of the same file are merged, so each line is returned
+    at most once. Per-slice failures are reported in `errors` instead of failing the batch.
+    """
+    if len(request.reads) > MAX_BATCH_READS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_READS} reads per batch")
+
+    errors: List[FileBatchError] = []
+    # Resolved path -> [(requested slice, capped span)], in first-seen order.
+    grouped: Dict[Path, List[Tuple[FileSlice, Tuple[int, int]]]] = {}
+    for item in request.reads:
+        line_range = item.line_range or LineRange()
+        try:
+            safe_path = _safe_path(item.path)
+            span = _capped_span(line_range.start_line, line_range.end_line)
+        except HTTPException as exc:
+            errors.append(FileBatchError(path=item.path, lineRange=item.line_range, status=exc.status_code, detail=exc.detail))
+            continue
+        grouped.setdefault(safe_path, []).append((item, span))
+
+    files: List[FileBatchEntry] = []
+    for safe_path, slices in grouped.items():
+        merged = _merge_spans([span for _, span in slices])
+        try:
+            content, truncated, total_lines = _read_spans(safe_path, merged, request.encoding)
+        except HTTPException as exc:
+            errors.extend(
+                FileBatchError(path=item.path, lineRange=item.line_range, status=exc.status_code, detail=exc.detail)
+                for item, _ in slices
+            )
+            continue
+        for item, (first, last) in slices:
+            if total_lines and first > total_lines:
+                errors.append(
+                    FileBatchError(
+                        path=item.path,
+                        lineRange=item.line_range,
+                        status=416,
+                        detail="Requested line range is outside of file length",
+                    )
+                )
+            end_line = item.line_range.end_line if item.line_range else None
+            truncated = truncated or min(end_line or total_lines, total_lines) > last
+        ranges = [
+            LineRange(start_line=first, end_line=min(last, total_lines))
+            for first, last in merged
+            if first <= min(last, total_lines)
+        ]
+        files.append(
+            FileBatchEntry(
+                path=str(safe_path.relative_to(BASE_DIR)),
+                totalLines=total_lines,
+                returnedLines=len(content),
+                truncated=truncated,
+                ranges=ranges,
+                content=content,
+            )
+        )
+    return FileBatchReadResponse(files=files, errors=errors)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Iterator, List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -10,8 +10,15 @@ from sqlmodel import Session
 
 from ..database import get_session
 from ..knowledge import search_knowledge_entries
+from .routing import ToolRoute
 
-router = APIRouter(prefix="/builtin/knowledge", tags=["builtin-knowledge"])
+router = APIRouter(prefix="/builtin/knowledge", tags=["builtin-knowledge"], route_class=ToolRoute)
+
+
+def _get_session() -> Iterator[Session]:
+    # `get_session` is a context manager, not a generator dependency.
+    with get_session() as session:
+        yield session
 
 
 class KnowledgeToolRequest(BaseModel):
@@ -19,12 +26,15 @@ class KnowledgeToolRequest(BaseModel):
     query: str
     limit: int = 5
     tags: List[str] = Field(default_factory=list)
+    mode: str = "lexical"
+    embedding: Optional[List[float]] = None
+    alpha: float = 0.5
 
 
 @router.post("/tools/knowledge.search:invoke")
 def knowledge_search(
     payload: KnowledgeToolRequest,
-    session: Session = Depends(get_session),
+    session: Session = Depends(_get_session),
 ) -> dict:
     hits = search_knowledge_entries(
         tenant_id=payload.tenantId,
@@ -32,6 +42,9 @@ def knowledge_search(
         limit=max(1, min(payload.limit, 20)),
         tags=payload.tags,
         session=session,
+        mode=payload.mode,
+        embedding=payload.embedding,
+        alpha=payload.alpha,
     )
     if not hits:
         raise HTTPException(status_code=404, detail="No matching knowledge entries")
@@ -0,0 +1,27 @@
+"""Route class that times builtin MCP tool invocations."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from secrux_ai.tracing import span
+
+
+class ToolRoute(APIRoute):
+    """Records a `builtin.<tool>` span around every `/tools/<tool>:invoke` request."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        marker = "/tools/"
+        if marker not in self.path:
+            return handler
+        name = "builtin." + self.path.rsplit(marker, 1)[1].split(":", 1)[0]
+
+        async def traced_handler(request: Request) -> Response:
+            with span(name):
+                return await handler(request)
+
+        return traced_handler
@@ -0,0 +1,486 @@
+"""Incremental SARIF parsing and on-disk rule/result indexes.
+
+Reports can be tens of megabytes, almost all of it `runs[].results`, while rule lookups
+only need `runs[].tool.driver.rules`. `JsonStream` walks the document with a bounded
+read buffer: containers along the wanted path are entered token by token, and
+everything else is decoded one small element at a time and dropped, so peak memory is
+roughly one chunk plus the largest single result member rather than the whole report.
+
+Parsed indexes (rules by id; results by rule id and by file, with an interval tree of
+result regions per file) are cached in memory keyed by (path, mtime, size) and
+persisted as compact sidecars (`.<report>.rules-index.json`,
+`.<report>.results-index.json`) beside the report, so a restarted service does not
+reparse unchanged reports.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+_NON_WS = re.compile(r"[^ \t\n\r]")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_CHUNK_CHARS = 64 * 1024
+_SIDECAR_VERSION = 1
+# Fields of a reportingDescriptor that the rule lookup returns; the sidecar keeps only these.
+_RULE_FIELDS = ("name", "shortDescription", "fullDescription", "defaultConfiguration", "helpUri", "properties")
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+class JsonStream:
+    """Pull parser over a text handle for callers that know which paths they want."""
+
+    def __init__(self, handle: TextIO, chunk_size: int = _CHUNK_CHARS) -> None:
+        self._handle = handle
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self, at_least: int = 0) -> bool:
+        if self._eof:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        data = self._handle.read(max(self._chunk_size, at_least))
+        if not data:
+            self._eof = True
+            return False
+        self._buf += data
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next significant character."""
+        while True:
+            match = _NON_WS.search(self._buf, self._pos)
+            if match is not None:
+                self._pos = match.start()
+                return self._buf[self._pos]
+            self._pos = len(self._buf)
+            if not self._read_more():
+                raise JsonStreamError("Unexpected end of JSON input")
+
+    def _expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise JsonStreamError(f"Expecting {char!r} at offset {self._pos}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as exc:
+                # Most likely the value continues past the buffer; grow geometrically.
+                if self._read_more(len(self._buf) - self._pos):
+                    continue
+                raise JsonStreamError(str(exc)) from exc
+            # A number cut at the buffer edge decodes as a shorter number ("2." -> 2).
+            if (
+                isinstance(value, (int, float))
+                and _NUMBER_TAIL.fullmatch(self._buf, end)
+                and self._read_more()
+            ):
+                continue
+            self._pos = end
+            return value
+
+    def object_keys(self) -> Iterator[str]:
+        """Yield the keys of the next object; the caller must consume each member value."""
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise JsonStreamError(f"Expecting property name at offset {self._pos}")
+            key = self.value()
+            self._expect(":")
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise JsonStreamError(f"Expecting ',' or '}}' at offset {self._pos - 1}")
+
+    def array_items(self) -> Iterator[int]:
+        """Yield the index of each element of the next array; the caller must consume it."""
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise JsonStreamError(f"Expecting ',' or ']' at offset {self._pos - 1}")
+
+    def skip(self, depth: int = 2) -> None:
+        """Discard the next value, walking the top `depth` container levels incrementally."""
+        char = self.peek()
+        if depth > 0 and char == "{":
+            for _ in self.object_keys():
+                self.skip(depth - 1)
+        elif depth > 0 and char == "[":
+            for _ in self.array_items():
+                self.skip(depth - 1)
+        else:
+            self.value()
+
+
+def _compact_rule(rule: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: rule[field] for field in _RULE_FIELDS if rule.get(field) is not None}
+
+
+def _scan_driver_rules(stream: JsonStream, index: Dict[str, Dict], max_rules: int) -> None:
+    taken = 0
+    for _ in stream.array_items():
+        if taken >= max_rules or stream.peek() != "{":
+            stream.skip()
+            continue
+        rule = stream.value()
+        taken += 1
+        rule_id = rule.get("id")
+        if isinstance(rule_id, str) and rule_id and rule_id not in index:
+            index[rule_id] = _compact_rule(rule)
+
+
+def _descend(stream: JsonStream, path: tuple, on_target) -> None:
+    """Walk nested objects along `path` keys, calling `on_target` at its end."""
+    if not path:
+        on_target()
+        return
+    if stream.peek() != "{":
+        stream.skip()
+        return
+    for key in stream.object_keys():
+        if key == path[0]:
+            _descend(stream, path[1:], on_target)
+        else:
+            stream.skip()
+
+
+def scan_sarif_rules(handle: TextIO, max_rules: int) -> Dict[str, Dict]:
+    """Collect `runs[].tool.driver.rules` (first `max_rules` per run) keyed by rule id."""
+    stream = JsonStream(handle)
+    index: Dict[str, Dict] = {}
+
+    def scan_runs() -> None:
+        if stream.peek() != "[":
+            stream.skip()
+            return
+        for _ in stream.array_items():
+            _descend(stream, ("tool", "driver", "rules"), rules)
+
+    def rules() -> None:
+        if stream.peek() != "[":
+            stream.skip()
+            return
+        _scan_driver_rules(stream, index, max_rules)
+
+    _descend(stream, ("runs",), scan_runs)
+    return index
+
+
+def _normalize_uri(uri: str) -> str:
+    if uri.startswith("file://"):
+        uri = uri[len("file://") :]
+    while uri.startswith("./"):
+        uri = uri[2:]
+    return uri
+
+
+def _compact_locations(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    locations: List[Dict[str, Any]] = []
+    raw_locations = result.get("locations")
+    for location in raw_locations if isinstance(raw_locations, list) else []:
+        physical = location.get("physicalLocation") if isinstance(location, dict) else None
+        if not isinstance(physical, dict):
+            continue
+        artifact = physical.get("artifactLocation")
+        uri = artifact.get("uri") if isinstance(artifact, dict) else None
+        if not isinstance(uri, str) or not uri:
+            continue
+        region = physical.get("region") or {}
+        if not isinstance(region, dict):
+            continue
+        start = region.get("startLine")
+        entry: Dict[str, Any] = {"uri": _normalize_uri(uri)}
+        if isinstance(start, int):
+            end = region.get("endLine")
+            entry["startLine"] = start
+            entry["endLine"] = end if isinstance(end, int) and end >= start else start
+        locations.append(entry)
+    return locations
+
+
+def _compact_result(result: Dict[str, Any], run_index: int, result_index: int) -> Dict[str, Any]:
+    rule_id = result.get("ruleId")
+    if not isinstance(rule_id, str):
+        rule = result.get("rule")
+        rule_id = rule.get("id") if isinstance(rule, dict) else None
+    message = result.get("message")
+    compact: Dict[str, Any] = {
+        "ruleId": rule_id,
+        "level": result.get("level"),
+        "message": message.get("text") if isinstance(message, dict) else None,
+        "locations": _compact_locations(result),
+        "runIndex": run_index,
+        "resultIndex": result_index,
+    }
+    if rule_id is None and isinstance(result.get("ruleIndex"), int):
+        compact["ruleIndex"] = result["ruleIndex"]
+    return compact
+
+
+def scan_sarif_results(handle: TextIO) -> List[Dict[str, Any]]:
+    """Collect a compact record of every `runs[].results[]` entry, one result in memory at a time."""
+    stream = JsonStream(handle)
+    results: List[Dict[str, Any]] = []
+
+    def scan_runs() -> None:
+        if stream.peek() != "[":
+            stream.skip()
+            return
+        for run_index in stream.array_items():
+            scan_run(run_index)
+
+    def scan_run(run_index: int) -> None:
+        first = len(results)
+        rule_ids: List[Optional[str]] = []
+
+        def collect_results() -> None:
+            if stream.peek() != "[":
+                stream.skip()
+                return
+            for result_index in stream.array_items():
+                if stream.peek() != "{":
+                    stream.skip()
+                    continue
+                results.append(_compact_result(stream.value(), run_index, result_index))
+
+        def collect_rule_ids() -> None:
+            if stream.peek() != "[":
+                stream.skip()
+                return
+            for _ in stream.array_items():
+                rule = stream.value()
+                rule_ids.append(rule.get("id") if isinstance(rule, dict) else None)
+
+        if stream.peek() != "{":
+            stream.skip()
+            return
+        for key in stream.object_keys():
+            if key == "results":
+                collect_results()
+            elif key == "tool":
+                _descend(stream, ("driver", "rules"), collect_rule_ids)
+            else:
+                stream.skip()
+        # Results may reference their rule by position only; the rules can come later in the run.
+        for compact in results[first:]:
+            rule_index = compact.pop("ruleIndex", None)
+            if rule_index is not None and 0 <= rule_index < len(rule_ids):
+                compact["ruleId"] = rule_ids[rule_index]
+
+    _descend(stream, ("runs",), scan_runs)
+    return results
+
+
+class IntervalTree:
+    """Static interval tree over inclusive (start, end, value) intervals.
+
+    Intervals are sorted by start and viewed as an implicit balanced BST (the midpoint of
+    every slice is its root); each node stores the largest end in its subtree, so overlap
+    queries prune whole subtrees and run in O(log n + k).
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, int]]) -> None:
+        self._items = sorted(intervals)
+        self._max_end = [0] * len(self._items)
+        self._build(0, len(self._items))
+
+    def _build(self, lo: int, hi: int) -> int:
+        if lo >= hi:
+            return -1
+        mid = (lo + hi) // 2
+        best = max(self._items[mid][1], self._build(lo, mid), self._build(mid + 1, hi))
+        self._max_end[mid] = best
+        return best
+
+    def overlapping(self, lo: int, hi: int) -> List[int]:
+        found: List[int] = []
+        stack = [(0, len(self._items))]
+        while stack:
+            a, b = stack.pop()
+            if a >= b:
+                continue
+            mid = (a + b) // 2
+            if self._max_end[mid] < lo:
+                continue
+            stack.append((a, mid))
+            start, end, value = self._items[mid]
+            if start <= hi:
+                if end >= lo:
+                    found.append(value)
+                stack.append((mid + 1, b))
+        return found
+
+
+class SarifResultIndex:
+    """Results of one report indexed by rule id and by file (interval tree of regions)."""
+
+    def __init__(self, results: List[Dict[str, Any]]) -> None:
+        self.results = results
+        self.by_rule: Dict[str, List[int]] = {}
+        self.by_file: Dict[str, List[int]] = {}
+        self.by_basename: Dict[str, List[str]] = {}
+        regions: Dict[str, List[Tuple[int, int, int]]] = {}
+        for position, result in enumerate(results):
+            if result.get("ruleId"):
+                self.by_rule.setdefault(result["ruleId"], []).append(position)
+            for location in result["locations"]:
+                uri = location["uri"]
+                members = self.by_file.setdefault(uri, [])
+                if not members or members[-1] != position:
+                    members.append(position)
+                if "startLine" in location:
+                    regions.setdefault(uri, []).append((location["startLine"], location["endLine"], position))
+        for uri in self.by_file:
+            self.by_basename.setdefault(uri.rsplit("/", 1)[-1], []).append(uri)
+        self.trees = {uri: IntervalTree(intervals) for uri, intervals in regions.items()}
+
+    def resolve_file(self, path: str) -> List[str]:
+        """Report URIs naming `path`, either exactly or as a suffix on a segment boundary.
+
+        Reports mix relative and absolute URIs, so `src/A.java` also matches
+        `/repo/src/A.java` and vice versa.
+        """
+        path = _normalize_uri(path.strip())
+        suffix = "/" + path.lstrip("/")
+        candidates = self.by_basename.get(path.rsplit("/", 1)[-1], [])
+        return [
+            uri
+            for uri in candidates
+            if uri == path or uri.endswith(suffix) or path.endswith("/" + uri.lstrip("/"))
+        ]
+
+    def query(
+        self,
+        rule_id: Optional[str] = None,
+        file: Optional[str] = None,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        if file is not None:
+            positions: Set[int] = set()
+            for uri in self.resolve_file(file):
+                if start_line is None:
+                    positions.update(self.by_file[uri])
+                elif uri in self.trees:
+                    positions.update(self.trees[uri].overlapping(start_line, end_line or start_line))
+            matched = sorted(positions)
+            if rule_id is not None:
+                matched = [position for position in matched if self.results[position]["ruleId"] == rule_id]
+        elif rule_id is not None:
+            matched = self.by_rule.get(rule_id, [])
+        else:
+            matched = range(len(self.results))
+        return [self.results[position] for position in matched]
+
+
+def _sidecar_path(report: Path, kind: str) -> Path:
+    return report.with_name(f".{report.name}.{kind}-index.json")
+
+
+def _load_sidecar(report: Path, stat: os.stat_result, kind: str) -> Optional[Any]:
+    try:
+        with _sidecar_path(report, kind).open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(payload, dict)
+        or payload.get("version") != _SIDECAR_VERSION
+        or payload.get("mtimeNs") != stat.st_mtime_ns
+        or payload.get("size") != stat.st_size
+        or kind not in payload
+    ):
+        return None
+    return payload[kind]
+
+
+def _store_sidecar(report: Path, stat: os.stat_result, kind: str, data: Any) -> None:
+    target = _sidecar_path(report, kind)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    payload = {"version": _SIDECAR_VERSION, "mtimeNs": stat.st_mtime_ns, "size": stat.st_size, kind: data}
+    try:
+        with tmp.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, target)
+    except OSError:
+        # Read-only report directories simply go without a persisted index.
+        tmp.unlink(missing_ok=True)
+
+
+class SarifIndexCache:
+    """LRU of per-report indexes validated against the report's (mtime, size).
+
+    `scan` extracts JSON-serialisable data from the report (persisted as the `kind`
+    sidecar when enabled) and `build` turns it into the in-memory index object.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        scan: Callable[[TextIO], Any],
+        build: Callable[[Any], Any] = lambda data: data,
+        max_entries: int = 16,
+        persist: bool = True,
+    ) -> None:
+        self.kind = kind
+        self.scan = scan
+        self.build = build
+        self.max_entries = max(1, max_entries)
+        self.persist = persist
+        self._entries: "OrderedDict[Path, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, report: Path) -> Any:
+        stat = report.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._entries.get(report)
+            if cached is not None and cached[0] == stamp:
+                self._entries.move_to_end(report)
+                return cached[1]
+        data = _load_sidecar(report, stat, self.kind) if self.persist else None
+        if data is None:
+            with report.open("r", encoding="utf-8-sig") as handle:
+                data = self.scan(handle)
+            if self.persist:
+                _store_sidecar(report, stat, self.kind, data)
+        index = self.build(data)
+        with self._lock:
+            self._entries[report] = (stamp, index)
+            self._entries.move_to_end(report)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-import json
 import os
-from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-router = APIRouter(prefix="/builtin/sarif-rules", tags=["builtin-sarif-rules"])
+from .routing import ToolRoute
+from .sarif_index import JsonStreamError, SarifIndexCache, SarifResultIndex, scan_sarif_results, scan_sarif_rules
+
+router = APIRouter(prefix="/builtin/sarif-rules", tags=["builtin-sarif-rules"], route_class=ToolRoute)
 
 SARIF_ROOT = Path(os.getenv("SARIF_RULE_ROOT", os.getcwd())).resolve()
 ALLOWED_EXTENSIONS = tuple(
@@ -17,6 +18,8 @@ ALLOWED_EXTENSIONS = tuple(
 )
 MAX_RULES = int(os.getenv("SARIF_RULE_MAX_RULES", "1000"))
 MAX_FILE_SIZE_MB = int(os.getenv("SARIF_RULE_MAX_FILE_MB", "25"))
+RULE_CACHE_SIZE = int(os.getenv("SARIF_RULE_CACHE_SIZE", "16"))
+PERSIST_RULE_INDEX = os.getenv("SARIF_RULE_PERSIST_INDEX", "true").strip().lower() in ("1", "true", "yes", "on")
 
 
 class SarifRuleRequest(BaseModel):
@@ -26,6 +29,39 @@ class SarifRuleRequest(BaseModel):
     model_config = {"populate_by_name": True}
 
 
+class SarifResultsQueryRequest(BaseModel):
+    path: str
+    rule_id: Optional[str] = Field(default=None, alias="ruleId")
+    file: Optional[str] = None
+    start_line: Optional[int] = Field(default=None, ge=1, alias="startLine")
+    end_line: Optional[int] = Field(default=None, ge=1, alias="endLine")
+    limit: int = Field(default=50, ge=1, le=500)
+
+    model_config = {"populate_by_name": True}
+
+
+class SarifResultLocation(BaseModel):
+    uri: str
+    startLine: Optional[int] = None
+    endLine: Optional[int] = None
+
+
+class SarifResultRecord(BaseModel):
+    ruleId: Optional[str] = None
+    level: Optional[str] = None
+    message: Optional[str] = None
+    locations: List[SarifResultLocation]
+    runIndex: int
+    resultIndex: int
+
+
+class SarifResultsQueryResponse(BaseModel):
+    total: int
+    returned: int
+    truncated: bool
+    results: List[SarifResultRecord]
+
+
 class SarifMessage(BaseModel):
     text: Optional[str] = None
     markdown: Optional[str] = None
@@ -57,28 +93,37 @@ def _ensure_file(path: Path) -> Path:
     return candidate
 
 
-def _load_sarif(file_path: Path) -> Dict:
-    with file_path.open("r", encoding="utf-8") as handle:
-        try:
-            return json.load(handle)
-        except json.JSONDecodeError as exc:
-            raise HTTPException(status_code=400, detail=f"Invalid SARIF JSON: {exc}") from exc
+_RULE_INDEX = SarifIndexCache(
+    "rules",
+    lambda handle: scan_sarif_rules(handle, MAX_RULES),
+    max_entries=RULE_CACHE_SIZE,
+    persist=PERSIST_RULE_INDEX,
+)
+_RESULT_INDEX = SarifIndexCache(
+    "results",
+    scan_sarif_results,
+    SarifResultIndex,
+    max_entries=RULE_CACHE_SIZE,
+    persist=PERSIST_RULE_INDEX,
+)
+
+
+def _cached_index(cache: SarifIndexCache, file_path: Path) -> Any:
+    try:
+        return cache.get(file_path)
+    except (JsonStreamError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid SARIF JSON: {exc}") from exc
 
 
-@lru_cache(maxsize=16)
 def _rules_cache(file_path: Path) -> Dict[str, Dict]:
-    sarif = _load_sarif(file_path)
-    index: Dict[str, Dict] = {}
-    for run in sarif.get("runs", []):
-        rules = run.get("tool", {}).get("driver", {}).get("rules") or []
-        if not isinstance(rules, list):
-            continue
-        for rule in rules[:MAX_RULES]:
-            rule_id = rule.get("id")
-            if not rule_id or rule_id in index:
-                continue
-            index[rule_id] = rule
-    return index
+    return _cached_index(_RULE_INDEX, file_path)
+
+
+def _sarif_path(path: str) -> Path:
+    relative = path.strip()
+    if not relative:
+        raise HTTPException(status_code=400, detail="path must not be empty")
+    return _ensure_file(SARIF_ROOT / relative)
 
 
 @router.get("/healthz")
@@ -88,10 +133,7 @@ def health() -> dict:
 
 @router.post("/tools/sarif.rule:invoke", response_model=SarifRuleResponse)
 def lookup_rule(request: SarifRuleRequest) -> SarifRuleResponse:
-    relative = request.path.strip()
-    if not relative:
-        raise HTTPException(status_code=400, detail="path must not be empty")
-    sarif_path = _ensure_file(SARIF_ROOT / relative)
+    sarif_path = _sarif_path(request.path)
     rule = _rules_cache(sarif_path).get(request.rule_id)
     if rule is None:
         raise HTTPException(status_code=404, detail="Rule not found in SARIF report")
@@ -110,3 +152,29 @@ def lookup_rule(request: SarifRuleRequest) -> SarifRuleResponse:
         helpUri=rule.get("helpUri"),
         properties=rule.get("properties"),
     )
+
+
+@router.post("/tools/sarif.results.query:invoke", response_model=SarifResultsQueryResponse)
+def query_results(request: SarifResultsQueryRequest) -> SarifResultsQueryResponse:
+    """Filter a report's results by rule id, file and overlapping line range."""
+    if request.start_line is None and request.end_line is not None:
+        raise HTTPException(status_code=400, detail="startLine must be provided with endLine")
+    if request.start_line is not None and request.file is None:
+        raise HTTPException(status_code=400, detail="file must be provided for line range queries")
+    if request.end_line is not None and request.end_line < request.start_line:
+        raise HTTPException(status_code=400, detail="endLine must be greater than or equal to startLine")
+    sarif_path = _sarif_path(request.path)
+    index: SarifResultIndex = _cached_index(_RESULT_INDEX, sarif_path)
+    matched = index.query(
+        rule_id=request.rule_id,
+        file=request.file,
+        start_line=request.start_line,
+        end_line=request.end_line,
+    )
+    selected = matched[: request.limit]
+    return SarifResultsQueryResponse(
+        total=len(matched),
+        returned=len(selected),
+        truncated=len(matched) > len(selected),
+        results=[SarifResultRecord(**result) for result in selected],
+    )
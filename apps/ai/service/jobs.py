@@ -0,0 +1,771 @@
+"""Execution of queued AI review jobs.
+
+Jobs are persisted in the `AiJob` table by the API and drained by the workers in
+`service.worker`; the API process never runs a review inline.
+
+A `REVIEW_BATCH` job owns a list of item jobs (status `BATCHED`, never claimed or
+requeued on their own). The batch resolves each distinct agent configuration once,
+shares one orchestrator (and its MCP clients) per configuration and runs the items as
+concurrent tasks, recording every item's status on its own `AiJob` row. An item only
+becomes `RUNNING`, under the batch's lease, once its task actually starts.
+
+Orchestrators are leased from the worker's `service.orchestrators` cache, so jobs with
+an unchanged tenant configuration reuse the agents, MCP clients and connection pools
+built for an earlier job.
+
+With SECRUX_AI_TRANSLATION_MODE=deferred, opinion translations missing from the LLM
+output are collected while a job or batch runs. Results are stored as soon as each
+review finishes (`translationPending: true`), and one batched translation pass then
+fills in the missing language and stores the results again.
+
+Every job runs under a `secrux_ai.tracing` trace; its spans (database access, agents,
+LLM and MCP calls, translation) are stored under `trace` in the job result, and the
+worker's span histograms are persisted for `/metrics` after each job. A job whose
+context sets `"profile": true` (or that SECRUX_AI_PROFILE_* selects) is also sampled
+with the profiler.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from cryptography.fernet import Fernet, InvalidToken
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, or_, update
+from sqlmodel import Session, select
+
+from secrux_ai import metrics
+from secrux_ai.aio import run_sync
+from secrux_ai.config import AgentConfig, CallbackConfig, ExecutionConfig, MCPProfileConfig, PlatformConfig
+from secrux_ai.models import AgentRecommendation, StageEvent, StageSignals, StageStatus, StageType
+from secrux_ai.orchestrator import AgentOrchestrator
+from secrux_ai.tracing import Trace, profile_job, span, start_trace
+from secrux_ai.translation import DeferredTranslations, deferred_translations
+
+from .builtin.client import ENTRYPOINT as BUILTIN_ENTRYPOINT
+from .builtin.client import builtin_adapter
+from .database import get_session
+from .models import AiAgent, AiJob, AiJobSecret, AiMcp, utcnow
+from .orchestrators import ORCHESTRATORS, Slot
+
+logger = logging.getLogger(__name__)
+
+BATCH_JOB_TYPE = "REVIEW_BATCH"
+BATCH_ITEM_STATUS = "BATCHED"
+FINAL_STATUSES = ("COMPLETED", "FAILED")
+BATCH_ITEM_JOB_TYPES = ("FINDING_REVIEW", "SCA_ISSUE_REVIEW")
+JOB_BATCH_CONCURRENCY = int(os.getenv("AI_JOB_BATCH_CONCURRENCY", "8"))
+AGENT_EXECUTION_MODE = os.getenv("AI_AGENT_EXECUTION_MODE", "concurrent")
+AGENT_TIMEOUT_SECONDS = float(os.getenv("AI_AGENT_TIMEOUT_SECONDS", "0")) or None
+JOB_HEARTBEAT_SECONDS = float(os.getenv("AI_JOB_HEARTBEAT_SECONDS", "60"))
+
+# Lease token of the worker run executing the current job; None outside the queue.
+_LEASE: ContextVar[Optional[str]] = ContextVar("secrux_job_lease", default=None)
+
+
+class JobSecretError(RuntimeError):
+    """A staged job secret exists but cannot be decrypted with AI_JOB_SECRET_KEY."""
+
+
+_CIPHER: Optional[Fernet] = None
+_CIPHER_LOCK = threading.Lock()
+
+
+def ensure_job_secret_key() -> None:
+    """Make sure AI_JOB_SECRET_KEY is set before worker processes are spawned.
+
+    Without a configured key a random one is generated for this process and the workers
+    it spawns. Secrets of jobs still queued when the service restarts then cannot be
+    decrypted any more (those jobs fail), and standalone workers cannot read them at all.
+    """
+    if not os.environ.get("AI_JOB_SECRET_KEY"):
+        logger.warning(
+            "AI_JOB_SECRET_KEY is not set; using a per-process key, so queued jobs do not survive"
+            " a restart and standalone workers cannot read job credentials"
+        )
+        os.environ["AI_JOB_SECRET_KEY"] = Fernet.generate_key().decode("ascii")
+
+
+def _cipher() -> Fernet:
+    global _CIPHER
+    with _CIPHER_LOCK:
+        if _CIPHER is None:
+            ensure_job_secret_key()
+            _CIPHER = Fernet(os.environ["AI_JOB_SECRET_KEY"].encode("ascii"))
+        return _CIPHER
+
+
+def store_job_secret(job_id: UUID, secret: Dict[str, str], session: Session) -> None:
+    """Stage a per-job secret (e.g. the LLM apiKey) until a worker has consumed it.
+
+    The secret is kept out of `AiJob.payload` so that it never shows up in job responses,
+    and it is deleted as soon as the job finishes. The row only holds a Fernet token
+    encrypted with AI_JOB_SECRET_KEY, a key that is never stored in the database.
+    """
+    token = _cipher().encrypt(json.dumps(dict(secret)).encode("utf-8"))
+    session.add(AiJobSecret(job_id=job_id, secret={"ciphertext": token.decode("ascii")}))
+
+
+def load_job_secret(job_id: UUID, session: Session) -> Optional[Dict[str, str]]:
+    record = session.get(AiJobSecret, job_id)
+    token = record.secret.get("ciphertext") if record is not None and isinstance(record.secret, dict) else None
+    if not isinstance(token, str):
+        return None
+    try:
+        secret = json.loads(_cipher().decrypt(token.encode("ascii")))
+    except InvalidToken:
+        raise JobSecretError(
+            "Job credentials cannot be decrypted; AI_JOB_SECRET_KEY differs from the key they were stored with"
+        ) from None
+    return secret if isinstance(secret, dict) else None
+
+
+def discard_job_secret(job_id: UUID, session: Session) -> None:
+    record = session.get(AiJobSecret, job_id)
+    if record is None:
+        return
+    session.delete(record)
+    session.commit()
+
+
+def sweep_job_secrets(session: Session, job_ids: Optional[List[UUID]] = None) -> int:
+    """Delete secrets whose job is final or gone (restricted to `job_ids` when given).
+
+    Does not commit, so callers can fold it into the transaction that finished the jobs.
+    """
+    finished = select(AiJob.job_id).where(AiJob.status.in_(FINAL_STATUSES))
+    statement = delete(AiJobSecret).where(
+        or_(AiJobSecret.job_id.in_(finished), AiJobSecret.job_id.notin_(select(AiJob.job_id)))
+    )
+    if job_ids is not None:
+        statement = statement.where(AiJobSecret.job_id.in_(job_ids))
+    return session.execute(statement).rowcount or 0
+
+
+def _resolve_stage_status(value: object) -> StageStatus:
+    if isinstance(value, str):
+        try:
+            return StageStatus(value)
+        except Exception:
+            return StageStatus.SUCCEEDED
+    return StageStatus.SUCCEEDED
+
+
+def _resolve_mode(context: dict) -> str:
+    mode = context.get("mode")
+    if isinstance(mode, str) and mode.strip():
+        return mode.strip().lower()
+    return "simple"
+
+
+def _build_event(job: AiJob, secret: dict[str, str] | None) -> StageEvent:
+    created_at = job.created_at
+    updated_at = job.updated_at or created_at
+    ctx = job.context or {}
+    status = _resolve_stage_status(ctx.get("status"))
+
+    if job.job_type == "FINDING_REVIEW":
+        finding_payload = {}
+        payload_finding = (job.payload or {}).get("finding")
+        if isinstance(payload_finding, dict):
+            finding_payload = payload_finding
+        ai_client = (job.payload or {}).get("aiClient")
+        if isinstance(ai_client, dict) and secret and secret.get("apiKey"):
+            ai_client = dict(ai_client)
+            ai_client["apiKey"] = secret["apiKey"]
+        task_id = finding_payload.get("taskId") or job.target_id
+        stage_id = finding_payload.get("findingId") or job.target_id
+        mode = _resolve_mode(job.context or {})
+        return StageEvent(
+            tenantId=str(job.tenant_id),
+            taskId=str(task_id),
+            stageId=str(stage_id),
+            stageType=StageType.RESULT_REVIEW,
+            status=status,
+            startedAt=created_at,
+            endedAt=updated_at,
+            extra={"jobId": str(job.job_id), "mode": mode, "finding": finding_payload, "aiClient": ai_client},
+        )
+
+    if job.job_type == "SCA_ISSUE_REVIEW":
+        issue_payload = {}
+        payload_issue = (job.payload or {}).get("scaIssue")
+        if isinstance(payload_issue, dict):
+            issue_payload = payload_issue
+        ai_client = (job.payload or {}).get("aiClient")
+        if isinstance(ai_client, dict) and secret and secret.get("apiKey"):
+            ai_client = dict(ai_client)
+            ai_client["apiKey"] = secret["apiKey"]
+        task_id = issue_payload.get("taskId") or job.target_id
+        stage_id = issue_payload.get("issueId") or job.target_id
+        mode = _resolve_mode(job.context or {})
+        return StageEvent(
+            tenantId=str(job.tenant_id),
+            taskId=str(task_id),
+            stageId=str(stage_id),
+            stageType=StageType.RESULT_REVIEW,
+            status=status,
+            startedAt=created_at,
+            endedAt=updated_at,
+            extra={"jobId": str(job.job_id), "mode": mode, "scaIssue": issue_payload, "aiClient": ai_client},
+        )
+
+    payload = dict(job.payload or {})
+    ai_client = payload.get("aiClient")
+    if isinstance(ai_client, dict) and secret and secret.get("apiKey"):
+        ai_client = dict(ai_client)
+        ai_client["apiKey"] = secret["apiKey"]
+        payload["aiClient"] = ai_client
+
+    context_text = payload.get("context")
+    log_excerpt = context_text.splitlines() if isinstance(context_text, str) else []
+    needs_ai_review = ctx.get("needsAiReview")
+    signals = StageSignals(needsAiReview=bool(needs_ai_review) if needs_ai_review is not None else False)
+    return StageEvent(
+        tenantId=str(job.tenant_id),
+        taskId=job.target_id,
+        stageId=job.target_id,
+        stageType=StageType.RESULT_REVIEW,
+        status=status,
+        startedAt=created_at,
+        endedAt=updated_at,
+        log_excerpt=log_excerpt,
+        signals=signals,
+        extra={"jobType": job.job_type, "payload": payload},
+    )
+
+
+def _mcp_profile_config(entity: AiMcp) -> Optional[MCPProfileConfig]:
+    """Translate a stored MCP into the profile the orchestrator builds its client from."""
+    params = dict(entity.params or {})
+    if entity.entrypoint:
+        return MCPProfileConfig(name=str(entity.profile_id), type=entity.type, entrypoint=entity.entrypoint, params=params)
+    if builtin_adapter(entity.type):
+        # Builtin tools run in this process; the stored loopback endpoint is only for external callers.
+        params["mcp_type"] = entity.type
+        return MCPProfileConfig(name=str(entity.profile_id), type=entity.type, entrypoint=BUILTIN_ENTRYPOINT, params=params)
+    if not entity.endpoint:
+        return None
+    params["base_url"] = entity.endpoint
+    return MCPProfileConfig(name=str(entity.profile_id), type="http", params=params)
+
+
+def _build_platform_config(job: AiJob, session: Session) -> PlatformConfig:
+    ctx = job.context or {}
+    mode = _resolve_mode(ctx)
+    requested_agent = ctx.get("agent")
+    agent_configs: list[AgentConfig] = []
+    mcp_profiles: list[MCPProfileConfig] = []
+
+    if isinstance(requested_agent, str) and requested_agent.strip():
+        agent_name = requested_agent.strip()
+        from .models import AiAgent
+
+        entity = session.exec(
+            select(AiAgent).where(AiAgent.tenant_id == job.tenant_id, AiAgent.name == agent_name)
+        ).first()
+        if entity is not None and entity.enabled:
+            params = dict(entity.params or {})
+            if "mode" not in params and mode:
+                params["mode"] = mode
+            mcp = session.get(AiMcp, entity.mcp_profile_id) if entity.mcp_profile_id else None
+            profile = _mcp_profile_config(mcp) if mcp is not None and mcp.enabled and mcp.tenant_id == job.tenant_id else None
+            if profile is not None:
+                mcp_profiles.append(profile)
+            agent_configs.append(
+                AgentConfig(
+                    name=entity.name,
+                    kind=entity.kind,
+                    entrypoint=entity.entrypoint,
+                    enabled=True,
+                    params=params,
+                    stageTypes=entity.stage_types,
+                    mcpProfile=str(entity.mcp_profile_id) if entity.mcp_profile_id else None,
+                )
+            )
+        else:
+            # Treat the request value as a builtin kind.
+            agent_configs.append(AgentConfig(name=agent_name, kind=agent_name, enabled=True, params={"mode": mode}))
+    else:
+        if job.job_type == "FINDING_REVIEW":
+            agent_configs.append(
+                AgentConfig(name="vuln-review", kind="vuln-review", enabled=True, params={"mode": mode})
+            )
+        elif job.job_type == "SCA_ISSUE_REVIEW":
+            agent_configs.append(
+                AgentConfig(name="sca-issue-review", kind="sca-issue-review", enabled=True, params={"mode": mode})
+            )
+        else:
+            agent_configs.append(AgentConfig(name="signal", kind="signal", enabled=True))
+            agent_configs.append(AgentConfig(name="log", kind="log", enabled=True))
+
+    return PlatformConfig(
+        agents=agent_configs,
+        mcpProfiles=mcp_profiles,
+        callbacks=CallbackConfig(mode="stdout"),
+        execution=ExecutionConfig(mode=AGENT_EXECUTION_MODE, agent_timeout_seconds=AGENT_TIMEOUT_SECONDS),
+    )
+
+
+def _summarize_result(findings: list[dict]) -> str:
+    if not findings:
+        return "AI review completed (no findings)"
+    top = findings[0]
+    if isinstance(top, dict):
+        return top.get("summary") or "AI review completed"
+    return "AI review completed"
+
+
+def _resolve_severity(findings: list[dict]) -> str:
+    order = {"CRITICAL": 5, "HIGH": 4, "MEDIUM": 3, "LOW": 2, "INFO": 1}
+    severity = "INFO"
+    best = 0
+    for finding in findings:
+        sev = finding.get("severity") if isinstance(finding, dict) else None
+        if isinstance(sev, str) and order.get(sev, 0) > best:
+            best = order[sev]
+            severity = sev
+    return severity
+
+
+def _extract_top(values: object) -> dict | None:
+    if not isinstance(values, list) or not values:
+        return None
+    top = values[0]
+    return top if isinstance(top, dict) else None
+
+
+def _extract_suggested_status(top: dict | None) -> str | None:
+    if not top:
+        return None
+    status = top.get("status")
+    return status if isinstance(status, str) else None
+
+
+def _extract_llm(top: dict | None) -> dict | None:
+    if not top:
+        return None
+    details = top.get("details")
+    if not isinstance(details, dict):
+        return None
+    llm = details.get("llm")
+    return llm if isinstance(llm, dict) else None
+
+
+def _extract_opinion_i18n(top: dict | None) -> dict | None:
+    if not top:
+        return None
+    details = top.get("details")
+    if not isinstance(details, dict):
+        return None
+    opinion = details.get("opinionI18n")
+    return opinion if isinstance(opinion, dict) else None
+
+
+def _extract_confidence(llm: dict | None) -> float | None:
+    if not llm:
+        return None
+    value = llm.get("confidence")
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value))
+    except Exception:
+        return None
+
+
+def _build_review_result(
+    recommendation: AgentRecommendation, translation_pending: bool = False, trace: Optional[Trace] = None
+) -> Dict[str, Any]:
+    recommendation_payload = recommendation.model_dump(mode="json", by_alias=True)
+    findings = recommendation_payload.get("findings", [])
+    top_finding = _extract_top(findings)
+    llm = _extract_llm(top_finding)
+    suggested_status = _extract_suggested_status(top_finding)
+    severity = _resolve_severity(findings) if isinstance(findings, list) else "INFO"
+    verdict = (llm.get("verdict") if llm else None) or "UNCERTAIN"
+    confidence = _extract_confidence(llm) or 0.6
+    opinion_i18n = (llm.get("opinionI18n") if llm else None) or _extract_opinion_i18n(top_finding)
+    fix_hint = llm.get("fixHint") if llm else None
+    if not fix_hint and isinstance(opinion_i18n, dict):
+        en_opinion = opinion_i18n.get("en")
+        if isinstance(en_opinion, dict):
+            fix_hint = en_opinion.get("fixHint")
+    result = {
+        "reviewType": "AI",
+        "verdict": verdict,
+        "severity": severity,
+        "suggestedStatus": suggested_status,
+        "confidence": confidence,
+        "summary": _summarize_result(findings) if isinstance(findings, list) else "AI review completed",
+        "fixHint": fix_hint,
+        "opinionI18n": opinion_i18n,
+        "translationPending": translation_pending,
+        "recommendation": recommendation_payload,
+    }
+    if trace is not None:
+        result["trace"] = trace.to_dict()
+    return result
+
+
+async def _db(name: str, func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking database helper in a worker thread under a span."""
+    with span(name):
+        return await asyncio.to_thread(func, *args)
+
+
+def _mark_job(
+    job_id: UUID,
+    status: str,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+) -> bool:
+    """Record a job's status; under a lease only while this run still owns the job.
+
+    A job reaching a final status also drops its staged secret in the same transaction.
+    """
+    values: Dict[str, Any] = {"status": status, "updated_at": utcnow()}
+    if result is not None:
+        values["result"] = jsonable_encoder(result)
+    if error is not None:
+        values["error"] = error
+    statement = update(AiJob).where(AiJob.job_id == job_id)
+    lease = _LEASE.get()
+    if lease is not None:
+        statement = statement.where(AiJob.lease_owner == lease)
+    with get_session() as session:
+        updated = session.execute(statement.values(**values))
+        if updated.rowcount and status in FINAL_STATUSES:
+            sweep_job_secrets(session, [job_id])
+        session.commit()
+    if not updated.rowcount:
+        logger.warning("Job %s is no longer owned by this run; %s not recorded", job_id, status)
+        return False
+    return True
+
+
+def _touch_lease(lease: str) -> int:
+    """Refresh `updated_at` of the running jobs owned by `lease` so they are not requeued."""
+    with get_session() as session:
+        touched = session.execute(
+            update(AiJob)
+            .where(AiJob.lease_owner == lease, AiJob.status == "RUNNING")
+            .values(updated_at=utcnow())
+        )
+        session.commit()
+        return touched.rowcount or 0
+
+
+@asynccontextmanager
+async def _heartbeat(lease: Optional[str]) -> AsyncIterator[None]:
+    """Keep the lease of the enclosed run alive every AI_JOB_HEARTBEAT_SECONDS."""
+    if lease is None:
+        yield
+        return
+
+    async def beat() -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(_touch_lease, lease)
+            except Exception:
+                logger.exception("Failed to refresh job lease %s", lease)
+
+    task = asyncio.create_task(beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+def _load_job_type(job_id: UUID) -> Optional[str]:
+    with get_session() as session:
+        job = session.get(AiJob, job_id)
+        return job.job_type if job is not None else None
+
+
+def _load_secret(job_id: UUID) -> Optional[Dict[str, str]]:
+    with get_session() as session:
+        return load_job_secret(job_id, session)
+
+
+def _discard_secret(job_id: UUID) -> None:
+    with get_session() as session:
+        lease = _LEASE.get()
+        if lease is not None:
+            job = session.get(AiJob, job_id)
+            if job is not None and job.lease_owner != lease:
+                # The job was requeued and another run owns it now; that run needs the secret.
+                return
+        discard_job_secret(job_id, session)
+
+
+def _profile_requested(job: AiJob) -> bool:
+    return bool((job.context or {}).get("profile"))
+
+
+def _prepare_review(
+    job_id: UUID, secret: Optional[Dict[str, str]]
+) -> Optional[Tuple[StageEvent, Slot, PlatformConfig, bool]]:
+    with get_session() as session:
+        job = session.get(AiJob, job_id)
+        if job is None:
+            return None
+        config = _build_platform_config(job, session)
+        return _build_event(job, secret), _config_slot(job), config, _profile_requested(job)
+
+
+def execute_job(job_id: UUID, lease: Optional[str] = None) -> None:
+    """Blocking entry point: run `aexecute_job` on the shared bridge loop."""
+    run_sync(aexecute_job(job_id, lease))
+
+
+async def aexecute_job(job_id: UUID, lease: Optional[str] = None) -> None:
+    """Entry point used by queue workers: dispatch on the claimed job type.
+
+    `lease` is the owner token the worker stamped on the job when claiming it. While the
+    job runs its rows are heartbeated, and results are only written while the row still
+    carries the token, so a run that lost its lease cannot overwrite its successor.
+    """
+    token = _LEASE.set(lease)
+    try:
+        job_type = await asyncio.to_thread(_load_job_type, job_id)
+        if job_type is None:
+            return
+        async with _heartbeat(lease):
+            if job_type == BATCH_JOB_TYPE:
+                await aexecute_review_batch(job_id)
+            else:
+                await aexecute_review_job(job_id)
+    finally:
+        _LEASE.reset(token)
+        await asyncio.to_thread(metrics.persist)
+
+
+async def aexecute_review_job(job_id: UUID) -> None:
+    """Run one claimed review job to completion and persist its result or error."""
+    # Database access stays blocking (SQLModel) and runs in worker threads; the
+    # agents themselves are awaited so LLM waits do not hold a thread.
+    with start_trace("job", jobId=str(job_id)) as trace:
+        await _db("db.mark_running", _mark_job, job_id, "RUNNING")
+        try:
+            secret = await _db("db.load_secret", _load_secret, job_id)
+            prepared = await _db("db.prepare", _prepare_review, job_id, secret)
+            if prepared is None:
+                return
+            event, slot, platform_config, profile = prepared
+            with deferred_translations() as deferred:
+                async with profile_job(str(job_id), profile):
+                    async with ORCHESTRATORS.lease(slot, platform_config) as orchestrator:
+                        recommendation = await orchestrator.aprocess(event)
+            pending = bool(deferred)
+            result = _build_review_result(recommendation, pending, trace)
+            await _db("db.store_result", _mark_job, job_id, "COMPLETED", result)
+            if pending:
+                await _complete_translations(deferred, {str(job_id): (recommendation, trace)})
+        except Exception as exc:
+            await asyncio.to_thread(_mark_job, job_id, "FAILED", None, str(exc))
+        finally:
+            await _db("db.discard_secret", _discard_secret, job_id)
+
+
+def _config_slot(job: AiJob) -> Slot:
+    """Jobs with the same slot resolve their `PlatformConfig` from the same rows."""
+    ctx = job.context or {}
+    agent = ctx.get("agent")
+    return (
+        str(job.tenant_id),
+        job.job_type,
+        agent.strip() if isinstance(agent, str) else "",
+        _resolve_mode(ctx),
+    )
+
+
+def _owns(session: Session, job_id: UUID) -> bool:
+    """Whether the current run still holds the lease of `job_id` (always true without one)."""
+    lease = _LEASE.get()
+    if lease is None:
+        return True
+    job = session.get(AiJob, job_id)
+    return job is not None and job.lease_owner == lease
+
+
+def _start_item(batch_job_id: UUID, item_id: UUID) -> bool:
+    """Move an unfinished batch item to RUNNING under the batch's lease."""
+    with get_session() as session:
+        if not _owns(session, batch_job_id):
+            return False
+        started = session.execute(
+            update(AiJob)
+            .where(AiJob.job_id == item_id, AiJob.status.notin_(FINAL_STATUSES))
+            .values(
+                status="RUNNING",
+                lease_owner=_LEASE.get(),
+                attempts=func.coalesce(AiJob.attempts, 0) + 1,
+                updated_at=utcnow(),
+            )
+        )
+        session.commit()
+        return bool(started.rowcount)
+
+
+async def _run_batch_item(
+    orchestrator: AgentOrchestrator,
+    batch_job_id: UUID,
+    job: AiJob,
+    secret: Optional[Dict[str, str]],
+    deferred: Optional[DeferredTranslations] = None,
+) -> Optional[Tuple[AgentRecommendation, Trace]]:
+    if not await _db("db.start_item", _start_item, batch_job_id, job.job_id):
+        return None
+    with start_trace("batch_item", jobId=str(job.job_id)) as trace:
+        try:
+            async with profile_job(str(job.job_id), _profile_requested(job)):
+                recommendation = await orchestrator.aprocess(_build_event(job, secret))
+            pending = deferred is not None and str(job.job_id) in deferred.job_ids()
+            result = _build_review_result(recommendation, pending, trace)
+            await _db("db.store_result", _mark_job, job.job_id, "COMPLETED", result)
+            return recommendation, trace
+        except Exception as exc:
+            await asyncio.to_thread(_mark_job, job.job_id, "FAILED", None, str(exc))
+            return None
+        finally:
+            await _db("db.discard_secret", _discard_secret, job.job_id)
+
+
+async def _complete_translations(
+    deferred: DeferredTranslations, reviews: Dict[str, Tuple[AgentRecommendation, Optional[Trace]]]
+) -> None:
+    """Run the deferred translation pass and store the updated results of the affected jobs."""
+    job_ids = deferred.job_ids()
+    try:
+        with span("translation.flush", opinions=len(deferred)):
+            await deferred.flush()
+    except Exception:
+        # Results stay usable in the language the model returned.
+        logger.exception("Deferred translation flush failed")
+    for job_id in job_ids:
+        review = reviews.get(job_id)
+        if review is not None:
+            result = _build_review_result(review[0], trace=review[1])
+            await _db("db.store_result", _mark_job, UUID(job_id), "COMPLETED", result)
+
+
+def _fail_unfinished_items(batch_job_id: UUID, error: str) -> None:
+    with get_session() as session:
+        batch = session.get(AiJob, batch_job_id)
+        if batch is None or not _owns(session, batch_job_id):
+            return
+        item_ids = [UUID(str(value)) for value in (batch.payload or {}).get("jobIds", [])]
+        statement = update(AiJob).where(AiJob.job_id.in_(item_ids), AiJob.status.notin_(FINAL_STATUSES))
+        lease = _LEASE.get()
+        if lease is not None:
+            statement = statement.where(or_(AiJob.status == BATCH_ITEM_STATUS, AiJob.lease_owner == lease))
+        session.execute(statement.values(status="FAILED", error=error, updated_at=utcnow()))
+        sweep_job_secrets(session, item_ids)
+        session.commit()
+
+
+def _load_batch(
+    batch_job_id: UUID, configs: Dict[Slot, PlatformConfig]
+) -> Optional[Tuple[List[UUID], List[Tuple[AiJob, Optional[Dict[str, str]]]]]]:
+    with get_session() as session:
+        batch = session.get(AiJob, batch_job_id)
+        if batch is None:
+            return None
+        item_ids = [UUID(str(value)) for value in (batch.payload or {}).get("jobIds", [])]
+        # Finished or missing items will not run again; their credentials can go. Committed
+        # before the items load so the returned instances are not expired by it.
+        if sweep_job_secrets(session, item_ids):
+            session.commit()
+        pending: List[Tuple[AiJob, Optional[Dict[str, str]]]] = []
+        for item_id in item_ids:
+            item = session.get(AiJob, item_id)
+            # Items finished before a worker restart keep their recorded outcome.
+            if item is None or item.status in FINAL_STATUSES:
+                continue
+            slot = _config_slot(item)
+            if slot not in configs:
+                configs[slot] = _build_platform_config(item, session)
+            pending.append((item, load_job_secret(item_id, session)))
+    # Items stay BATCHED until `_run_batch_item` starts them.
+    return item_ids, pending
+
+
+def _summarize_batch(item_ids: List[UUID]) -> Dict[str, Any]:
+    with get_session() as session:
+        items = [session.get(AiJob, item_id) for item_id in item_ids]
+        summary = [
+            {
+                "jobId": str(item.job_id),
+                "targetId": item.target_id,
+                "status": item.status,
+                "error": item.error,
+            }
+            for item in items
+            if item is not None
+        ]
+    return {
+        "reviewType": "AI_BATCH",
+        "total": len(summary),
+        "completed": sum(1 for item in summary if item["status"] == "COMPLETED"),
+        "failed": sum(1 for item in summary if item["status"] == "FAILED"),
+        "items": summary,
+    }
+
+
+def execute_review_batch(batch_job_id: UUID) -> None:
+    run_sync(aexecute_review_batch(batch_job_id))
+
+
+async def aexecute_review_batch(batch_job_id: UUID) -> None:
+    """Run every pending item of a `REVIEW_BATCH` job and record per-item status."""
+    with start_trace("batch", jobId=str(batch_job_id)) as trace:
+        await _db("db.mark_running", _mark_job, batch_job_id, "RUNNING")
+        configs: Dict[Slot, PlatformConfig] = {}
+        try:
+            loaded = await _db("db.load_batch", _load_batch, batch_job_id, configs)
+            if loaded is None:
+                return
+            item_ids, pending = loaded
+            limit = asyncio.Semaphore(max(1, JOB_BATCH_CONCURRENCY))
+
+            async with AsyncExitStack() as leases:
+                orchestrators = {
+                    slot: await leases.enter_async_context(ORCHESTRATORS.lease(slot, config))
+                    for slot, config in configs.items()
+                }
+
+                with deferred_translations() as deferred:
+
+                    async def run_item(
+                        item: AiJob, secret: Optional[Dict[str, str]]
+                    ) -> Optional[Tuple[AgentRecommendation, Trace]]:
+                        async with limit:
+                            return await _run_batch_item(
+                                orchestrators[_config_slot(item)], batch_job_id, item, secret, deferred
+                            )
+
+                    reviews = await asyncio.gather(*(run_item(item, secret) for item, secret in pending))
+
+            result = await _db("db.summarize_batch", _summarize_batch, item_ids)
+            result["trace"] = trace.to_dict()
+            await _db("db.store_result", _mark_job, batch_job_id, "COMPLETED", result)
+            if deferred:
+                await _complete_translations(
+                    deferred,
+                    {str(item.job_id): review for (item, _), review in zip(pending, reviews) if review is not None},
+                )
+        except Exception as exc:
+            await asyncio.to_thread(_fail_unfinished_items, batch_job_id, str(exc))
+            await asyncio.to_thread(_mark_job, batch_job_id, "FAILED", None, str(exc))
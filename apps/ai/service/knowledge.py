@@ -1,17 +1,82 @@
+"""Full-text search over tenant knowledge entries.
+
+The backend is picked from the database dialect:
+- postgresql: GIN expression index over `to_tsvector(title || body)`, ranked with
+  `ts_rank_cd`; tags are pre-filtered with a JSONB `@>` containment (GIN indexed).
+- sqlite: an FTS5 shadow table kept in sync by triggers, ranked with BM25; tags are
+  pre-filtered through `json_each`.
+- anything else (or SQLite without FTS5): an in-process BM25 inverted index per tenant,
+  built lazily and updated by `index_knowledge_entry` / `unindex_knowledge_entry`.
+
+Queries match any of their terms, by prefix, like the substring scan they replace.
+
+`mode="vector"` ranks by cosine similarity against a caller-supplied query embedding
+(see `knowledge_vectors`); `mode="hybrid"` blends both scores, each normalised to
+[0, 1], with weight `alpha` on the vector side.
+"""
+
 from __future__ import annotations
 
-from typing import List
+import json
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, select
 
+from .database import engine as default_engine
+from .knowledge_vectors import KnowledgeVectorIndex
 from .models import KnowledgeEntry
 from .schemas import KnowledgeSearchHit
 
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+# Title terms weigh double, matching the FTS5 column weights below.
+_TITLE_WEIGHT = 2.0
+SEARCH_MODES = ("lexical", "vector", "hybrid")
+
+_SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS knowledgeentry_fts USING fts5("
+    " entry_id UNINDEXED, tenant_id, title, body, tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS knowledgeentry_fts_ai AFTER INSERT ON knowledgeentry BEGIN"
+    " INSERT INTO knowledgeentry_fts(entry_id, tenant_id, title, body)"
+    " VALUES (new.entry_id, new.tenant_id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS knowledgeentry_fts_ad AFTER DELETE ON knowledgeentry BEGIN"
+    " DELETE FROM knowledgeentry_fts WHERE entry_id = old.entry_id; END",
+    "CREATE TRIGGER IF NOT EXISTS knowledgeentry_fts_au AFTER UPDATE OF tenant_id, title, body ON knowledgeentry BEGIN"
+    " DELETE FROM knowledgeentry_fts WHERE entry_id = old.entry_id;"
+    " INSERT INTO knowledgeentry_fts(entry_id, tenant_id, title, body)"
+    " VALUES (new.entry_id, new.tenant_id, new.title, new.body); END",
+)
+_SQLITE_FTS_BACKFILL = (
+    "INSERT INTO knowledgeentry_fts(entry_id, tenant_id, title, body)"
+    " SELECT entry_id, tenant_id, title, body FROM knowledgeentry"
+    " WHERE entry_id NOT IN (SELECT entry_id FROM knowledgeentry_fts)"
+)
+_PG_VECTOR = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(body, ''))"
+_PG_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_knowledgeentry_fts ON knowledgeentry USING GIN ({_PG_VECTOR})",
+    "CREATE INDEX IF NOT EXISTS ix_knowledgeentry_tags ON knowledgeentry USING GIN (tags jsonb_path_ops)",
+)
+
 
-def _score_text(text: str, tokens: List[str]) -> float:
-    lowered = text.lower()
-    return sum(lowered.count(token) for token in tokens)
+def _tokenize(value: str) -> List[str]:
+    return [token.lower() for token in _TOKEN_RE.findall(value or "")]
+
+
+def _query_terms(query: str) -> List[str]:
+    seen: Dict[str, None] = {}
+    for token in _tokenize(query):
+        seen.setdefault(token, None)
+    return list(seen)
 
 
 def _build_snippet(body: str, tokens: List[str]) -> str:
@@ -31,34 +96,273 @@ def _build_snippet(body: str, tokens: List[str]) -> str:
     return snippet + ("…" if len(body) > 160 else "")
 
 
+class _TenantIndex:
+    """BM25 inverted index over one tenant's entries (title terms weighted)."""
+
+    def __init__(self) -> None:
+        self.postings: Dict[str, Dict[UUID, float]] = {}
+        self.doc_terms: Dict[UUID, Dict[str, float]] = {}
+        self.doc_len: Dict[UUID, float] = {}
+        self.doc_tags: Dict[UUID, frozenset] = {}
+        self.total_len = 0.0
+        self._vocab: Optional[List[str]] = None
+
+    def add(self, entry: KnowledgeEntry) -> None:
+        self.remove(entry.entry_id)
+        weights: Dict[str, float] = Counter(_tokenize(entry.body))
+        for token in _tokenize(entry.title):
+            weights[token] = weights.get(token, 0.0) + _TITLE_WEIGHT
+        for token, weight in weights.items():
+            self.postings.setdefault(token, {})[entry.entry_id] = weight
+        length = float(sum(weights.values()))
+        self.doc_terms[entry.entry_id] = dict(weights)
+        self.doc_len[entry.entry_id] = length
+        self.doc_tags[entry.entry_id] = frozenset(entry.tags or [])
+        self.total_len += length
+        self._vocab = None
+
+    def remove(self, entry_id: UUID) -> None:
+        terms = self.doc_terms.pop(entry_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            docs = self.postings.get(token)
+            if docs is not None:
+                docs.pop(entry_id, None)
+                if not docs:
+                    del self.postings[token]
+        self.total_len -= self.doc_len.pop(entry_id, 0.0)
+        self.doc_tags.pop(entry_id, None)
+        self._vocab = None
+
+    def _expand(self, term: str) -> List[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self.postings)
+        start = bisect_left(self._vocab, term)
+        out = []
+        for token in self._vocab[start:]:
+            if not token.startswith(term):
+                break
+            out.append(token)
+        return out
+
+    def search(self, terms: Sequence[str], tags: Sequence[str], limit: int) -> List[Tuple[UUID, float]]:
+        n_docs = len(self.doc_len)
+        if n_docs == 0:
+            return []
+        avg_len = self.total_len / n_docs or 1.0
+        required = frozenset(tags)
+        scores: Dict[UUID, float] = {}
+        for term in terms:
+            for token in self._expand(term):
+                docs = self.postings[token]
+                idf = math.log(1.0 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for entry_id, tf in docs.items():
+                    if required and not required.issubset(self.doc_tags[entry_id]):
+                        continue
+                    norm = _BM25_K1 * (1.0 - _BM25_B + _BM25_B * self.doc_len[entry_id] / avg_len)
+                    scores[entry_id] = scores.get(entry_id, 0.0) + idf * tf * (_BM25_K1 + 1.0) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+
+class KnowledgeSearchIndex:
+    def __init__(self, bind: Engine) -> None:
+        self.bind = bind
+        self._lock = threading.Lock()
+        self._backend: Optional[str] = None
+        self._tenants: Dict[UUID, _TenantIndex] = {}
+
+    @property
+    def backend(self) -> str:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._setup()
+        return self._backend
+
+    def _setup(self) -> str:
+        dialect = self.bind.dialect.name
+        try:
+            if dialect == "postgresql":
+                with self.bind.begin() as conn:
+                    for statement in _PG_DDL:
+                        conn.execute(text(statement))
+                return "postgresql"
+            if dialect == "sqlite":
+                with self.bind.begin() as conn:
+                    for statement in _SQLITE_FTS_DDL:
+                        conn.execute(text(statement))
+                    conn.execute(text(_SQLITE_FTS_BACKFILL))
+                return "sqlite"
+        except Exception:
+            # e.g. SQLite built without FTS5: fall back to the in-process index.
+            pass
+        return "memory"
+
+    def search(self, session: Session, tenant_id: UUID, terms: List[str], tags: List[str], limit: int) -> List[Tuple[UUID, float]]:
+        backend = self.backend
+        if backend == "postgresql":
+            return self._search_postgres(session, tenant_id, terms, tags, limit)
+        if backend == "sqlite":
+            return self._search_sqlite(session, tenant_id, terms, tags, limit)
+        return self._tenant_index(session, tenant_id).search(terms, tags, limit)
+
+    def _search_postgres(self, session, tenant_id, terms, tags, limit) -> List[Tuple[UUID, float]]:
+        tsquery = " | ".join("'" + term.replace("'", "''") + "':*" for term in terms)
+        tag_filter = " AND tags @> CAST(:tags AS jsonb)" if tags else ""
+        rows = session.execute(
+            text(
+                f"SELECT entry_id, ts_rank_cd({_PG_VECTOR}, q) AS score"
+                f" FROM knowledgeentry, to_tsquery('simple', :q) AS q"
+                f" WHERE tenant_id = CAST(:tenant AS uuid) AND {_PG_VECTOR} @@ q{tag_filter}"
+                " ORDER BY score DESC LIMIT :limit"
+            ),
+            {"q": tsquery, "tenant": str(tenant_id), "tags": _json_list(tags), "limit": limit},
+        ).all()
+        return [(_as_uuid(row[0]), float(row[1])) for row in rows]
+
+    def _search_sqlite(self, session, tenant_id, terms, tags, limit) -> List[Tuple[UUID, float]]:
+        match = " OR ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+        tag_filter = ""
+        params = {"limit": limit}
+        if tags:
+            # Every requested tag must be present on the entry.
+            tag_filter = (
+                " AND (SELECT COUNT(DISTINCT j.value) FROM knowledgeentry k, json_each(k.tags) j"
+                "      WHERE k.entry_id = f.entry_id AND j.value IN (SELECT value FROM json_each(:tags))) = :tag_count"
+            )
+            params.update({"tags": _json_list(tags), "tag_count": len(set(tags))})
+        params["match"] = f'tenant_id:"{tenant_id.hex}" AND ({match})'
+        rows = session.execute(
+            text(
+                # Column weights: entry_id, tenant_id, title, body.
+                "SELECT f.entry_id, bm25(knowledgeentry_fts, 0.0, 0.0, 2.0, 1.0) AS rank"
+                " FROM knowledgeentry_fts f"
+                f" WHERE knowledgeentry_fts MATCH :match{tag_filter}"
+                " ORDER BY rank LIMIT :limit"
+            ),
+            params,
+        ).all()
+        # FTS5 bm25() is negative; flip it so that higher is better like the other backends.
+        return [(_as_uuid(row[0]), -float(row[1])) for row in rows]
+
+    def _tenant_index(self, session: Session, tenant_id: UUID) -> _TenantIndex:
+        with self._lock:
+            index = self._tenants.get(tenant_id)
+            if index is None:
+                index = _TenantIndex()
+                for entry in session.exec(select(KnowledgeEntry).where(KnowledgeEntry.tenant_id == tenant_id)):
+                    index.add(entry)
+                self._tenants[tenant_id] = index
+            return index
+
+    def upsert(self, entry: KnowledgeEntry) -> None:
+        if self._backend != "memory":
+            return
+        with self._lock:
+            index = self._tenants.get(entry.tenant_id)
+            if index is not None:
+                index.add(entry)
+
+    def remove(self, tenant_id: UUID, entry_id: UUID) -> None:
+        if self._backend != "memory":
+            return
+        with self._lock:
+            index = self._tenants.get(tenant_id)
+            if index is not None:
+                index.remove(entry_id)
+
+
+def _json_list(values: List[str]) -> str:
+    return json.dumps(list(values))
+
+
+def _as_uuid(value: object) -> UUID:
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+_INDEX = KnowledgeSearchIndex(default_engine)
+_VECTORS = KnowledgeVectorIndex()
+
+
+def init_knowledge_index() -> str:
+    """Create (and backfill) the search index; returns the selected backend."""
+    return _INDEX.backend
+
+
+def index_knowledge_entry(entry: KnowledgeEntry) -> None:
+    """Reflect a created/updated entry in the in-process index (database backends use triggers/indexes)."""
+    _INDEX.upsert(entry)
+    _VECTORS.upsert(entry)
+
+
+def unindex_knowledge_entry(tenant_id: UUID, entry_id: UUID) -> None:
+    _INDEX.remove(tenant_id, entry_id)
+    _VECTORS.remove(tenant_id, entry_id)
+
+
+def _blend(
+    lexical: List[Tuple[UUID, float]], vector: List[Tuple[UUID, float]], alpha: float, limit: int
+) -> List[Tuple[UUID, float]]:
+    top_lexical = max((score for _, score in lexical), default=0.0)
+    scores: Dict[UUID, float] = {}
+    for entry_id, score in lexical:
+        normalized = score / top_lexical if top_lexical > 0 else 0.0
+        scores[entry_id] = (1.0 - alpha) * normalized
+    for entry_id, score in vector:
+        # Cosine similarity, clipped at 0 so that opposite vectors do not subtract.
+        scores[entry_id] = scores.get(entry_id, 0.0) + alpha * max(0.0, score)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:limit]
+
+
 def search_knowledge_entries(
     tenant_id: UUID,
     query: str,
     limit: int,
     tags: List[str],
     session: Session,
+    mode: str = "lexical",
+    embedding: Optional[List[float]] = None,
+    alpha: float = 0.5,
 ) -> List[KnowledgeSearchHit]:
-    tokens = [part.strip().lower() for part in query.split() if part.strip()]
-    if not tokens:
+    mode = (mode or "lexical").strip().lower()
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported search mode '{mode}'")
+    if mode != "lexical" and not embedding:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Search mode '{mode}' requires an embedding")
+    terms = _query_terms(query)
+    if mode == "lexical":
+        ranked = _INDEX.search(session, tenant_id, terms, tags, limit) if terms else []
+    elif mode == "vector":
+        ranked = _VECTORS.search(session, tenant_id, embedding, tags, limit)
+    else:
+        # Over-fetch both sides so that entries ranked well by only one of them survive the blend.
+        pool = max(limit * 4, 20)
+        lexical = _INDEX.search(session, tenant_id, terms, tags, pool) if terms else []
+        vector = _VECTORS.search(session, tenant_id, embedding, tags, pool)
+        ranked = _blend(lexical, vector, min(1.0, max(0.0, alpha)), limit)
+    if not ranked:
         return []
-    entries = session.exec(select(KnowledgeEntry).where(KnowledgeEntry.tenant_id == tenant_id)).all()
-    filtered = []
-    for entry in entries:
-        if tags and not set(tags).issubset(set(entry.tags or [])):
-            continue
-        text = f"{entry.title} {entry.body}"
-        score = _score_text(text, tokens)
-        if score <= 0:
+    ids = [entry_id for entry_id, _ in ranked]
+    entries = {
+        entry.entry_id: entry
+        for entry in session.exec(select(KnowledgeEntry).where(KnowledgeEntry.entry_id.in_(ids)))
+    }
+    hits = []
+    for entry_id, score in ranked:
+        entry = entries.get(entry_id)
+        if entry is None:
             continue
-        filtered.append(
+        hits.append(
             KnowledgeSearchHit(
                 entryId=entry.entry_id,
                 title=entry.title,
-                snippet=_build_snippet(entry.body, tokens),
-                score=float(score),
+                snippet=_build_snippet(entry.body, terms),
+                score=score,
                 sourceUri=entry.source_uri,
                 tags=entry.tags,
             )
         )
-    filtered.sort(key=lambda hit: hit.score, reverse=True)
-    return filtered[:limit]
+    return hits
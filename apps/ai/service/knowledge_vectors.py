@@ -0,0 +1,332 @@
+"""Per-tenant nearest-neighbour index over `KnowledgeEntry.embedding`.
+
+Vectors are L2-normalised into one float32 matrix per tenant, so cosine similarity is
+a single matrix-vector product. Small tenants are searched exhaustively (flat); once a
+tenant grows past `AI_KNOWLEDGE_IVF_MIN_ENTRIES` an inverted-file (IVF) layout is
+trained with a few rounds of k-means and queries only scan the `nprobe` closest lists.
+
+Indexes are built lazily on the first vector query for a tenant. The process serving
+the knowledge CRUD endpoints applies its own writes through `upsert` / `remove`; other
+processes (review workers searching in process) do not see those calls, so every
+search re-checks the tenant's version, its entry count and latest `updated_at`, at
+most every `AI_KNOWLEDGE_INDEX_REFRESH_SECONDS` and rebuilds the index from the
+database when it changed. Searches keep using the previous index while it rebuilds.
+
+IVF training runs on a background thread; until it finishes the tenant is searched
+exhaustively, so neither CRUD requests nor searches wait for k-means. Searches score a
+read-only snapshot of the tenant's arrays outside the index lock; the snapshot is only
+copied again after the index changed. A tenant's
+dimension is fixed by its first embedding; entries with a different dimension are
+ignored.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from .models import KnowledgeEntry
+
+logger = logging.getLogger(__name__)
+
+IVF_MIN_ENTRIES = int(os.getenv("AI_KNOWLEDGE_IVF_MIN_ENTRIES", "20000"))
+IVF_NPROBE = int(os.getenv("AI_KNOWLEDGE_IVF_NPROBE", "8"))
+INDEX_REFRESH_SECONDS = float(os.getenv("AI_KNOWLEDGE_INDEX_REFRESH_SECONDS", "10"))
+_KMEANS_ITERATIONS = 8
+_KMEANS_SAMPLE = 50_000
+_TRAIN_ATTEMPTS = 3
+
+# (entry count, latest updated_at) of a tenant's knowledge entries.
+_Version = Tuple[int, Optional[datetime]]
+
+
+def _normalize(vector: Sequence[float]) -> Optional[np.ndarray]:
+    try:
+        array = np.asarray(vector, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    if array.ndim != 1 or array.size == 0 or not np.all(np.isfinite(array)):
+        return None
+    norm = float(np.linalg.norm(array))
+    if norm == 0.0:
+        return None
+    return array / norm
+
+
+def _kmeans(data: np.ndarray) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    size = data.shape[0]
+    n_lists = max(1, int(np.sqrt(size)))
+    sample = data[rng.choice(size, size=min(size, _KMEANS_SAMPLE), replace=False)]
+    centroids = sample[rng.choice(sample.shape[0], size=n_lists, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        for idx in range(n_lists):
+            members = sample[labels == idx]
+            if members.shape[0]:
+                centroid = members.mean(axis=0)
+                norm = np.linalg.norm(centroid)
+                centroids[idx] = centroid / norm if norm else centroid
+    return centroids
+
+
+def _tenant_version(session: Session, tenant_id: UUID) -> _Version:
+    count, latest = session.exec(
+        select(func.count(), func.max(KnowledgeEntry.updated_at)).where(KnowledgeEntry.tenant_id == tenant_id)
+    ).one()
+    return int(count or 0), latest
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Read-only copy of a tenant's vectors that searches score without holding the lock."""
+
+    matrix: np.ndarray
+    ids: Tuple[UUID, ...]
+    tags: Tuple[frozenset, ...]
+    centroids: Optional[np.ndarray]
+    assignments: np.ndarray
+
+    def search(self, query: np.ndarray, tags: Sequence[str], limit: int) -> List[Tuple[UUID, float]]:
+        if not self.ids:
+            return []
+        if self.centroids is not None:
+            nprobe = min(max(1, IVF_NPROBE), self.centroids.shape[0])
+            lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            candidates = np.nonzero(np.isin(self.assignments, lists))[0]
+        else:
+            candidates = np.arange(len(self.ids))
+        if tags:
+            required = frozenset(tags)
+            candidates = np.array([row for row in candidates if required.issubset(self.tags[row])], dtype=np.int64)
+        if candidates.size == 0:
+            return []
+        scores = self.matrix[candidates] @ query
+        top = min(limit, candidates.size)
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        return [(self.ids[int(candidates[i])], float(scores[i])) for i in best]
+
+
+class _TenantVectors:
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.matrix = np.zeros((64, dim), dtype=np.float32)
+        self.ids: List[UUID] = []
+        self.tags: List[frozenset] = []
+        self.rows: Dict[UUID, int] = {}
+        # IVF state: centroids and the list (centroid index) of every row.
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(64, dtype=np.int32)
+        self.trained_size = 0
+        # Bumped on every change so a background training run can tell its snapshot is stale.
+        self.generation = 0
+        self.trainer: Optional[threading.Thread] = None
+        self._snapshot: Optional[_Snapshot] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def add(self, entry_id: UUID, vector: np.ndarray, tags: Sequence[str]) -> None:
+        row = self.rows.get(entry_id)
+        if row is None:
+            row = self.size
+            if row == self.matrix.shape[0]:
+                self.matrix = np.concatenate([self.matrix, np.zeros_like(self.matrix)])
+                self.assignments = np.concatenate([self.assignments, np.zeros_like(self.assignments)])
+            self.ids.append(entry_id)
+            self.tags.append(frozenset(tags))
+            self.rows[entry_id] = row
+        else:
+            self.tags[row] = frozenset(tags)
+        self.matrix[row] = vector
+        if self.centroids is not None:
+            self.assignments[row] = int(np.argmax(self.centroids @ vector))
+        self.generation += 1
+        self._snapshot = None
+
+    def remove(self, entry_id: UUID) -> None:
+        row = self.rows.pop(entry_id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            # Swap-remove keeps the matrix dense.
+            moved = self.ids[last]
+            self.matrix[row] = self.matrix[last]
+            self.assignments[row] = self.assignments[last]
+            self.ids[row] = moved
+            self.tags[row] = self.tags[last]
+            self.rows[moved] = row
+        self.ids.pop()
+        self.tags.pop()
+        self.generation += 1
+        self._snapshot = None
+
+    def needs_training(self) -> bool:
+        # (Re)train when crossing the threshold and again each time the tenant doubles.
+        return self.size >= IVF_MIN_ENTRIES and self.size >= 2 * self.trained_size
+
+    def install(self, centroids: np.ndarray, assignments: np.ndarray) -> None:
+        self.centroids = centroids
+        self.assignments[: self.size] = assignments
+        self.trained_size = self.size
+        self._snapshot = None
+
+    def snapshot(self) -> _Snapshot:
+        """The current rows as a `_Snapshot`, copied once per change; call under the lock."""
+        if self._snapshot is None:
+            self._snapshot = _Snapshot(
+                matrix=self.matrix[: self.size].copy(),
+                ids=tuple(self.ids),
+                tags=tuple(self.tags),
+                centroids=self.centroids,
+                assignments=self.assignments[: self.size].copy(),
+            )
+        return self._snapshot
+
+
+@dataclass
+class _TenantState:
+    index: Optional[_TenantVectors]
+    version: _Version
+    checked_at: float
+    refreshing: bool = False
+
+
+class KnowledgeVectorIndex:
+    def __init__(self, refresh_seconds: float = INDEX_REFRESH_SECONDS) -> None:
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._tenants: Dict[UUID, _TenantState] = {}
+
+    def _load(self, session: Session, tenant_id: UUID) -> Optional[_TenantVectors]:
+        """Build a tenant's index from the database; runs outside the lock."""
+        index: Optional[_TenantVectors] = None
+        rows = session.exec(
+            select(KnowledgeEntry.entry_id, KnowledgeEntry.embedding, KnowledgeEntry.tags).where(
+                KnowledgeEntry.tenant_id == tenant_id
+            )
+        )
+        for entry_id, embedding, tags in rows:
+            vector = _normalize(embedding) if embedding else None
+            if vector is None:
+                continue
+            if index is None:
+                index = _TenantVectors(vector.size)
+            if vector.size == index.dim:
+                index.add(entry_id, vector, tags or [])
+        return index
+
+    def _current(self, session: Session, tenant_id: UUID) -> Optional[_TenantVectors]:
+        """Return the tenant's index, rebuilding it when the database has moved on."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._tenants.get(tenant_id)
+            if state is not None and (state.refreshing or now - state.checked_at < self.refresh_seconds):
+                return state.index
+            if state is not None:
+                # Other searches keep using the current index meanwhile.
+                state.refreshing = True
+        try:
+            version = _tenant_version(session, tenant_id)
+            if state is not None and version == state.version:
+                with self._lock:
+                    state.checked_at = now
+                    state.refreshing = False
+                return state.index
+            index = self._load(session, tenant_id)
+        except Exception:
+            if state is None:
+                raise
+            with self._lock:
+                state.refreshing = False
+            return state.index
+        with self._lock:
+            self._tenants[tenant_id] = _TenantState(index, version, now)
+            if index is not None:
+                self._schedule_training(index)
+        return index
+
+    def search(
+        self, session: Session, tenant_id: UUID, embedding: Sequence[float], tags: Sequence[str], limit: int
+    ) -> List[Tuple[UUID, float]]:
+        query = _normalize(embedding)
+        if query is None:
+            return []
+        index = self._current(session, tenant_id)
+        if index is None or index.dim != query.size:
+            return []
+        with self._lock:
+            snapshot = index.snapshot()
+        return snapshot.search(query, tags, limit)
+
+    def upsert(self, entry: KnowledgeEntry) -> None:
+        with self._lock:
+            state = self._tenants.get(entry.tenant_id)
+            if state is None:
+                return
+            index = state.index
+            vector = _normalize(entry.embedding) if entry.embedding else None
+            if vector is None:
+                if index is not None:
+                    index.remove(entry.entry_id)
+                return
+            if index is None:
+                index = state.index = _TenantVectors(vector.size)
+            if vector.size == index.dim:
+                index.add(entry.entry_id, vector, entry.tags or [])
+                self._schedule_training(index)
+            else:
+                index.remove(entry.entry_id)
+
+    def remove(self, tenant_id: UUID, entry_id: UUID) -> None:
+        with self._lock:
+            state = self._tenants.get(tenant_id)
+            if state is not None and state.index is not None:
+                state.index.remove(entry_id)
+
+    def _schedule_training(self, index: _TenantVectors) -> None:
+        """Start IVF training in the background when the tenant needs it; call under the lock."""
+        if index.trainer is not None or not index.needs_training():
+            return
+        index.trainer = threading.Thread(target=self._train, args=(index,), name="knowledge-ivf-train", daemon=True)
+        index.trainer.start()
+
+    def _train(self, index: _TenantVectors) -> None:
+        trained = False
+        try:
+            with self._lock:
+                snapshot, generation = index.matrix[: index.size].copy(), index.generation
+            centroids = _kmeans(snapshot)
+            for _ in range(_TRAIN_ATTEMPTS):
+                assignments = np.argmax(snapshot @ centroids.T, axis=1)
+                with self._lock:
+                    if index.generation == generation:
+                        index.install(centroids, assignments)
+                        trained = True
+                        return
+                    # Entries changed while training; assign the fresh rows outside the lock again.
+                    snapshot, generation = index.matrix[: index.size].copy(), index.generation
+            with self._lock:
+                index.install(centroids, np.argmax(index.matrix[: index.size] @ centroids.T, axis=1))
+                trained = True
+        except Exception:
+            logger.exception("Knowledge IVF training failed")
+        finally:
+            with self._lock:
+                index.trainer = None
+                if trained:
+                    # The tenant may have doubled again while this run trained.
+                    self._schedule_training(index)
@@ -1,20 +1,18 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import shutil
 import tarfile
-import time
-import threading
 import uuid
 import zipfile
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from fastapi import (
-    BackgroundTasks,
     Depends,
     FastAPI,
     File,
@@ -25,15 +23,29 @@ from fastapi import (
     UploadFile,
     status,
 )
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
+from secrux_ai import metrics
+from secrux_ai.llm import close_clients as close_llm_clients
+
 from .builtin import register_builtin_routes
 from .database import get_session, init_db
-from .knowledge import search_knowledge_entries
-from .models import AiAgent, AiJob, AiMcp, KnowledgeEntry
+from .jobs import BATCH_ITEM_JOB_TYPES, BATCH_ITEM_STATUS, BATCH_JOB_TYPE, ensure_job_secret_key, store_job_secret
+from .knowledge import (
+    index_knowledge_entry,
+    init_knowledge_index,
+    search_knowledge_entries,
+    unindex_knowledge_entry,
+)
+from .models import AiAgent, AiBuiltinBootstrap, AiJob, AiMcp, KnowledgeEntry, utcnow
 from .schemas import (
     AiAgentRequest,
     AiAgentResponse,
+    AiJobBatchRequest,
+    AiJobBatchResponse,
     AiJobRequest,
     AiJobResponse,
     AiMcpRequest,
@@ -47,6 +59,7 @@ from .schemas import (
     to_knowledge_response,
     to_mcp_response,
 )
+from .worker import JobWorkerPool
 
 AI_SERVICE_TOKEN = os.getenv("SECRUX_AI_SERVICE_TOKEN", "local-dev-token")
 MCP_STORAGE_PATH = Path(os.getenv("AI_MCP_STORAGE", "/app/storage/mcps")).resolve()
@@ -54,6 +67,7 @@ MCP_STORAGE_PATH.mkdir(parents=True, exist_ok=True)
 AGENT_STORAGE_PATH = Path(os.getenv("AI_AGENT_STORAGE", "/app/storage/agents")).resolve()
 AGENT_STORAGE_PATH.mkdir(parents=True, exist_ok=True)
 AI_BUILTIN_BASE_URL = os.getenv("AI_BUILTIN_BASE_URL", "http://127.0.0.1:5156/builtin")
+JOB_BATCH_MAX_ITEMS = int(os.getenv("AI_JOB_BATCH_MAX_ITEMS", "500"))
 
 
 @dataclass(frozen=True)
@@ -93,6 +107,13 @@ BUILTIN_MCP_DEFINITIONS: List[BuiltinMcpDefinition] = [
         description="Read specific line ranges via /builtin/file-reader.",
         endpoint=f"{AI_BUILTIN_BASE_URL}/file-reader",
     ),
+    BuiltinMcpDefinition(
+        key="file-reader-batch",
+        type="builtin:file-reader-batch",
+        name="内置文件读取（批量）",
+        description="Read many line ranges across files in one call via /builtin/file-reader.",
+        endpoint=f"{AI_BUILTIN_BASE_URL}/file-reader",
+    ),
     BuiltinMcpDefinition(
         key="sarif-rule",
         type="builtin:sarif-rule",
@@ -100,6 +121,13 @@ BUILTIN_MCP_DEFINITIONS: List[BuiltinMcpDefinition] = [
         description="Lookup rule metadata from SARIF 2.1.0 results.",
         endpoint=f"{AI_BUILTIN_BASE_URL}/sarif-rules",
     ),
+    BuiltinMcpDefinition(
+        key="sarif-results",
+        type="builtin:sarif-results",
+        name="SARIF 结果查询",
+        description="Query SARIF results by rule, file and line range.",
+        endpoint=f"{AI_BUILTIN_BASE_URL}/sarif-rules",
+    ),
     BuiltinMcpDefinition(
         key="knowledge-search",
         type="builtin:knowledge-search",
@@ -126,6 +154,14 @@ BUILTIN_AGENT_DEFINITIONS: List[BuiltinAgentDefinition] = [
         tool="file.read.range",
         mcp_type="builtin:file-reader-range",
     ),
+    BuiltinAgentDefinition(
+        key="agent-file-reader-batch",
+        name="内置Agent：文件批量读取",
+        description="Expose file.read.batch tool for multi-file context gathering.",
+        stage_types=["RESULT_PROCESS", "REVIEW"],
+        tool="file.read.batch",
+        mcp_type="builtin:file-reader-batch",
+    ),
     BuiltinAgentDefinition(
         key="agent-sarif-rule",
         name="内置Agent：SARIF 规则解析",
@@ -134,6 +170,14 @@ BUILTIN_AGENT_DEFINITIONS: List[BuiltinAgentDefinition] = [
         tool="sarif.rule",
         mcp_type="builtin:sarif-rule",
     ),
+    BuiltinAgentDefinition(
+        key="agent-sarif-results",
+        name="内置Agent：SARIF 结果查询",
+        description="Expose sarif.results.query tool for sibling findings.",
+        stage_types=["RESULT_PROCESS", "REVIEW"],
+        tool="sarif.results.query",
+        mcp_type="builtin:sarif-results",
+    ),
     BuiltinAgentDefinition(
         key="agent-knowledge-search",
         name="内置Agent：知识库检索",
@@ -160,6 +204,16 @@ BUILTIN_AGENT_DEFINITIONS: List[BuiltinAgentDefinition] = [
         entrypoint="secrux_ai.agents.vuln_review:VulnReviewAgent",
         params={"mode": "precise", "ast_depth": 1},
     ),
+    BuiltinAgentDefinition(
+        key="agent-vuln-review-file",
+        name="内置Agent：漏洞复核（全文件上下文）",
+        description="Precise AI review with the enclosing function, in-file callers and referenced fields.",
+        stage_types=["RESULT_PROCESS", "RESULT_REVIEW"],
+        kind="custom",
+        entrypoint="secrux_ai.agents.vuln_review:VulnReviewAgent",
+        params={"mode": "precise", "ast_depth": 1, "ast_scope": "file"},
+        mcp_type="builtin:file-reader-full",
+    ),
     BuiltinAgentDefinition(
         key="agent-sca-issue-review-simple",
         name="内置Agent：SCA 缺陷复核（简略）",
@@ -173,13 +227,31 @@ BUILTIN_AGENT_DEFINITIONS: List[BuiltinAgentDefinition] = [
 
 app = FastAPI(title="Secrux AI Service", version="0.4.0")
 
-_JOB_SECRETS: dict[UUID, dict[str, str]] = {}
-_JOB_SECRETS_LOCK = threading.Lock()
+_JOB_WORKER_POOL: Optional[JobWorkerPool] = None
 
 
 @app.on_event("startup")
 def startup() -> None:
+    global _JOB_WORKER_POOL
     init_db()
+    # Spawned workers inherit the key through the environment.
+    ensure_job_secret_key()
+    init_knowledge_index()
+    # Counters restart with the service; drop snapshots of the previous workers.
+    metrics.reset_shared()
+    pool = JobWorkerPool()
+    if pool.processes > 0:
+        pool.start()
+        _JOB_WORKER_POOL = pool
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    global _JOB_WORKER_POOL
+    if _JOB_WORKER_POOL is not None:
+        _JOB_WORKER_POOL.stop()
+        _JOB_WORKER_POOL = None
+    close_llm_clients()
 
 
 def require_token(x_platform_token: str = Header(...)) -> None:
@@ -200,12 +272,18 @@ def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    """Span duration histograms of this process and the workers sharing SECRUX_AI_METRICS_DIR."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/v1/mcps", dependencies=[Depends(require_token)])
 def list_mcps(
     tenant_id: UUID = Query(..., alias="tenantId"),
     session: Session = Depends(_get_session),
 ) -> Dict[str, List[AiMcpResponse]]:
-    _ensure_builtin_mcps(tenant_id, session)
+    _ensure_builtins(tenant_id, session)
     records = session.exec(select(AiMcp).where(AiMcp.tenant_id == tenant_id)).all()
     return {"data": [to_mcp_response(record) for record in records]}
 
@@ -263,6 +341,7 @@ def delete_mcp(
     if entity is None or entity.tenant_id != tenant_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="MCP not found")
     session.delete(entity)
+    _forget_builtin_bootstrap(tenant_id, session)
     session.commit()
     return {"status": "deleted"}
 
@@ -343,13 +422,42 @@ def _extract_tar_safe(archive_path: Path, target_dir: Path) -> None:
             tf.extract(member, target_dir, set_attrs=False)
 
 
-def _ensure_builtin_mcps(tenant_id: UUID, session: Session) -> None:
+def _builtin_version() -> str:
+    material = json.dumps(
+        [[asdict(d) for d in BUILTIN_MCP_DEFINITIONS], [asdict(d) for d in BUILTIN_AGENT_DEFINITIONS]],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+_BUILTIN_VERSION = _builtin_version()
+
+
+def _forget_builtin_bootstrap(tenant_id: UUID, session: Session) -> None:
+    """Drop the tenant's bootstrap marker; the caller commits it with the deletion."""
+    session.execute(delete(AiBuiltinBootstrap).where(AiBuiltinBootstrap.tenant_id == tenant_id))
+
+
+def _ensure_builtins(tenant_id: UUID, session: Session) -> None:
+    """Create any missing builtin MCPs and agents for the tenant.
+
+    The `AiBuiltinBootstrap` row shared by all API processes records that the tenant was
+    reconciled against the current definitions, so most requests cost one primary-key lookup.
+    """
+    marker = session.get(AiBuiltinBootstrap, tenant_id)
+    if marker is not None and marker.version == _BUILTIN_VERSION:
+        return
+    mcps_by_type: Dict[str, UUID] = {}
+    for mcp_type, profile_id in session.exec(
+        select(AiMcp.type, AiMcp.profile_id).where(AiMcp.tenant_id == tenant_id)
+    ):
+        mcps_by_type.setdefault(mcp_type, profile_id)
+    agent_names = set(session.exec(select(AiAgent.name).where(AiAgent.tenant_id == tenant_id)))
+
     created = False
     for definition in BUILTIN_MCP_DEFINITIONS:
-        exists = session.exec(
-            select(AiMcp).where(AiMcp.tenant_id == tenant_id, AiMcp.type == definition.type)
-        ).first()
-        if exists:
+        if definition.type in mcps_by_type:
             continue
         entity = AiMcp(
             tenant_id=tenant_id,
@@ -361,41 +469,42 @@ def _ensure_builtin_mcps(tenant_id: UUID, session: Session) -> None:
             enabled=True,
         )
         session.add(entity)
+        mcps_by_type[definition.type] = entity.profile_id
         created = True
-    if created:
-        session.commit()
-
-
-def _ensure_builtin_agents(tenant_id: UUID, session: Session) -> None:
-    _ensure_builtin_mcps(tenant_id, session)
-    created = False
     for definition in BUILTIN_AGENT_DEFINITIONS:
-        exists = session.exec(
-            select(AiAgent).where(AiAgent.tenant_id == tenant_id, AiAgent.name == definition.name)
-        ).first()
-        if exists:
+        if definition.name in agent_names:
             continue
-        mcp = None
+        profile_id = None
         if definition.mcp_type:
-            mcp = session.exec(
-                select(AiMcp).where(AiMcp.tenant_id == tenant_id, AiMcp.type == definition.mcp_type)
-            ).first()
-            if mcp is None:
+            profile_id = mcps_by_type.get(definition.mcp_type)
+            if profile_id is None:
                 continue
-        entity = AiAgent(
-            tenant_id=tenant_id,
-            name=definition.name,
-            kind=definition.kind,
-            entrypoint=definition.entrypoint,
-            params=definition.params or {"tool": definition.tool, "builtinKey": definition.key},
-            stage_types=definition.stage_types,
-            mcp_profile_id=mcp.profile_id if mcp else None,
-            enabled=True,
+        session.add(
+            AiAgent(
+                tenant_id=tenant_id,
+                name=definition.name,
+                kind=definition.kind,
+                entrypoint=definition.entrypoint,
+                params=definition.params or {"tool": definition.tool, "builtinKey": definition.key},
+                stage_types=definition.stage_types,
+                mcp_profile_id=profile_id,
+                enabled=True,
+            )
         )
-        session.add(entity)
         created = True
     if created:
         session.commit()
+    marker = session.get(AiBuiltinBootstrap, tenant_id)
+    if marker is None:
+        marker = AiBuiltinBootstrap(tenant_id=tenant_id, version=_BUILTIN_VERSION)
+    marker.version = _BUILTIN_VERSION
+    marker.updated_at = utcnow()
+    session.add(marker)
+    try:
+        session.commit()
+    except IntegrityError:
+        # Another process reconciled the tenant concurrently and wrote the marker first.
+        session.rollback()
 
 
 @app.post("/api/v1/mcps/upload", dependencies=[Depends(require_token)])
@@ -451,7 +560,7 @@ def list_agents(
     tenant_id: UUID = Query(..., alias="tenantId"),
     session: Session = Depends(_get_session),
 ) -> Dict[str, List[AiAgentResponse]]:
-    _ensure_builtin_agents(tenant_id, session)
+    _ensure_builtins(tenant_id, session)
     records = session.exec(select(AiAgent).where(AiAgent.tenant_id == tenant_id)).all()
     return {"data": [to_agent_response(record) for record in records]}
 
@@ -504,6 +613,7 @@ def create_knowledge_entry(
     session.add(entity)
     session.commit()
     session.refresh(entity)
+    index_knowledge_entry(entity)
     return to_knowledge_response(entity)
 
 
@@ -522,9 +632,12 @@ def update_knowledge_entry(
     entity.tags = request.tags
     entity.source_uri = request.sourceUri
     entity.embedding = request.embedding
+    # Other processes' vector indexes detect edits through `updated_at`.
+    entity.updated_at = utcnow()
     session.add(entity)
     session.commit()
     session.refresh(entity)
+    index_knowledge_entry(entity)
     return to_knowledge_response(entity)
 
 
@@ -539,6 +652,7 @@ def delete_knowledge_entry(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Knowledge entry not found")
     session.delete(entity)
     session.commit()
+    unindex_knowledge_entry(tenant_id, entry_id)
     return {"status": "deleted"}
 
 
@@ -553,6 +667,9 @@ def search_knowledge(
         limit=max(1, min(request.limit, 20)),
         tags=request.tags,
         session=session,
+        mode=request.mode,
+        embedding=request.embedding,
+        alpha=request.alpha,
     )
     return {"data": hits}
 
@@ -590,6 +707,7 @@ def delete_agent(
     if entity is None or entity.tenant_id != tenant_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
     session.delete(entity)
+    _forget_builtin_bootstrap(tenant_id, session)
     session.commit()
     return {"status": "deleted"}
 
@@ -661,17 +779,8 @@ def upload_agent(
     return to_agent_response(entity)
 
 
-@app.post("/api/v1/jobs/reviews", dependencies=[Depends(require_token)])
-def submit_job(
-    request: AiJobRequest,
-    background_tasks: BackgroundTasks,
-    session: Session = Depends(_get_session),
-) -> AiJobResponse:
-    context = dict(request.context or {})
-    if request.agent:
-        context["agent"] = request.agent
-
-    payload = dict(request.payload or {})
+def _split_job_secret(raw_payload: Dict[str, Any]) -> tuple[Dict[str, Any], dict[str, str] | None]:
+    payload = dict(raw_payload or {})
     secret: dict[str, str] | None = None
     ai_client = payload.get("aiClient")
     if isinstance(ai_client, dict):
@@ -681,6 +790,19 @@ def submit_job(
             redacted = dict(ai_client)
             redacted.pop("apiKey", None)
             payload["aiClient"] = redacted
+    return payload, secret
+
+
+@app.post("/api/v1/jobs/reviews", dependencies=[Depends(require_token)])
+def submit_job(
+    request: AiJobRequest,
+    session: Session = Depends(_get_session),
+) -> AiJobResponse:
+    context = dict(request.context or {})
+    if request.agent:
+        context["agent"] = request.agent
+
+    payload, secret = _split_job_secret(request.payload)
     job = AiJob(
         tenant_id=request.tenantId,
         job_type=request.jobType,
@@ -690,297 +812,85 @@ def submit_job(
         status="QUEUED",
     )
     session.add(job)
+    if secret:
+        store_job_secret(job.job_id, secret, session)
     session.commit()
     session.refresh(job)
-    if secret:
-        with _JOB_SECRETS_LOCK:
-            _JOB_SECRETS[job.job_id] = secret
-    background_tasks.add_task(_execute_review_job, job.job_id)
-    return to_job_response(job)
-
-
-@app.get("/api/v1/jobs/{job_id}", dependencies=[Depends(require_token)])
-def get_job(job_id: UUID, session: Session = Depends(_get_session)) -> AiJobResponse:
-    job = session.get(AiJob, job_id)
-    if job is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="job not found")
     return to_job_response(job)
 
 
-def _execute_review_job(job_id: UUID) -> None:
-    from datetime import datetime, timezone
-
-    from sqlmodel import select
-
-    from secrux_ai.config import AgentConfig, CallbackConfig, PlatformConfig
-    from secrux_ai.models import StageEvent, StageSignals, StageStatus, StageType
-    from secrux_ai.orchestrator import AgentOrchestrator
-
-    def now_utc() -> datetime:
-        return datetime.now(timezone.utc)
-
-    def resolve_stage_status(value: object) -> StageStatus:
-        if isinstance(value, str):
-            try:
-                return StageStatus(value)
-            except Exception:
-                return StageStatus.SUCCEEDED
-        return StageStatus.SUCCEEDED
-
-    def resolve_mode(context: dict) -> str:
-        mode = context.get("mode")
-        if isinstance(mode, str) and mode.strip():
-            return mode.strip().lower()
-        return "simple"
-
-    def build_event(job: AiJob, secret: dict[str, str] | None) -> StageEvent:
-        created_at = job.created_at
-        updated_at = job.updated_at or created_at
-        ctx = job.context or {}
-        status = resolve_stage_status(ctx.get("status"))
-
-        if job.job_type == "FINDING_REVIEW":
-            finding_payload = {}
-            payload_finding = (job.payload or {}).get("finding")
-            if isinstance(payload_finding, dict):
-                finding_payload = payload_finding
-            ai_client = (job.payload or {}).get("aiClient")
-            if isinstance(ai_client, dict) and secret and secret.get("apiKey"):
-                ai_client = dict(ai_client)
-                ai_client["apiKey"] = secret["apiKey"]
-            task_id = finding_payload.get("taskId") or job.target_id
-            stage_id = finding_payload.get("findingId") or job.target_id
-            mode = resolve_mode(job.context or {})
-            return StageEvent(
-                tenantId=str(job.tenant_id),
-                taskId=str(task_id),
-                stageId=str(stage_id),
-                stageType=StageType.RESULT_REVIEW,
-                status=status,
-                startedAt=created_at,
-                endedAt=updated_at,
-                extra={"jobId": str(job.job_id), "mode": mode, "finding": finding_payload, "aiClient": ai_client},
-            )
+@app.post("/api/v1/jobs/reviews:batch", dependencies=[Depends(require_token)])
+def submit_job_batch(
+    request: AiJobBatchRequest,
+    session: Session = Depends(_get_session),
+) -> AiJobBatchResponse:
+    if not request.items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="items must not be empty")
+    if len(request.items) > JOB_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"batch exceeds {JOB_BATCH_MAX_ITEMS} items",
+        )
 
-        if job.job_type == "SCA_ISSUE_REVIEW":
-            issue_payload = {}
-            payload_issue = (job.payload or {}).get("scaIssue")
-            if isinstance(payload_issue, dict):
-                issue_payload = payload_issue
-            ai_client = (job.payload or {}).get("aiClient")
-            if isinstance(ai_client, dict) and secret and secret.get("apiKey"):
-                ai_client = dict(ai_client)
-                ai_client["apiKey"] = secret["apiKey"]
-            task_id = issue_payload.get("taskId") or job.target_id
-            stage_id = issue_payload.get("issueId") or job.target_id
-            mode = resolve_mode(job.context or {})
-            return StageEvent(
-                tenantId=str(job.tenant_id),
-                taskId=str(task_id),
-                stageId=str(stage_id),
-                stageType=StageType.RESULT_REVIEW,
-                status=status,
-                startedAt=created_at,
-                endedAt=updated_at,
-                extra={"jobId": str(job.job_id), "mode": mode, "scaIssue": issue_payload, "aiClient": ai_client},
+    items: List[AiJob] = []
+    for entry in request.items:
+        job_type = entry.jobType or request.jobType
+        if job_type not in BATCH_ITEM_JOB_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported batch jobType '{job_type}'",
             )
-
-        payload = dict(job.payload or {})
-        ai_client = payload.get("aiClient")
-        if isinstance(ai_client, dict) and secret and secret.get("apiKey"):
-            ai_client = dict(ai_client)
-            ai_client["apiKey"] = secret["apiKey"]
-            payload["aiClient"] = ai_client
-
-        context_text = payload.get("context")
-        log_excerpt = context_text.splitlines() if isinstance(context_text, str) else []
-        needs_ai_review = ctx.get("needsAiReview")
-        signals = StageSignals(needsAiReview=bool(needs_ai_review) if needs_ai_review is not None else False)
-        return StageEvent(
-            tenantId=str(job.tenant_id),
-            taskId=job.target_id,
-            stageId=job.target_id,
-            stageType=StageType.RESULT_REVIEW,
-            status=status,
-            startedAt=created_at,
-            endedAt=updated_at,
-            log_excerpt=log_excerpt,
-            signals=signals,
-            extra={"jobType": job.job_type, "payload": payload},
+        context = {**(request.context or {}), **(entry.context or {})}
+        agent = entry.agent or request.agent
+        if agent:
+            context["agent"] = agent
+        payload, secret = _split_job_secret(entry.payload)
+        item = AiJob(
+            tenant_id=request.tenantId,
+            job_type=job_type,
+            target_id=entry.targetId,
+            payload=payload,
+            context=context,
+            status=BATCH_ITEM_STATUS,
         )
+        session.add(item)
+        if secret:
+            store_job_secret(item.job_id, secret, session)
+        items.append(item)
 
-    def build_platform_config(job: AiJob, session: Session) -> PlatformConfig:
-        ctx = job.context or {}
-        mode = resolve_mode(ctx)
-        requested_agent = ctx.get("agent")
-        agent_configs: list[AgentConfig] = []
-
-        if isinstance(requested_agent, str) and requested_agent.strip():
-            agent_name = requested_agent.strip()
-            from .models import AiAgent
-
-            entity = session.exec(
-                select(AiAgent).where(AiAgent.tenant_id == job.tenant_id, AiAgent.name == agent_name)
-            ).first()
-            if entity is not None and entity.enabled:
-                params = dict(entity.params or {})
-                if "mode" not in params and mode:
-                    params["mode"] = mode
-                agent_configs.append(
-                    AgentConfig(
-                        name=entity.name,
-                        kind=entity.kind,
-                        entrypoint=entity.entrypoint,
-                        enabled=True,
-                        params=params,
-                        stageTypes=entity.stage_types,
-                        mcpProfile=str(entity.mcp_profile_id) if entity.mcp_profile_id else None,
-                    )
-                )
-            else:
-                # Treat the request value as a builtin kind.
-                agent_configs.append(AgentConfig(name=agent_name, kind=agent_name, enabled=True, params={"mode": mode}))
-        else:
-            if job.job_type == "FINDING_REVIEW":
-                agent_configs.append(
-                    AgentConfig(name="vuln-review", kind="vuln-review", enabled=True, params={"mode": mode})
-                )
-            elif job.job_type == "SCA_ISSUE_REVIEW":
-                agent_configs.append(
-                    AgentConfig(name="sca-issue-review", kind="sca-issue-review", enabled=True, params={"mode": mode})
-                )
-            else:
-                agent_configs.append(AgentConfig(name="signal", kind="signal", enabled=True))
-                agent_configs.append(AgentConfig(name="log", kind="log", enabled=True))
-
-        return PlatformConfig(agents=agent_configs, callbacks=CallbackConfig(mode="stdout"))
-
-    def summarize_result(findings: list[dict]) -> str:
-        if not findings:
-            return "AI review completed (no findings)"
-        top = findings[0]
-        if isinstance(top, dict):
-            return top.get("summary") or "AI review completed"
-        return "AI review completed"
-
-    def resolve_severity(findings: list[dict]) -> str:
-        order = {"CRITICAL": 5, "HIGH": 4, "MEDIUM": 3, "LOW": 2, "INFO": 1}
-        severity = "INFO"
-        best = 0
-        for finding in findings:
-            sev = finding.get("severity") if isinstance(finding, dict) else None
-            if isinstance(sev, str) and order.get(sev, 0) > best:
-                best = order[sev]
-                severity = sev
-        return severity
-
-    def extract_top(values: object) -> dict | None:
-        if not isinstance(values, list) or not values:
-            return None
-        top = values[0]
-        return top if isinstance(top, dict) else None
-
-    def extract_suggested_status(top: dict | None) -> str | None:
-        if not top:
-            return None
-        status = top.get("status")
-        return status if isinstance(status, str) else None
-
-    def extract_llm(top: dict | None) -> dict | None:
-        if not top:
-            return None
-        details = top.get("details")
-        if not isinstance(details, dict):
-            return None
-        llm = details.get("llm")
-        return llm if isinstance(llm, dict) else None
-
-    def extract_opinion_i18n(top: dict | None) -> dict | None:
-        if not top:
-            return None
-        details = top.get("details")
-        if not isinstance(details, dict):
-            return None
-        opinion = details.get("opinionI18n")
-        return opinion if isinstance(opinion, dict) else None
-
-    def extract_confidence(llm: dict | None) -> float | None:
-        if not llm:
-            return None
-        value = llm.get("confidence")
-        if isinstance(value, (int, float)):
-            return float(value)
-        try:
-            return float(str(value))
-        except Exception:
-            return None
-
-    with get_session() as session:
-        job = session.get(AiJob, job_id)
-        if job is None:
-            return
-        job.status = "RUNNING"
-        job.updated_at = now_utc()
-        session.add(job)
-        session.commit()
+    batch = AiJob(
+        tenant_id=request.tenantId,
+        job_type=BATCH_JOB_TYPE,
+        target_id=f"batch:{len(items)}",
+        payload={"jobIds": [str(item.job_id) for item in items]},
+        context={},
+        status="QUEUED",
+    )
+    for item in items:
+        item.context = {**item.context, "batchJobId": str(batch.job_id)}
+    session.add(batch)
+    session.commit()
+    session.refresh(batch)
+    for item in items:
+        session.refresh(item)
+    return AiJobBatchResponse(job=to_job_response(batch), items=[to_job_response(item) for item in items])
+
+
+@app.get("/api/v1/jobs/reviews:batch/{job_id}", dependencies=[Depends(require_token)])
+def get_job_batch(job_id: UUID, session: Session = Depends(_get_session)) -> AiJobBatchResponse:
+    batch = session.get(AiJob, job_id)
+    if batch is None or batch.job_type != BATCH_JOB_TYPE:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="batch job not found")
+    items = [session.get(AiJob, UUID(str(item_id))) for item_id in (batch.payload or {}).get("jobIds", [])]
+    return AiJobBatchResponse(
+        job=to_job_response(batch),
+        items=[to_job_response(item) for item in items if item is not None],
+    )
 
-    secret: dict[str, str] | None = None
-    with _JOB_SECRETS_LOCK:
-        secret = _JOB_SECRETS.get(job_id)
 
-    try:
-        with get_session() as session:
-            job = session.get(AiJob, job_id)
-            if job is None:
-                return
-
-            from fastapi.encoders import jsonable_encoder
-
-            event = build_event(job, secret)
-            platform_config = build_platform_config(job, session)
-            with AgentOrchestrator(platform_config) as orchestrator:
-                recommendation = orchestrator.process(event)
-            recommendation_payload = recommendation.model_dump(mode="json", by_alias=True)
-            findings = recommendation_payload.get("findings", [])
-            top_finding = extract_top(findings)
-            llm = extract_llm(top_finding)
-            suggested_status = extract_suggested_status(top_finding)
-            severity = resolve_severity(findings) if isinstance(findings, list) else "INFO"
-            verdict = (llm.get("verdict") if llm else None) or "UNCERTAIN"
-            confidence = extract_confidence(llm) or 0.6
-            opinion_i18n = (llm.get("opinionI18n") if llm else None) or extract_opinion_i18n(top_finding)
-            fix_hint = llm.get("fixHint") if llm else None
-            if not fix_hint and isinstance(opinion_i18n, dict):
-                en_opinion = opinion_i18n.get("en")
-                if isinstance(en_opinion, dict):
-                    fix_hint = en_opinion.get("fixHint")
-            result = {
-                "reviewType": "AI",
-                "verdict": verdict,
-                "severity": severity,
-                "suggestedStatus": suggested_status,
-                "confidence": confidence,
-                "summary": summarize_result(findings) if isinstance(findings, list) else "AI review completed",
-                "fixHint": fix_hint,
-                "opinionI18n": opinion_i18n,
-                "recommendation": recommendation_payload,
-            }
-
-            job.status = "COMPLETED"
-            job.updated_at = now_utc()
-            job.result = jsonable_encoder(result)
-            session.add(job)
-            session.commit()
-    except Exception as exc:
-        with get_session() as session:
-            job = session.get(AiJob, job_id)
-            if job is None:
-                return
-            job.status = "FAILED"
-            job.updated_at = now_utc()
-            job.error = str(exc)
-            session.add(job)
-            session.commit()
-    finally:
-        with _JOB_SECRETS_LOCK:
-            _JOB_SECRETS.pop(job_id, None)
+@app.get("/api/v1/jobs/{job_id}", dependencies=[Depends(require_token)])
+def get_job(job_id: UUID, session: Session = Depends(_get_session)) -> AiJobResponse:
+    job = session.get(AiJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="job not found")
+    return to_job_response(job)
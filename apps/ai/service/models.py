@@ -53,10 +53,37 @@ class AiJob(SQLModel, table=True):
     status: str
     result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONType))
     error: Optional[str] = None
+    # Token of the worker run that claimed the job; its heartbeat keeps `updated_at` fresh.
+    lease_owner: Optional[str] = Field(default=None, alias="leaseOwner")
+    # Runs started for the job; a job whose worker keeps dying fails after AI_JOB_MAX_ATTEMPTS.
+    attempts: Optional[int] = Field(default=0)
     created_at: datetime = Field(default_factory=utcnow, alias="createdAt")
     updated_at: datetime = Field(default_factory=utcnow, alias="updatedAt")
 
 
+class AiJobSecret(SQLModel, table=True):
+    """Short-lived credentials for a queued job, removed once the job finishes.
+
+    `secret` holds `{"ciphertext": <Fernet token>}` encrypted with AI_JOB_SECRET_KEY.
+    """
+
+    job_id: uuid.UUID = Field(primary_key=True, alias="jobId")
+    secret: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONType))
+    created_at: datetime = Field(default_factory=utcnow, alias="createdAt")
+
+
+class AiBuiltinBootstrap(SQLModel, table=True):
+    """Marks a tenant's builtin MCPs/agents as reconciled against definitions `version`.
+
+    Shared by every API process; deleting an MCP or agent removes the row so the next
+    request recreates missing builtins whichever process serves it.
+    """
+
+    tenant_id: uuid.UUID = Field(primary_key=True, alias="tenantId")
+    version: str
+    updated_at: datetime = Field(default_factory=utcnow, alias="updatedAt")
+
+
 class KnowledgeEntry(SQLModel, table=True):
     entry_id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, alias="entryId")
     tenant_id: uuid.UUID = Field(index=True, alias="tenantId")
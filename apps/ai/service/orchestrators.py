@@ -0,0 +1,157 @@
+"""Warm orchestrators shared by the review jobs of a worker.
+
+Building an `AgentOrchestrator` resolves agent classes, instantiates the agents, opens
+MCP clients (with their connection pools) and a callback sink. Jobs of the same tenant
+and configuration reuse one orchestrator instead: entries are keyed by tenant and a
+fingerprint of the resolved `PlatformConfig`, and handed out as leases so several
+in-flight jobs can share an entry while it is never closed under them.
+
+Workers run in their own processes, so edits made through `update_agent`/`update_mcp`
+are not signalled to them. They do not need to be: an edited agent or MCP row changes
+the resolved configuration and therefore the fingerprint, so the next job builds a new
+entry, and the entry it replaces for the same slot (tenant, job type, agent, mode) is
+retired and closed once its last lease ends. Entries idle for longer than
+AI_ORCHESTRATOR_IDLE_SECONDS, and the least recently used ones beyond
+AI_ORCHESTRATOR_CACHE_SIZE, are closed the same way.
+
+Configuration:
+- AI_ORCHESTRATOR_CACHE_SIZE: orchestrators kept per worker process (default 64, 0 disables reuse)
+- AI_ORCHESTRATOR_IDLE_SECONDS: close orchestrators unused for this long (default 600)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Tuple
+
+from secrux_ai.config import PlatformConfig
+from secrux_ai.orchestrator import AgentOrchestrator
+from secrux_ai.tracing import span
+
+ORCHESTRATOR_CACHE_SIZE = int(os.getenv("AI_ORCHESTRATOR_CACHE_SIZE", "64"))
+ORCHESTRATOR_IDLE_SECONDS = float(os.getenv("AI_ORCHESTRATOR_IDLE_SECONDS", "600"))
+
+# (tenant id, job type, requested agent, mode): jobs that resolve their config the same way.
+Slot = Tuple[str, str, str, str]
+_Key = Tuple[str, str]
+
+
+def config_fingerprint(config: PlatformConfig) -> str:
+    return hashlib.sha256(config.model_dump_json(by_alias=True).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    orchestrator: AgentOrchestrator
+    slot: Slot
+    leases: int = 0
+    last_used: float = 0.0
+    retired: bool = False
+
+
+class OrchestratorCache:
+    def __init__(self, max_entries: int = ORCHESTRATOR_CACHE_SIZE, idle_seconds: float = ORCHESTRATOR_IDLE_SECONDS) -> None:
+        self.max_entries = max(0, max_entries)
+        self.idle_seconds = idle_seconds
+        self._entries: "OrderedDict[_Key, _Entry]" = OrderedDict()
+        self._slots: Dict[Slot, _Key] = {}
+        self._stale: List[AgentOrchestrator] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def acquire(self, slot: Slot, config: PlatformConfig) -> Tuple[_Key, AgentOrchestrator, bool]:
+        """Lease the orchestrator for `config`, building it on a miss; returns (key, orchestrator, warm)."""
+        key = (slot[0], config_fingerprint(config))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._lease(slot, key, entry)
+                return key, entry.orchestrator, True
+        # Construction may import entrypoints; do it outside the lock.
+        orchestrator = AgentOrchestrator(config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Another thread built the same configuration meanwhile; keep theirs.
+                self._stale.append(orchestrator)
+                self._lease(slot, key, entry)
+                return key, entry.orchestrator, True
+            entry = self._entries[key] = _Entry(orchestrator, slot)
+            self._lease(slot, key, entry)
+            return key, orchestrator, False
+
+    def _lease(self, slot: Slot, key: _Key, entry: _Entry) -> None:
+        entry.leases += 1
+        entry.retired = False
+        entry.slot = slot
+        self._entries.move_to_end(key)
+        previous = self._slots.get(slot)
+        self._slots[slot] = key
+        if previous is not None and previous != key and previous not in self._slots.values():
+            # The slot's configuration changed (an agent or MCP row was edited).
+            stale = self._entries.get(previous)
+            if stale is not None:
+                stale.retired = True
+
+    def release(self, key: _Key) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.leases -= 1
+                entry.last_used = time.monotonic()
+
+    def _collect(self) -> List[AgentOrchestrator]:
+        """Detach retired, idle and surplus entries that have no leases."""
+        now = time.monotonic()
+        with self._lock:
+            closing, self._stale = self._stale, []
+            surplus = len(self._entries) - self.max_entries
+            for key, entry in list(self._entries.items()):
+                if entry.leases > 0:
+                    continue
+                if entry.retired or surplus > 0 or now - entry.last_used >= self.idle_seconds:
+                    del self._entries[key]
+                    for slot in [slot for slot, target in self._slots.items() if target == key]:
+                        del self._slots[slot]
+                    closing.append(entry.orchestrator)
+                    surplus -= 1
+            return closing
+
+    async def collect(self) -> int:
+        """Close the orchestrators `_collect` detached; returns how many were closed."""
+        closing = self._collect()
+        for orchestrator in closing:
+            try:
+                await orchestrator.aclose()
+            except Exception:
+                # A client that fails to close must not fail the job that released it.
+                pass
+        return len(closing)
+
+    @asynccontextmanager
+    async def lease(self, slot: Slot, config: PlatformConfig) -> AsyncIterator[AgentOrchestrator]:
+        with span("orchestrator.acquire") as attrs:
+            key, orchestrator, attrs["warm"] = self.acquire(slot, config)
+        try:
+            yield orchestrator
+        finally:
+            self.release(key)
+            await self.collect()
+
+    async def aclose(self) -> None:
+        """Close every orchestrator; used when the worker shuts down."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry.retired = True
+        await self.collect()
+
+
+ORCHESTRATORS = OrchestratorCache()
@@ -80,6 +80,27 @@ class AiJobResponse(BaseModel):
     error: Optional[str] = None
 
 
+class AiJobBatchItem(BaseModel):
+    targetId: str
+    jobType: Optional[str] = None
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    context: Dict[str, Any] = Field(default_factory=dict)
+    agent: Optional[str] = None
+
+
+class AiJobBatchRequest(BaseModel):
+    tenantId: UUID
+    jobType: str = "FINDING_REVIEW"
+    items: List[AiJobBatchItem] = Field(default_factory=list)
+    context: Dict[str, Any] = Field(default_factory=dict)
+    agent: Optional[str] = None
+
+
+class AiJobBatchResponse(BaseModel):
+    job: AiJobResponse
+    items: List[AiJobResponse]
+
+
 class KnowledgeEntryRequest(BaseModel):
     title: str
     body: str
@@ -106,6 +127,9 @@ class KnowledgeSearchRequest(BaseModel):
     query: str
     limit: int = 5
     tags: List[str] = Field(default_factory=list)
+    mode: str = "lexical"  # lexical | vector | hybrid
+    embedding: Optional[List[float]] = None
+    alpha: float = 0.5
 
 
 class KnowledgeSearchHit(BaseModel):
@@ -0,0 +1,292 @@
+"""Durable review-job queue backed by the `AiJob` table.
+
+The API only inserts `QUEUED` rows; a pool of worker processes claims them atomically
+and runs `service.jobs.aexecute_job`. Workers can run embedded in the API process
+(`AI_JOB_WORKERS`) or standalone on any node that shares the database:
+
+    python -m service.worker --processes 4 --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+
+from .database import get_session, init_db
+from .jobs import BATCH_ITEM_STATUS, BATCH_JOB_TYPE, FINAL_STATUSES, aexecute_job, ensure_job_secret_key, sweep_job_secrets
+from .models import AiJob, utcnow
+from .orchestrators import ORCHESTRATORS
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "1"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("AI_JOB_WORKER_CONCURRENCY", "64"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("AI_JOB_POLL_INTERVAL_SECONDS", "1.0"))
+JOB_LEASE_SECONDS = int(os.getenv("AI_JOB_LEASE_SECONDS", "1800"))
+JOB_MAX_ATTEMPTS = max(1, int(os.getenv("AI_JOB_MAX_ATTEMPTS", "3")))
+
+_CLAIM_ATTEMPTS = 5
+
+
+def claim_next_job(session: Session) -> Optional[Tuple[UUID, str]]:
+    """Atomically move the oldest QUEUED job to RUNNING; returns (job id, lease token).
+
+    The job's `lease_owner` is set to a fresh token that the run passes to
+    `aexecute_job`, which heartbeats the row and only records results while it still
+    holds the token.
+
+    On Postgres the candidate row is locked with `FOR UPDATE SKIP LOCKED`, so concurrent
+    workers never contend for the same job. Other dialects (SQLite in local development)
+    fall back to an optimistic compare-and-set on the status column.
+    """
+    candidates = (
+        select(AiJob.job_id)
+        .where(AiJob.status == "QUEUED")
+        .order_by(AiJob.created_at)
+        .limit(1)
+    )
+    lease = uuid4().hex
+    if session.get_bind().dialect.name == "postgresql":
+        job_id = session.exec(candidates.with_for_update(skip_locked=True)).first()
+        if job_id is None:
+            session.rollback()
+            return None
+        session.execute(
+            update(AiJob)
+            .where(AiJob.job_id == job_id)
+            .values(
+                status="RUNNING",
+                lease_owner=lease,
+                attempts=func.coalesce(AiJob.attempts, 0) + 1,
+                updated_at=utcnow(),
+            )
+        )
+        session.commit()
+        return job_id, lease
+
+    for _ in range(_CLAIM_ATTEMPTS):
+        job_id = session.exec(candidates).first()
+        if job_id is None:
+            return None
+        claimed = session.execute(
+            update(AiJob)
+            .where(AiJob.job_id == job_id, AiJob.status == "QUEUED")
+            .values(
+                status="RUNNING",
+                lease_owner=lease,
+                attempts=func.coalesce(AiJob.attempts, 0) + 1,
+                updated_at=utcnow(),
+            )
+        )
+        session.commit()
+        if claimed.rowcount == 1:
+            return job_id, lease
+    return None
+
+
+def requeue_stale_jobs(
+    session: Session, lease_seconds: int = JOB_LEASE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS
+) -> int:
+    """Return RUNNING jobs whose worker died (no heartbeat within the lease) to the queue.
+
+    Clearing `lease_owner` makes the old run's result writes no-ops should it still be alive.
+    Batch items are never queued on their own: they go back to BATCHED and are rerun
+    by their batch job, which is requeued like any other job. Jobs that already used
+    `max_attempts` runs are marked FAILED instead, together with the unfinished items of
+    a failed batch, so a job that crashes its worker is not retried forever. The same pass
+    deletes the staged secrets of jobs that are already final, e.g. left behind by a
+    crashed worker.
+    """
+    cutoff = utcnow() - timedelta(seconds=lease_seconds)
+    stale = session.exec(
+        select(AiJob.job_id, AiJob.job_type, AiJob.context, AiJob.attempts).where(
+            AiJob.status == "RUNNING", AiJob.updated_at < cutoff
+        )
+    ).all()
+    retry = [row for row in stale if (row.attempts or 0) < max_attempts]
+    requeued = 0
+    for status, job_ids in (
+        ("QUEUED", [row.job_id for row in retry if not (row.context or {}).get("batchJobId")]),
+        (BATCH_ITEM_STATUS, [row.job_id for row in retry if (row.context or {}).get("batchJobId")]),
+    ):
+        if not job_ids:
+            continue
+        result = session.execute(
+            update(AiJob)
+            # Re-check staleness: a heartbeat may have landed since the select.
+            .where(AiJob.job_id.in_(job_ids), AiJob.status == "RUNNING", AiJob.updated_at < cutoff)
+            .values(status=status, lease_owner=None, updated_at=utcnow())
+        )
+        if status == "QUEUED":
+            requeued = result.rowcount or 0
+    failed = 0
+    for row in stale:
+        if (row.attempts or 0) >= max_attempts:
+            failed += _fail_abandoned(session, row.job_id, row.job_type, row.attempts, cutoff)
+    swept = sweep_job_secrets(session)
+    session.commit()
+    if failed:
+        logger.warning("Failed %s review job(s) abandoned after %s attempts", failed, max_attempts)
+    if swept:
+        logger.info("Deleted %s secret(s) of finished review jobs", swept)
+    return requeued
+
+
+def _fail_abandoned(
+    session: Session, job_id: UUID, job_type: str, attempts: int, cutoff: datetime
+) -> int:
+    error = f"Abandoned after {attempts} attempts: the worker stopped responding"
+    result = session.execute(
+        update(AiJob)
+        .where(AiJob.job_id == job_id, AiJob.status == "RUNNING", AiJob.updated_at < cutoff)
+        .values(status="FAILED", error=error, lease_owner=None, updated_at=utcnow())
+    )
+    if not result.rowcount:
+        return 0
+    if job_type == BATCH_JOB_TYPE:
+        batch = session.get(AiJob, job_id)
+        item_ids = [UUID(str(value)) for value in (batch.payload or {}).get("jobIds", [])]
+        session.execute(
+            update(AiJob)
+            .where(AiJob.job_id.in_(item_ids), AiJob.status.notin_(FINAL_STATUSES))
+            .values(status="FAILED", error=error, lease_owner=None, updated_at=utcnow())
+        )
+    return 1
+
+
+def _claim(lease_check: bool) -> Optional[Tuple[UUID, str]]:
+    with get_session() as session:
+        if lease_check:
+            requeued = requeue_stale_jobs(session)
+            if requeued:
+                logger.warning("Requeued %s stale review job(s)", requeued)
+        return claim_next_job(session)
+
+
+async def _arun_worker(concurrency: int, poll_interval: float, stop_event) -> None:
+    in_flight: Set[asyncio.Task] = set()
+    last_requeue = float("-inf")
+    while not stop_event.is_set():
+        if len(in_flight) >= concurrency:
+            await asyncio.wait(in_flight, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+            continue
+        now = time.monotonic()
+        lease_check = now - last_requeue >= JOB_LEASE_SECONDS / 2
+        try:
+            claimed = await asyncio.to_thread(_claim, lease_check)
+            if lease_check:
+                last_requeue = now
+        except Exception:
+            logger.exception("Failed to claim review job")
+            claimed = None
+        if claimed is None:
+            await asyncio.sleep(poll_interval)
+            continue
+        task = asyncio.create_task(aexecute_job(*claimed))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.wait(in_flight)
+    await ORCHESTRATORS.aclose()
+
+
+def run_worker(
+    concurrency: int = JOB_WORKER_CONCURRENCY,
+    poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+    stop_event=None,
+) -> None:
+    """Drain the queue in the current process until `stop_event` is set.
+
+    Jobs run as tasks on one event loop, so `concurrency` bounds in-flight reviews rather
+    than threads; only the blocking database calls use the loop's thread pool.
+    """
+    stop_event = stop_event or threading.Event()
+    asyncio.run(_arun_worker(max(1, concurrency), poll_interval, stop_event))
+
+
+def _worker_process_main(concurrency: int, poll_interval: float, stop_event) -> None:
+    # The parent handles SIGINT and stops children through the shared event.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(concurrency=concurrency, poll_interval=poll_interval, stop_event=stop_event)
+
+
+class JobWorkerPool:
+    """A set of worker processes draining the review queue."""
+
+    def __init__(
+        self,
+        processes: int = JOB_WORKERS,
+        concurrency: int = JOB_WORKER_CONCURRENCY,
+        poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+    ) -> None:
+        self.processes = max(0, processes)
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        # `spawn` keeps children clear of the parent's DB connections and event loop.
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop_event = self._ctx.Event()
+        self._workers: List[multiprocessing.process.BaseProcess] = []
+
+    def start(self) -> None:
+        for idx in range(self.processes):
+            process = self._ctx.Process(
+                target=_worker_process_main,
+                args=(self.concurrency, self.poll_interval, self._stop_event),
+                name=f"secrux-ai-worker-{idx}",
+                daemon=True,
+            )
+            process.start()
+            self._workers.append(process)
+
+    def request_stop(self) -> None:
+        self._stop_event.set()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        self.request_stop()
+        for process in self._workers:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(5)
+        self._workers.clear()
+
+    def join(self) -> None:
+        for process in self._workers:
+            process.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Drain queued Secrux AI review jobs.")
+    parser.add_argument("--processes", type=int, default=max(1, JOB_WORKERS), help="Worker processes")
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY, help="Jobs per process")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL_SECONDS, help="Idle poll interval (s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    ensure_job_secret_key()
+    pool = JobWorkerPool(processes=args.processes, concurrency=args.concurrency, poll_interval=args.poll_interval)
+    pool.start()
+    signal.signal(signal.SIGTERM, lambda *_: pool.request_stop())
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
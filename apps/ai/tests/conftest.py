@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The service engine is created at import time, so point it at a scratch database first.
+_DB_DIR = tempfile.mkdtemp(prefix="secrux-ai-tests-")
+os.environ["AI_DATABASE_URL"] = f"sqlite:///{_DB_DIR}/ai_service.db"
+os.environ["SECRUX_AI_METRICS_DIR"] = ""
+os.environ["SECRUX_AI_LLM_CACHE"] = "off"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def db():
+    """Fresh tables for each test."""
+    from sqlmodel import SQLModel
+
+    from service.database import engine, init_db
+
+    SQLModel.metadata.drop_all(engine)
+    init_db()
+    yield engine
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlmodel import select
+
+from service.database import get_session
+from service.main import _ensure_builtins, delete_agent
+from service.models import AiAgent, AiBuiltinBootstrap
+
+
+def _agent_names(tenant: uuid.UUID) -> set:
+    with get_session() as session:
+        return set(session.exec(select(AiAgent.name).where(AiAgent.tenant_id == tenant)))
+
+
+def test_deleted_builtin_is_recreated_by_any_process(db):
+    tenant = uuid.uuid4()
+    with get_session() as session:
+        _ensure_builtins(tenant, session)
+    names = _agent_names(tenant)
+    assert names
+
+    # Stand-in for another API process: it deletes through its own session, and nothing
+    # in this process is told about it except the shared marker row.
+    with get_session() as session:
+        agent = session.exec(select(AiAgent).where(AiAgent.tenant_id == tenant)).first()
+        deleted = agent.name
+        delete_agent(agent.agent_id, tenant_id=tenant, session=session)
+    with get_session() as session:
+        assert session.get(AiBuiltinBootstrap, tenant) is None
+    assert deleted not in _agent_names(tenant)
+
+    with get_session() as session:
+        _ensure_builtins(tenant, session)
+    assert _agent_names(tenant) == names
+    with get_session() as session:
+        assert session.get(AiBuiltinBootstrap, tenant) is not None
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import itertools
+from typing import Dict, List
+
+from secrux_ai.call_chains import build_call_chains, shortest_chains
+
+
+def _graph(edges: List[tuple], roles: Dict[str, str] | None = None):
+    ids = sorted({node for edge in edges for node in edge} | set(roles or {}))
+    nodes = [{"id": node, "role": (roles or {}).get(node, "")} for node in ids]
+    return nodes, [{"source": s, "target": t} for s, t in edges]
+
+
+def _all_simple_paths(edges, source, sink, max_depth):
+    outgoing: Dict[str, List[str]] = {}
+    for s, t in edges:
+        outgoing.setdefault(s, []).append(t)
+    paths, stack = [], [[source]]
+    while stack:
+        path = stack.pop()
+        if path[-1] == sink:
+            paths.append(path)
+            continue
+        for nxt in outgoing.get(path[-1], []):
+            if nxt not in path and len(path) < max_depth:
+                stack.append(path + [nxt])
+    return paths
+
+
+def test_chains_are_simple_and_shortest_first():
+    edges = [("src", "a"), ("a", "b"), ("b", "sink"), ("src", "sink"), ("a", "sink"), ("b", "a"), ("b", "c"), ("c", "sink")]
+    nodes, edge_dicts = _graph(edges, {"src": "SOURCE", "sink": "SINK"})
+
+    chains = shortest_chains(nodes, edge_dicts, max_chains=10)
+
+    expected = _all_simple_paths(edges, "src", "sink", max_depth=200)
+    assert sorted(map(tuple, chains)) == sorted(map(tuple, expected))
+    assert [len(chain) for chain in chains] == sorted(len(chain) for chain in chains)
+    assert chains[0] == ["src", "sink"]
+    assert all(len(set(chain)) == len(chain) for chain in chains)
+
+
+def test_max_chains_keeps_the_shortest():
+    # A ladder has exponentially many paths; only the shortest few are wanted.
+    edges = []
+    for level in range(12):
+        for a, b in itertools.product("xy", repeat=2):
+            edges.append((f"{a}{level}", f"{b}{level + 1}"))
+    edges += [("src", "x0"), ("src", "y0"), ("x12", "sink"), ("y12", "sink"), ("src", "x11")]
+    nodes, edge_dicts = _graph(edges, {"src": "SOURCE", "sink": "SINK"})
+
+    chains = shortest_chains(nodes, edge_dicts, max_chains=3)
+
+    assert len(chains) == 3
+    assert chains[0] == ["src", "x11", "x12", "sink"]
+    assert all(len(chain) <= len(chains[-1]) for chain in chains)
+
+
+def test_max_depth_prunes_long_chains():
+    edges = [("src", "a"), ("a", "b"), ("b", "sink"), ("src", "c"), ("c", "sink")]
+    nodes, edge_dicts = _graph(edges, {"src": "SOURCE", "sink": "SINK"})
+    assert shortest_chains(nodes, edge_dicts, max_depth=3) == [["src", "c", "sink"]]
+    assert shortest_chains(nodes, edge_dicts, max_depth=2) == []
+
+
+def test_budgets_return_partial_results():
+    edges = []
+    for level in range(30):
+        for a, b in itertools.product("xyz", repeat=2):
+            edges.append((f"{a}{level}", f"{b}{level + 1}"))
+    edges += [("src", "x0"), ("x30", "sink"), ("y30", "sink"), ("z30", "sink")]
+    nodes, edge_dicts = _graph(edges, {"src": "SOURCE", "sink": "SINK"})
+
+    found = shortest_chains(nodes, edge_dicts, max_chains=10_000, max_expansions=200, time_budget_ms=0)
+    assert 0 < len(found) < 10_000
+    assert all(chain[0] == "src" and chain[-1] == "sink" for chain in found)
+
+    assert shortest_chains(nodes, edge_dicts, max_chains=10_000, max_expansions=0) == []
+
+
+def test_graph_without_roles_uses_entry_and_exit_nodes():
+    edges = [("entry", "mid"), ("mid", "exit")]
+    nodes, edge_dicts = _graph(edges)
+    assert shortest_chains(nodes, edge_dicts) == [["entry", "mid", "exit"]]
+    chains = build_call_chains(nodes, edge_dicts)
+    assert [[node["id"] for node in chain] for chain in chains] == [["entry", "mid", "exit"]]
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from secrux_ai import translation
+from secrux_ai.agents.vuln_review import VulnReviewAgent
+from secrux_ai.models import AgentContext, AgentRecommendation, StageEvent, StageType
+from service.jobs import _build_review_result, _complete_translations
+
+ZH = {"summary": "存在 SQL 注入", "fixHint": "使用参数化查询"}
+EN = {"summary": "SQL injection is present", "fixHint": "Use parameterized queries"}
+
+
+def _reply(payload) -> dict:
+    return {"choices": [{"message": {"content": json.dumps(payload, ensure_ascii=False)}}]}
+
+
+async def _chat(self, context, purpose, url, api_key, model, system, user, temperature=0.2):
+    if purpose == "translate_opinion":
+        return _reply(EN)
+    # The model only answered in Chinese, so the English opinion must be translated.
+    return _reply({"verdict": "TRUE_POSITIVE", "confidence": 0.9, "opinionI18n": {"zh": ZH}, **ZH})
+
+
+async def _translate_batch(url, api_key, model, requests):
+    return [dict(EN) for _ in requests]
+
+
+def _event() -> StageEvent:
+    now = datetime.now(timezone.utc)
+    return StageEvent(
+        tenantId="tenant",
+        taskId="task",
+        stageId="finding-1",
+        stageType=StageType.RESULT_REVIEW,
+        status="SUCCEEDED",
+        startedAt=now,
+        endedAt=now,
+        extra={
+            "jobId": "job-1",
+            "finding": {"ruleId": "sqli", "severity": "HIGH", "location": {"path": "app.py", "line": 3}},
+            "aiClient": {"baseUrl": "http://llm.local", "apiKey": "sk-test", "model": "test-model"},
+        },
+    )
+
+
+async def _review(mode: str) -> AgentRecommendation:
+    agent = VulnReviewAgent("vuln-review", params={"mode": mode})
+    event = _event()
+    findings = await agent.arun(AgentContext(event=event))
+    return AgentRecommendation(
+        taskId=event.task_id, stageId=event.stage_id, stageType=event.stage_type, findings=findings, elapsedMs=0
+    )
+
+
+def _comparable(recommendation: AgentRecommendation) -> dict:
+    result = _build_review_result(recommendation)
+    result["recommendation"].pop("generatedAt")
+    return result
+
+
+@pytest.mark.parametrize("mode", ["simple", "precise"])
+def test_deferred_translation_matches_inline(mode, monkeypatch):
+    monkeypatch.setattr(VulnReviewAgent, "_call_chat_completion", _chat)
+    monkeypatch.setattr(translation, "atranslate_batch", _translate_batch)
+    monkeypatch.setattr(translation, "MODE", "deferred")
+
+    inline = _comparable(asyncio.run(_review(mode)))
+
+    async def deferred_run():
+        with translation.deferred_translations() as deferred:
+            recommendation = await _review(mode)
+        pending = _build_review_result(recommendation, translation_pending=True)
+        assert len(deferred) == 1
+        await deferred.flush()
+        return pending, recommendation
+
+    pending, recommendation = asyncio.run(deferred_run())
+    # Stored before the flush in the model's language...
+    assert pending["fixHint"] == ZH["fixHint"]
+    # ...and identical to the inline result once the translation was written back.
+    assert _comparable(recommendation) == inline
+    assert inline["fixHint"] == EN["fixHint"]
+    assert inline["opinionI18n"]["en"] == EN
+    assert recommendation.findings[0].summary == EN["summary"]
+
+
+def test_failed_flush_is_logged(caplog):
+    class Broken:
+        def job_ids(self):
+            return []
+
+        def __len__(self):
+            return 1
+
+        async def flush(self):
+            raise RuntimeError("gateway down")
+
+    with caplog.at_level("ERROR", logger="service.jobs"):
+        asyncio.run(_complete_translations(Broken(), {}))
+    assert "Deferred translation flush failed" in caplog.text
+    assert "gateway down" in caplog.text
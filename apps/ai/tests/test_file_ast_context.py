@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import asyncio
+
+from secrux_ai.agents.vuln_review import VulnReviewAgent
+from secrux_ai.models import AgentContext
+from secrux_ai.task_cache import TASK_CACHE_KEY, TaskCache
+
+
+def test_unreadable_file_is_not_cached_for_the_task():
+    agent = VulnReviewAgent("vuln-review", params={"mode": "precise"})
+    context = AgentContext.model_construct(shared_cache={TASK_CACHE_KEY: TaskCache()}, mcp_client=object())
+    reads = []
+
+    async def read_file(client, path):
+        reads.append(path)
+        # The first read fails (e.g. the MCP server was briefly unavailable).
+        return None if len(reads) == 1 else b"def handler(request):\n    return request\n"
+
+    agent._read_file = read_file
+    location = {"path": "app/views.py", "line": 2}
+
+    async def run():
+        first = await agent._file_ast_context(context, location, 1)
+        await agent._file_ast_context(context, location, 1)
+        await agent._file_ast_context(context, location, 1)
+        return first
+
+    assert asyncio.run(run()) is None
+    # Retried after the failure, then served from the task cache.
+    assert reads == ["app/views.py", "app/views.py"]
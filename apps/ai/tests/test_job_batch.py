@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import List
+
+from secrux_ai.models import AgentRecommendation
+
+from service import jobs
+from service.database import get_session
+from service.jobs import BATCH_ITEM_STATUS, BATCH_JOB_TYPE
+from service.models import AiJob, utcnow
+from service.worker import claim_next_job, requeue_stale_jobs
+
+
+def _batch(count: int) -> tuple[uuid.UUID, List[uuid.UUID]]:
+    tenant = uuid.uuid4()
+    items = [
+        AiJob(tenant_id=tenant, job_type="FINDING_REVIEW", target_id=f"f-{index}", status=BATCH_ITEM_STATUS)
+        for index in range(count)
+    ]
+    batch = AiJob(
+        tenant_id=tenant,
+        job_type=BATCH_JOB_TYPE,
+        target_id=f"batch:{count}",
+        payload={"jobIds": [str(item.job_id) for item in items]},
+        status="QUEUED",
+    )
+    for item in items:
+        item.context = {"batchJobId": str(batch.job_id)}
+    with get_session() as session:
+        session.add_all([batch, *items])
+        session.commit()
+        return batch.job_id, [item.job_id for item in items]
+
+
+def _statuses(job_ids: List[uuid.UUID]) -> List[str]:
+    with get_session() as session:
+        return [session.get(AiJob, job_id).status for job_id in job_ids]
+
+
+class _Orchestrator:
+    """Stands in for a leased orchestrator and records which items were in flight."""
+
+    def __init__(self, item_ids: List[uuid.UUID]) -> None:
+        self.item_ids = item_ids
+        self.seen: List[List[str]] = []
+
+    async def aprocess(self, event):
+        self.seen.append(_statuses(self.item_ids))
+        await asyncio.sleep(0)
+        return AgentRecommendation(
+            taskId=event.task_id, stageId=event.stage_id, stageType=event.stage_type, elapsedMs=0
+        )
+
+    @asynccontextmanager
+    async def lease(self, slot, config):
+        yield self
+
+
+def test_batch_items_stay_batched_until_started(db, monkeypatch):
+    batch_id, item_ids = _batch(3)
+    orchestrator = _Orchestrator(item_ids)
+    monkeypatch.setattr(jobs, "JOB_BATCH_CONCURRENCY", 1)
+    monkeypatch.setattr(jobs, "_build_platform_config", lambda item, session: object())
+    monkeypatch.setattr(jobs, "ORCHESTRATORS", orchestrator)
+    with get_session() as session:
+        claimed_id, lease = claim_next_job(session)
+    assert claimed_id == batch_id
+
+    asyncio.run(jobs.aexecute_job(batch_id, lease))
+
+    # With one item in flight at a time, later items are still BATCHED when earlier ones run.
+    assert orchestrator.seen[0] == ["RUNNING", BATCH_ITEM_STATUS, BATCH_ITEM_STATUS]
+    assert orchestrator.seen[1] == ["COMPLETED", "RUNNING", BATCH_ITEM_STATUS]
+    assert _statuses([batch_id, *item_ids]) == ["COMPLETED"] * 4
+
+
+def test_requeue_never_queues_batch_items(db):
+    batch_id, item_ids = _batch(2)
+    with get_session() as session:
+        _, lease = claim_next_job(session)
+        for job_id in (batch_id, item_ids[0]):
+            job = session.get(AiJob, job_id)
+            job.lease_owner = lease
+            job.status = "RUNNING"
+            job.updated_at = utcnow() - timedelta(seconds=120)
+            session.add(job)
+        session.commit()
+
+    with get_session() as session:
+        assert requeue_stale_jobs(session, lease_seconds=60) == 1
+    assert _statuses([batch_id, *item_ids]) == ["QUEUED", BATCH_ITEM_STATUS, BATCH_ITEM_STATUS]
+    with get_session() as session:
+        assert claim_next_job(session)[0] == batch_id
+        assert claim_next_job(session) is None
+
+
+def test_heartbeat_covers_batch_and_started_items(db):
+    batch_id, item_ids = _batch(2)
+    with get_session() as session:
+        _, lease = claim_next_job(session)
+    token = jobs._LEASE.set(lease)
+    try:
+        assert jobs._start_item(batch_id, item_ids[0]) is True
+    finally:
+        jobs._LEASE.reset(token)
+    with get_session() as session:
+        for job_id in (batch_id, item_ids[0]):
+            job = session.get(AiJob, job_id)
+            job.updated_at = utcnow() - timedelta(seconds=120)
+            session.add(job)
+        session.commit()
+
+    assert jobs._touch_lease(lease) == 2
+    with get_session() as session:
+        assert requeue_stale_jobs(session, lease_seconds=60) == 0
+    assert _statuses([batch_id, *item_ids]) == ["RUNNING", "RUNNING", BATCH_ITEM_STATUS]
+
+
+def test_failed_and_finished_items_drop_their_secrets(db):
+    batch_id, item_ids = _batch(3)
+    with get_session() as session:
+        for item_id in item_ids:
+            jobs.store_job_secret(item_id, {"apiKey": "sk-test"}, session)
+        session.get(AiJob, item_ids[0]).status = "COMPLETED"
+        session.commit()
+
+    def secrets() -> List[bool]:
+        with get_session() as session:
+            return [session.get(jobs.AiJobSecret, item_id) is not None for item_id in item_ids]
+
+    _, pending = jobs._load_batch(batch_id, {})
+    assert [item.job_id for item, _ in pending] == item_ids[1:]
+    assert secrets() == [False, True, True]
+
+    jobs._fail_unfinished_items(batch_id, "batch failed")
+    assert _statuses(item_ids) == ["COMPLETED", "FAILED", "FAILED"]
+    assert secrets() == [False, False, False]
+
+
+def test_abandoned_batch_fails_its_unfinished_items(db):
+    batch_id, item_ids = _batch(2)
+    with get_session() as session:
+        claim_next_job(session)
+        session.get(AiJob, item_ids[0]).status = "COMPLETED"
+        batch = session.get(AiJob, batch_id)
+        batch.updated_at = utcnow() - timedelta(seconds=120)
+        session.commit()
+
+    with get_session() as session:
+        assert requeue_stale_jobs(session, lease_seconds=60, max_attempts=1) == 0
+    assert _statuses([batch_id, *item_ids]) == ["FAILED", "COMPLETED", "FAILED"]
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from datetime import timedelta
+
+import pytest
+from cryptography.fernet import Fernet
+
+from service import jobs
+from service.database import get_session
+from service.jobs import _LEASE, _discard_secret, _mark_job, _touch_lease, store_job_secret
+from service.models import AiJob, AiJobSecret, utcnow
+from service.worker import claim_next_job, requeue_stale_jobs
+
+
+def _queue(**fields) -> uuid.UUID:
+    job = AiJob(tenant_id=uuid.uuid4(), job_type="FINDING_REVIEW", target_id="f-1", status="QUEUED", **fields)
+    with get_session() as session:
+        session.add(job)
+        session.commit()
+        return job.job_id
+
+
+def _job(job_id: uuid.UUID) -> AiJob:
+    with get_session() as session:
+        return session.get(AiJob, job_id)
+
+
+def _age(job_id: uuid.UUID, seconds: int) -> None:
+    with get_session() as session:
+        job = session.get(AiJob, job_id)
+        job.updated_at = utcnow() - timedelta(seconds=seconds)
+        session.add(job)
+        session.commit()
+
+
+def test_claim_takes_oldest_job_once_and_stamps_lease(db):
+    first = _queue()
+    second = _queue()
+    with get_session() as session:
+        claimed = claim_next_job(session)
+    assert claimed is not None
+    job_id, lease = claimed
+    assert job_id == first
+    assert _job(first).status == "RUNNING"
+    assert _job(first).lease_owner == lease
+
+    with get_session() as session:
+        assert claim_next_job(session)[0] == second
+    with get_session() as session:
+        assert claim_next_job(session) is None
+
+
+def test_requeue_only_stale_jobs_and_clears_lease(db):
+    stale, fresh = _queue(), _queue()
+    with get_session() as session:
+        claim_next_job(session)
+        claim_next_job(session)
+    _age(stale, 120)
+
+    with get_session() as session:
+        assert requeue_stale_jobs(session, lease_seconds=60) == 1
+    assert _job(stale).status == "QUEUED"
+    assert _job(stale).lease_owner is None
+    assert _job(fresh).status == "RUNNING"
+
+
+def test_heartbeat_keeps_running_job_leased(db):
+    job_id = _queue()
+    with get_session() as session:
+        _, lease = claim_next_job(session)
+    _age(job_id, 120)
+
+    assert _touch_lease(lease) == 1
+    with get_session() as session:
+        assert requeue_stale_jobs(session, lease_seconds=60) == 0
+    assert _job(job_id).status == "RUNNING"
+
+
+def test_heartbeat_task_refreshes_lease(db, monkeypatch):
+    job_id = _queue()
+    with get_session() as session:
+        _, lease = claim_next_job(session)
+    _age(job_id, 120)
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 0.01)
+
+    async def run() -> None:
+        async with jobs._heartbeat(lease):
+            await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+    with get_session() as session:
+        assert requeue_stale_jobs(session, lease_seconds=60) == 0
+
+
+def test_run_that_lost_its_lease_cannot_finish_job(db):
+    job_id = _queue()
+    with get_session() as session:
+        _, lease = claim_next_job(session)
+        store_job_secret(job_id, {"apiKey": "sk-test"}, session)
+        session.commit()
+    _age(job_id, 120)
+    with get_session() as session:
+        requeue_stale_jobs(session, lease_seconds=60)
+        _, successor = claim_next_job(session)
+    assert successor != lease
+
+    token = _LEASE.set(lease)
+    try:
+        assert _mark_job(job_id, "COMPLETED", result={"ok": True}) is False
+        _discard_secret(job_id)
+    finally:
+        _LEASE.reset(token)
+    job = _job(job_id)
+    assert job.status == "RUNNING"
+    assert job.result is None
+    with get_session() as session:
+        # The successor still needs the apiKey.
+        assert session.get(AiJobSecret, job_id) is not None
+
+    token = _LEASE.set(successor)
+    try:
+        assert _mark_job(job_id, "COMPLETED", result={"ok": True}) is True
+        _discard_secret(job_id)
+    finally:
+        _LEASE.reset(token)
+    assert _job(job_id).status == "COMPLETED"
+    with get_session() as session:
+        assert session.get(AiJobSecret, job_id) is None
+
+
+def test_job_secret_is_encrypted_at_rest(db, monkeypatch):
+    job_id = _queue()
+    with get_session() as session:
+        store_job_secret(job_id, {"apiKey": "sk-test"}, session)
+        session.commit()
+    with get_session() as session:
+        stored = session.get(AiJobSecret, job_id).secret
+        assert "sk-test" not in json.dumps(stored)
+        assert jobs.load_job_secret(job_id, session) == {"apiKey": "sk-test"}
+
+    # A worker configured with another key fails the job instead of running without credentials.
+    monkeypatch.setattr(jobs, "_CIPHER", Fernet(Fernet.generate_key()))
+    with get_session() as session:
+        with pytest.raises(jobs.JobSecretError):
+            jobs.load_job_secret(job_id, session)
+
+
+def _stage_secret(job_id: uuid.UUID) -> None:
+    with get_session() as session:
+        store_job_secret(job_id, {"apiKey": "sk-test"}, session)
+        session.commit()
+
+
+def _has_secret(job_id: uuid.UUID) -> bool:
+    with get_session() as session:
+        return session.get(AiJobSecret, job_id) is not None
+
+
+def test_final_status_drops_the_secret(db):
+    completed, failed, running = _queue(), _queue(), _queue()
+    for job_id in (completed, failed, running):
+        _stage_secret(job_id)
+    assert _mark_job(completed, "COMPLETED", result={"ok": True})
+    assert _mark_job(failed, "FAILED", error="boom")
+    assert _mark_job(running, "RUNNING")
+    assert not _has_secret(completed)
+    assert not _has_secret(failed)
+    assert _has_secret(running)
+
+
+def test_lease_check_sweeps_secrets_of_finished_jobs(db):
+    finished, queued = _queue(), _queue()
+    for job_id in (finished, queued):
+        _stage_secret(job_id)
+    with get_session() as session:
+        # e.g. a worker died between recording the result and deleting the secret.
+        job = session.get(AiJob, finished)
+        job.status = "COMPLETED"
+        session.add(job)
+        session.commit()
+
+    with get_session() as session:
+        requeue_stale_jobs(session, lease_seconds=60)
+    assert not _has_secret(finished)
+    assert _has_secret(queued)
+
+
+def test_job_fails_once_its_attempts_are_used(db):
+    job_id = _queue()
+    for attempt in (1, 2):
+        with get_session() as session:
+            assert claim_next_job(session)[0] == job_id
+        assert _job(job_id).attempts == attempt
+        _age(job_id, 120)
+        with get_session() as session:
+            assert requeue_stale_jobs(session, lease_seconds=60, max_attempts=2) == (1 if attempt == 1 else 0)
+
+    job = _job(job_id)
+    assert job.status == "FAILED"
+    assert job.lease_owner is None
+    assert "2 attempts" in job.error
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import uuid
+
+from service import knowledge_vectors
+from service.database import get_session
+from service.knowledge_vectors import KnowledgeVectorIndex
+from service.models import KnowledgeEntry, utcnow
+
+
+def _entry(tenant: uuid.UUID, embedding, tags=()) -> KnowledgeEntry:
+    entry = KnowledgeEntry(tenant_id=tenant, title="t", body="b", tags=list(tags), embedding=list(embedding))
+    with get_session() as session:
+        session.add(entry)
+        session.commit()
+        session.refresh(entry)
+    return entry
+
+
+def _search(index: KnowledgeVectorIndex, tenant: uuid.UUID, embedding, limit: int = 5):
+    with get_session() as session:
+        return [entry_id for entry_id, _ in index.search(session, tenant, embedding, [], limit)]
+
+
+def test_index_picks_up_writes_from_other_processes(db):
+    tenant = uuid.uuid4()
+    first = _entry(tenant, [1.0, 0.0])
+    # A worker's index never sees the API's upsert/remove calls.
+    worker = KnowledgeVectorIndex(refresh_seconds=0)
+    assert _search(worker, tenant, [0.0, 1.0]) == [first.entry_id]
+
+    second = _entry(tenant, [0.0, 1.0])
+    assert _search(worker, tenant, [0.0, 1.0])[0] == second.entry_id
+
+    with get_session() as session:
+        entry = session.get(KnowledgeEntry, second.entry_id)
+        entry.embedding = [-1.0, 0.0]
+        entry.updated_at = utcnow()
+        session.add(entry)
+        session.commit()
+    assert _search(worker, tenant, [1.0, 0.0]) == [first.entry_id, second.entry_id]
+
+    with get_session() as session:
+        session.delete(session.get(KnowledgeEntry, first.entry_id))
+        session.commit()
+    assert _search(worker, tenant, [1.0, 0.0]) == [second.entry_id]
+
+
+def test_index_is_reused_within_refresh_interval(db):
+    tenant = uuid.uuid4()
+    first = _entry(tenant, [1.0, 0.0])
+    index = KnowledgeVectorIndex(refresh_seconds=3600)
+    assert _search(index, tenant, [1.0, 0.0]) == [first.entry_id]
+    _entry(tenant, [1.0, 0.1])
+    assert _search(index, tenant, [1.0, 0.0]) == [first.entry_id]
+
+
+def test_ivf_training_runs_off_the_upsert_path(db, monkeypatch):
+    monkeypatch.setattr(knowledge_vectors, "IVF_MIN_ENTRIES", 16)
+    tenant = uuid.uuid4()
+    index = KnowledgeVectorIndex(refresh_seconds=3600)
+    assert _search(index, tenant, [1.0, 0.0, 0.0]) == []
+
+    started = []
+    monkeypatch.setattr(knowledge_vectors, "_kmeans", lambda data: started.append(len(data)) or data[:4].copy())
+    for value in range(40):
+        entry = KnowledgeEntry(tenant_id=tenant, title="t", body="b", embedding=[1.0, value / 40, 0.5])
+        index.upsert(entry)
+        trainer = index._tenants[tenant].index.trainer
+        if trainer is not None:
+            trainer.join()
+
+    state = index._tenants[tenant].index
+    assert started == [16, 32]
+    assert state.centroids is not None
+    assert state.trained_size == 32
+    assert len(_search(index, tenant, [1.0, 0.5, 0.5], limit=40)) > 0
+
+
+def test_search_scores_a_snapshot_copied_once_per_change(db):
+    tenant = uuid.uuid4()
+    first = _entry(tenant, [1.0, 0.0])
+    index = KnowledgeVectorIndex(refresh_seconds=3600)
+    assert _search(index, tenant, [1.0, 0.0]) == [first.entry_id]
+    vectors = index._tenants[tenant].index
+    snapshot = vectors.snapshot()
+    assert vectors.snapshot() is snapshot
+
+    second = _entry(tenant, [0.0, 1.0])
+    index.upsert(second)
+    assert vectors.snapshot() is not snapshot
+    # A search already holding the old snapshot is unaffected by the write.
+    assert [entry_id for entry_id, _ in snapshot.search(vectors.matrix[1], [], 5)] == [first.entry_id]
+    assert _search(index, tenant, [0.0, 1.0])[0] == second.entry_id
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from secrux_ai import llm
+from secrux_ai.llm_limiter import (
+    AdaptiveLimiter,
+    LLMThrottledError,
+    exhausted_window,
+    limiter_stats,
+    parse_duration,
+    retry_after,
+)
+
+
+def _limiter(**kwargs) -> AdaptiveLimiter:
+    kwargs.setdefault("latency_tolerance", 0)
+    return AdaptiveLimiter(**kwargs)
+
+
+def test_successes_grow_the_limit_additively():
+    limiter = _limiter(initial=4, maximum=5)
+    for _ in range(4):
+        limiter.acquire()
+    for _ in range(4):
+        limiter.release(time.monotonic(), "ok")
+    # One slot per round trip: four completions at limit 4 add about one.
+    assert 4.9 < limiter.limit <= 5.0
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release(time.monotonic(), "ok")
+    assert limiter.limit == 5.0
+
+
+def test_a_burst_of_rejections_halves_the_limit_once():
+    limiter = _limiter(initial=8, minimum=2)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    for _ in range(4):
+        limiter.release(started, "throttled", {"retry-after-ms": "0"})
+    assert limiter.limit == 4.0
+    assert limiter.throttled == 4
+
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(time.monotonic(), "timeout")
+    assert limiter.limit == 2.0
+
+
+def test_latency_spike_cuts_gently():
+    limiter = _limiter(initial=10, latency_tolerance=2.0)
+    limiter.acquire()
+    limiter.release(time.monotonic() - 0.01, "ok")
+    limit = limiter.limit
+    limiter.acquire()
+    limiter.release(time.monotonic() - 0.5, "ok")
+    assert limiter.limit == pytest.approx(limit * 0.9)
+
+
+def test_rate_limit_headers():
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("soon") is None
+    assert retry_after({"retry-after-ms": "250", "retry-after": "9"}) == 0.25
+    assert retry_after({"retry-after": "3"}) == 3.0
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < retry_after({"retry-after": when}) <= 30
+    assert exhausted_window({"x-ratelimit-remaining-requests": "5", "x-ratelimit-reset-requests": "1s"}) is None
+    assert exhausted_window(
+        {
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2s",
+            "x-ratelimit-remaining-tokens": "0",
+            "x-ratelimit-reset-tokens": "500ms",
+        }
+    ) == 2.0
+
+
+def test_retry_after_pauses_new_requests():
+    limiter = _limiter(initial=4)
+    limiter.acquire()
+    limiter.release(time.monotonic(), "throttled", {"retry-after-ms": "200"})
+
+    async def wait_for_slot() -> float:
+        started = time.monotonic()
+        await limiter.aacquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(wait_for_slot()) >= 0.15
+    assert limiter.in_flight == 1
+
+
+def test_queue_is_fifo_and_released_slots_are_handed_on():
+    limiter = _limiter(initial=1, maximum=1)
+    order = []
+
+    async def run():
+        await limiter.aacquire()
+
+        async def call(name):
+            await limiter.aacquire()
+            order.append(name)
+            limiter.release(time.monotonic(), "ok")
+
+        tasks = [asyncio.create_task(call(name)) for name in "abc"]
+        await asyncio.sleep(0.01)
+        assert limiter.queued == 3
+        limiter.release(time.monotonic(), "ok")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["a", "b", "c"]
+    assert limiter.in_flight == 0
+
+
+def test_abandoned_waiters_give_back_their_place_and_slot():
+    limiter = _limiter(initial=1, maximum=1)
+
+    async def run():
+        await limiter.aacquire()
+        # A queued caller that times out leaves the queue.
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.aacquire(), 0.02)
+        assert limiter.queued == 0
+
+        # A caller cancelled after being granted a slot returns it.
+        granted = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        limiter.release(time.monotonic(), "ok")
+        assert limiter.in_flight == 1
+        granted.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await granted
+        assert limiter.in_flight == 0
+
+        await asyncio.wait_for(limiter.aacquire(), 0.5)
+
+    asyncio.run(run())
+
+
+def test_apost_json_retries_throttled_calls(monkeypatch):
+    responses = [
+        httpx.Response(429, headers={"retry-after-ms": "50"}, json={"error": "busy"}),
+        httpx.Response(503, headers={"retry-after": "0.01"}, json={"error": "busy"}),
+        httpx.Response(200, json={"ok": True}),
+    ]
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(time.monotonic())
+        return responses[len(seen) - 1]
+
+    monkeypatch.setattr(llm._POOL, "async_client", lambda url: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    url = "http://limiter-test.local/v1/chat/completions"
+
+    async def run():
+        return await llm.apost_json(url, {"model": "retry-test"}, headers={"Authorization": "Bearer sk-test"})
+
+    assert asyncio.run(run()) == {"ok": True}
+    assert len(seen) == 3
+    assert seen[1] - seen[0] >= 0.045
+    stats = [item for item in limiter_stats() if item["url"] == url]
+    assert stats and stats[0]["throttled"] == 2
+
+
+def test_apost_json_raises_once_throttling_outlasts_the_deadline(monkeypatch):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(429, headers={"retry-after": "0.05"}, json={"error": "busy"})
+
+    monkeypatch.setattr(llm._POOL, "async_client", lambda url: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(llm, "THROTTLE_TIMEOUT", 0.2)
+
+    async def run():
+        return await llm.apost_json(
+            "http://deadline-test.local/v1/chat/completions",
+            {"model": "deadline-test"},
+            headers={"Authorization": "Bearer sk-test"},
+        )
+
+    started = time.monotonic()
+    with pytest.raises(LLMThrottledError):
+        asyncio.run(run())
+    assert 0.15 <= time.monotonic() - started < 2.0
+    assert len(seen) >= 2
+
+
+def test_acquire_gives_up_at_the_deadline():
+    limiter = _limiter(initial=1, maximum=1)
+    limiter.acquire()
+    with pytest.raises(LLMThrottledError):
+        limiter.acquire(deadline=time.monotonic() + 0.05)
+    assert limiter.queued == 0
+    limiter.release(time.monotonic(), "ok")
+    assert limiter.in_flight == 0
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from secrux_ai.config import AgentConfig, PlatformConfig
+from service import orchestrators
+from service.orchestrators import OrchestratorCache
+
+SLOT = ("tenant-a", "FINDING_REVIEW", "agent", "simple")
+
+
+class _Orchestrator:
+    built: List["_Orchestrator"] = []
+
+    def __init__(self, config: PlatformConfig) -> None:
+        self.config = config
+        self.closed = False
+        _Orchestrator.built.append(self)
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def _fake_orchestrator(monkeypatch):
+    _Orchestrator.built = []
+    monkeypatch.setattr(orchestrators, "AgentOrchestrator", _Orchestrator)
+
+
+def _config(entrypoint: str = "pkg.agents:Review") -> PlatformConfig:
+    return PlatformConfig(agents=[AgentConfig(name="agent", kind="custom", entrypoint=entrypoint)])
+
+
+def test_same_config_reuses_warm_orchestrator():
+    cache = OrchestratorCache(max_entries=4, idle_seconds=600)
+
+    async def run():
+        async with cache.lease(SLOT, _config()) as first:
+            pass
+        async with cache.lease(SLOT, _config()) as second:
+            pass
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert len(_Orchestrator.built) == 1
+    assert not first.closed
+
+
+def test_edited_config_retires_previous_after_last_lease():
+    cache = OrchestratorCache(max_entries=4, idle_seconds=600)
+
+    async def run():
+        async with cache.lease(SLOT, _config()) as old:
+            # The agent row was edited while a job still holds the old orchestrator.
+            async with cache.lease(SLOT, _config("pkg.agents:ReviewV2")) as new:
+                assert new is not old
+            assert not old.closed
+        return old, new
+
+    old, new = asyncio.run(run())
+    assert old.closed
+    assert not new.closed
+    assert len(cache) == 1
+
+
+def test_other_tenants_do_not_share_orchestrators():
+    cache = OrchestratorCache(max_entries=4, idle_seconds=600)
+
+    async def run():
+        async with cache.lease(SLOT, _config()) as first:
+            pass
+        async with cache.lease(("tenant-b",) + SLOT[1:], _config()) as second:
+            pass
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is not second
+
+
+def test_size_bound_and_idle_eviction(monkeypatch):
+    cache = OrchestratorCache(max_entries=1, idle_seconds=60)
+
+    async def lease(slot, config):
+        async with cache.lease(slot, config) as orchestrator:
+            return orchestrator
+
+    first = asyncio.run(lease(SLOT, _config()))
+    second = asyncio.run(lease(("tenant-b",) + SLOT[1:], _config()))
+    assert first.closed and not second.closed
+    assert len(cache) == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr(orchestrators.time, "monotonic", lambda: now + 120)
+    assert asyncio.run(cache.collect()) == 1
+    assert second.closed
+    assert len(cache) == 0
+
+
+def test_disabled_cache_closes_after_each_job():
+    cache = OrchestratorCache(max_entries=0)
+
+    async def run():
+        async with cache.lease(SLOT, _config()) as orchestrator:
+            assert not orchestrator.closed
+        return orchestrator
+
+    assert asyncio.run(run()).closed
+
+
+def test_aclose_closes_everything():
+    cache = OrchestratorCache(max_entries=4, idle_seconds=600)
+
+    async def run():
+        async with cache.lease(SLOT, _config()) as orchestrator:
+            pass
+        await cache.aclose()
+        return orchestrator
+
+    assert asyncio.run(run()).closed
+    assert len(cache) == 0
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from service.builtin.sarif_index import _compact_locations
+
+
+def test_malformed_locations_are_skipped():
+    result = {
+        "locations": [
+            "not-a-location",
+            {"physicalLocation": "src/a.py"},
+            {"physicalLocation": {"artifactLocation": "src/b.py"}},
+            {"physicalLocation": {"artifactLocation": {"uri": "src/c.py"}, "region": [3, 4]}},
+            {"physicalLocation": {"artifactLocation": {"uri": "file://./src/d.py"}, "region": {"startLine": 7}}},
+        ]
+    }
+    assert _compact_locations(result) == [{"uri": "src/d.py", "startLine": 7, "endLine": 7}]
+    assert _compact_locations({"locations": {"uri": "src/e.py"}}) == []